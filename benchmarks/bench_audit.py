@@ -0,0 +1,91 @@
+# benchmarks/bench_audit.py
+# Tags: #ccbench #ccaudit
+#
+# Audit-log write throughput. "per-doc write_events" is what streaming with the
+# old API costs (schema + new connection per document); the sink keeps one
+# connection and commits batched transactions from a background thread.
+#
+#   python benchmarks/bench_audit.py [--events 2000000] [--per-doc 20]
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from src import audit  # noqa: E402
+
+SNIPPET = (
+    "We notify the supervisory authority within seventy-two hours of a personal data "
+    "breach. All users must use MFA as part of access controls."
+)
+
+
+def doc_batches(events: int, per_doc: int):
+    for d in range(0, events, per_doc):
+        yield [
+            {
+                "doc": f"doc_{d // per_doc:07d}.pdf",
+                "rule_id": f"GDPR-RULE-{k % 12:02d}",
+                "label": "Breach Notification (72h)",
+                "severity": "critical",
+                "snippet": f"{SNIPPET} [{d}:{k}]",  # unique: no help from deduplication
+            }
+            for k in range(min(per_doc, events - d))
+        ]
+
+
+def bench_sink(db: Path, events: int, per_doc: int) -> float:
+    t0 = time.perf_counter()
+    with audit.AuditSink("GDPR", "bench", audit.new_run_id(), "fp", path=db) as sink:
+        for rows in doc_batches(events, per_doc):
+            sink.write(rows)
+    assert sink.count == events
+    return time.perf_counter() - t0
+
+
+def bench_per_doc(db: Path, events: int, per_doc: int) -> float:
+    audit.DB_PATH = db
+    run_id = audit.new_run_id()
+    t0 = time.perf_counter()
+    for rows in doc_batches(events, per_doc):
+        audit.write_events(rows, "GDPR", "bench", run_id)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Audit sink vs per-document write_events")
+    ap.add_argument("--events", type=int, default=2_000_000)
+    ap.add_argument("--per-doc", type=int, default=20, help="findings per document")
+    ap.add_argument(
+        "--legacy-events",
+        type=int,
+        default=100_000,
+        help="events for the (slow) per-document write_events baseline",
+    )
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db, sink_db = Path(tmp) / "legacy.sqlite", Path(tmp) / "sink.sqlite"
+        t_legacy = bench_per_doc(legacy_db, args.legacy_events, args.per_doc)
+        t_sink = bench_sink(sink_db, args.events, args.per_doc)
+        with sqlite3.connect(sink_db) as cx:
+            assert cx.execute("SELECT COUNT(*) FROM events").fetchone()[0] == args.events
+        size_mb = sink_db.stat().st_size / 2**20
+
+    print(f"{'writer':<22} {'events':>10} {'seconds':>9} {'events/s':>11}")
+    for name, n, t in (
+        ("per-doc write_events", args.legacy_events, t_legacy),
+        ("AuditSink", args.events, t_sink),
+    ):
+        print(f"{name:<22} {n:>10} {t:>9.2f} {n / t:>11,.0f}")
+    print(f"\nsink database: {size_mb:.0f} MiB for {args.events:,} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_findings.py
+# Tags: #ccbench #ccengine
+#
+# Finding dicts built per match (make_finding, as scans used to return them)
+# vs. a FindingBatch, on text dense with matches: scan time, memory held by
+# the findings (tracemalloc, after the document text is dropped) and the cost
+# of building the dicts when they are finally written. Rows must be equal.
+#
+#   python benchmarks/bench_findings.py [--kb 256,1024,4096]
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from cc_mvp import load_ruleset  # noqa: E402
+from src.engine import RuleSet, make_finding  # noqa: E402
+
+DENSE = (
+    "MFA is required for admins. Logs are retained and reviewed. We apply least privilege.\n"
+    "Multi-factor authentication is enforced. Logging is audited quarterly.\n"
+)
+
+
+def as_dicts(ruleset: RuleSet, text: str) -> list[dict]:
+    out = []
+    for rule, found in zip(ruleset.rules, ruleset.spans(text)):
+        for start, end in found:
+            out.append(make_finding(rule, text, start, end))
+    return out
+
+
+def held(fn):
+    """(result, seconds, bytes still allocated once the text is gone); timed untraced."""
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, size
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Finding dicts vs. a compact FindingBatch")
+    ap.add_argument("--kb", default="256,1024,4096", help="document sizes in KiB")
+    args = ap.parse_args()
+    ruleset = RuleSet(load_ruleset("SOC2"))
+
+    print(
+        f"{'KiB':>6} {'hits':>8} {'dicts s':>8} {'MiB':>6} {'batch s':>8} {'MiB':>6} {'rows s':>7}"
+    )
+    for kb in (int(k) for k in args.kb.split(",")):
+        reps = kb * 1024 // len(DENSE)
+        dicts, t_dicts, m_dicts = held(lambda: as_dicts(ruleset, DENSE * reps))
+        batch, t_batch, m_batch = held(lambda: ruleset.find(DENSE * reps).detach())
+        t0 = time.perf_counter()
+        rows = list(batch)
+        t_rows = time.perf_counter() - t0
+        assert rows == dicts, "FindingBatch rows differ from make_finding"
+        print(
+            f"{kb:>6} {len(dicts):>8} {t_dicts:>8.3f} {m_dicts / 2**20:>6.1f}"
+            f" {t_batch:>8.3f} {m_batch / 2**20:>6.1f} {t_rows:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
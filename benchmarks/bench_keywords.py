@@ -0,0 +1,66 @@
+# benchmarks/bench_keywords.py
+# Tags: #ccbench #ccengine
+#
+# Dictionary rules: one Aho-Corasick pass vs. a single regex alternation as the
+# term list grows. Both must agree on the findings.
+#
+#   python benchmarks/bench_keywords.py [--sizes 1000,10000,100000] [--kb 512]
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from src.keywords import KeywordMatcher, KeywordRule  # noqa: E402
+from bench_ruleset import corpus_text  # noqa: E402
+
+
+def vendor_terms(n: int, seed: int = 11) -> list[str]:
+    rnd = random.Random(seed)
+    out = set()
+    while len(out) < n:
+        words = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9))) for _ in "ab"]
+        out.add(" ".join(words[: rnd.randint(1, 2)]))
+    return sorted(out)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Keyword automaton vs. regex alternation")
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--kb", type=int, default=256, help="document size in KiB")
+    args = ap.parse_args()
+
+    base = corpus_text(args.kb)
+    print(f"document: {len(base) / 1024:.0f} KiB")
+    print(f"{'terms':>7} {'build s':>8} {'automaton s':>12} {'regex build s':>14} {'regex s':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        terms = vendor_terms(n)
+        # sprinkle a few real terms so there is something to find
+        text = base + "\n" + " ".join(terms[:: max(1, n // 50)])
+
+        t0 = time.perf_counter()
+        matcher = KeywordMatcher([KeywordRule("KW", "Vendor", "info", terms)])
+        t_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        [spans] = matcher.find(text)
+        t_ac = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rx = re.compile(r"(?i)\b(?:" + "|".join(map(re.escape, terms)) + r")\b")
+        t_rx_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        rx_spans = [m.span() for m in rx.finditer(text)]
+        t_rx = time.perf_counter() - t0
+        assert len(spans) == len(rx_spans), f"automaton/regex disagree at {n} terms"
+        print(f"{n:>7} {t_build:>8.2f} {t_ac:>12.3f} {t_rx_build:>14.2f} {t_rx:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_normalize.py
+# Tags: #ccbench #ccengine
+#
+# The former three-substitution normalizer vs. the single-pass normalize_text
+# and normalize_with_offsets (which also builds the offset map), on clean text
+# and on text with PDF-style noise (space runs, tabs, hyphen breaks, blank
+# lines). All three must produce the same text.
+#
+#   python benchmarks/bench_normalize.py [--mb 1,4,16] [--repeat 3]
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from cc_mvp import normalize_text, normalize_with_offsets  # noqa: E402
+from bench_ruleset import corpus_text  # noqa: E402
+
+NOISE = ["  ", "\t", "-\n", " \n\n\n\n", "   "]
+
+
+def three_pass(t: str) -> str:
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"-\n", "", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+    return t.strip()
+
+
+def noisy(text: str, every: int, seed: int = 5) -> str:
+    """Replace roughly one space in `every` with extraction noise."""
+    rnd = random.Random(seed)
+    words = text.split(" ")
+    return "".join(w + (rnd.choice(NOISE) if rnd.randrange(every) == 0 else " ") for w in words)
+
+
+def best(fn, text: str, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(text)
+        times.append(time.perf_counter() - t0)
+    return out, min(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Three-pass vs. single-pass normalization")
+    ap.add_argument("--mb", default="1,4,16", help="document sizes in MiB")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(
+        f"{'MiB':>5} {'text':>10} {'3-pass s':>9} {'1-pass s':>9} {'+offsets s':>11} {'map KiB':>8}"
+    )
+    for mb in (int(s) for s in args.mb.split(",")):
+        clean = corpus_text(mb * 1024)
+        for name, text in (
+            ("clean", clean),
+            ("noise 1/50", noisy(clean, 50)),
+            ("noise 1/5", noisy(clean, 5)),
+        ):
+            ref, t_old = best(three_pass, text, args.repeat)
+            out, t_new = best(normalize_text, text, args.repeat)
+            (mapped, offsets), t_map = best(normalize_with_offsets, text, args.repeat)
+            assert out == ref and mapped == ref, f"normalizers disagree on {name}"
+            map_kib = (offsets.norm.itemsize + offsets.raw.itemsize) * len(offsets) / 1024
+            print(f"{mb:>5} {name:>10} {t_old:>9.3f} {t_new:>9.3f} {t_map:>11.3f} {map_kib:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
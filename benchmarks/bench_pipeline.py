@@ -0,0 +1,209 @@
+# benchmarks/bench_pipeline.py
+# Tags: #ccbench #ccengine #ccaudit
+#
+# Scale benchmark: times each pipeline stage (discovery, read, normalize_text,
+# scan_text, write_events, write_outputs) on a synthetic corpus and compares
+# the throughputs with a stored JSON baseline. Exits non-zero when a stage is
+# more than --threshold slower than its baseline.
+#
+#   python benchmarks/bench_pipeline.py [--profile 1k,10k,100k,big] [--repeat 3]
+#       [--corpus-dir DIR] [--save-baseline] [--threshold 0.25]
+#
+# Baselines (benchmarks/baselines/<profile>.json) are per machine: record them
+# with --save-baseline on the box that runs the check.
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from benchmarks.corpus import generate_corpus  # noqa: E402
+from cc_mvp import iter_input_docs, normalize_text, reader_for, scan_text  # noqa: E402
+from src.audit import AuditSink, new_run_id  # noqa: E402
+from src.outputs import DEFAULT_FORMATS, FindingsOutputs  # noqa: E402
+from src.rulesets import compiled_ruleset  # noqa: E402
+
+BASELINE_DIR = REPO / "benchmarks" / "baselines"
+STAGES = ("discovery", "read", "normalize", "scan", "write_events", "write_outputs")
+UNITS = {
+    "discovery": "docs/s",
+    "read": "MiB/s",
+    "normalize": "MiB/s",
+    "scan": "MiB/s",
+    "write_events": "findings/s",
+    "write_outputs": "findings/s",
+}
+THRESHOLD = 0.25  # a stage this much below its baseline throughput fails the run
+MIN_SECONDS = 0.05  # stages faster than this in the baseline are too noisy to enforce
+
+
+@dataclass(frozen=True)
+class Profile:
+    docs: int
+    kb: float  # average document size
+
+
+PROFILES = {
+    "1k": Profile(1_000, 2),
+    "10k": Profile(10_000, 2),
+    "100k": Profile(100_000, 2),
+    "big": Profile(3, 8 * 1024),  # multi-MB single files
+}
+
+
+def run_stages(root: Path, regime: str, work: Path) -> dict:
+    """One pass over the corpus under `root`; seconds per stage plus volumes."""
+    ruleset = compiled_ruleset(regime)
+    seconds = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+
+    t0 = clock()
+    docs = iter_input_docs(root)
+    seconds["discovery"] = clock() - t0
+
+    per_doc: list[list[dict]] = []
+    chars = 0
+    for path in docs:
+        t0 = clock()
+        raw = "\n".join(reader_for(path).pages(path))
+        t1 = clock()
+        text = normalize_text(raw)
+        t2 = clock()
+        hits = scan_text(text, ruleset)
+        hits.set_doc(path.name)
+        rows = list(hits)  # a run builds the finding dicts once, for all writers
+        t3 = clock()
+        seconds["read"] += t1 - t0
+        seconds["normalize"] += t2 - t1
+        seconds["scan"] += t3 - t2
+        chars += len(raw)
+        per_doc.append(rows)
+
+    # both writers get the findings one document at a time, as a run hands them over
+    t0 = clock()
+    with AuditSink(
+        regime, "bench", new_run_id(), ruleset.fingerprint, work / "audit.sqlite"
+    ) as sink:
+        for hits in per_doc:
+            sink.write(hits)
+    seconds["write_events"] = clock() - t0
+
+    t0 = clock()
+    with FindingsOutputs(regime, DEFAULT_FORMATS, out_dir=work / "outputs") as outputs:
+        for hits in per_doc:
+            outputs.write(hits)
+    seconds["write_outputs"] = clock() - t0
+
+    return {"docs": len(docs), "mib": chars / 2**20, "findings": sink.count, "seconds": seconds}
+
+
+def throughputs(run: dict) -> dict[str, float]:
+    volume = {"docs/s": run["docs"], "MiB/s": run["mib"], "findings/s": run["findings"]}
+    return {s: volume[UNITS[s]] / max(run["seconds"][s], 1e-9) for s in STAGES}
+
+
+def measure(root: Path, regime: str, repeat: int) -> dict:
+    """Best of `repeat` passes per stage (the least disturbed one)."""
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as work:
+            runs.append(run_stages(root, regime, Path(work)))
+    best = dict(runs[0], seconds={s: min(r["seconds"][s] for r in runs) for s in STAGES})
+    best["throughput"] = throughputs(best)
+    return best
+
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD) -> list[str]:
+    """Stages whose throughput fell more than `threshold` below the baseline."""
+    failures = []
+    for stage in STAGES:
+        then = baseline["throughput"].get(stage)
+        if not then or baseline["seconds"].get(stage, 0.0) < MIN_SECONDS:
+            continue
+        now = current["throughput"][stage]
+        if now < then * (1 - threshold):
+            failures.append(
+                f"{stage}: {now:,.1f} {UNITS[stage]} vs baseline {then:,.1f}"
+                f" ({now / then - 1:+.0%})"
+            )
+    return failures
+
+
+def corpus(profile: str, corpus_dir: Path | None, seed: int):
+    """Context manager yielding the profile's corpus root (generated if missing)."""
+    spec = PROFILES[profile]
+    if corpus_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        generate_corpus(Path(tmp.name), spec.docs, spec.kb, seed)
+        return tmp
+    root = corpus_dir / f"{profile}-seed{seed}"
+    if not (root / ".complete").exists():  # reusable across runs
+        generate_corpus(root, spec.docs, spec.kb, seed)
+        (root / ".complete").touch()
+    return contextlib.nullcontext(str(root))
+
+
+def report(profile: str, result: dict, baseline: dict | None) -> None:
+    print(
+        f"\n[{profile}] {result['docs']:,} docs, {result['mib']:.1f} MiB, "
+        f"{result['findings']:,} findings"
+    )
+    print(f"{'stage':<14} {'seconds':>8} {'throughput':>14} {'unit':<11} {'vs baseline':>11}")
+    for stage in STAGES:
+        rate = result["throughput"][stage]
+        delta = ""
+        if baseline and baseline["throughput"].get(stage):
+            delta = f"{rate / baseline['throughput'][stage] - 1:+.0%}"
+        print(
+            f"{stage:<14} {result['seconds'][stage]:>8.3f} {rate:>14,.1f}"
+            f" {UNITS[stage]:<11} {delta:>11}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Per-stage pipeline throughput vs. stored baselines")
+    ap.add_argument("--profile", default="1k,big", help=f"any of {','.join(PROFILES)}")
+    ap.add_argument("--regime", default="GDPR")
+    ap.add_argument("--repeat", type=int, default=3, help="passes per profile (best is kept)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--corpus-dir", type=Path, default=None, help="keep generated corpora here")
+    ap.add_argument("--baseline-dir", type=Path, default=BASELINE_DIR)
+    ap.add_argument("--save-baseline", action="store_true", help="record this run as the baseline")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = ap.parse_args(argv)
+
+    failed = False
+    for profile in args.profile.split(","):
+        with corpus(profile, args.corpus_dir, args.seed) as root:
+            result = measure(Path(root), args.regime, args.repeat)
+        path = args.baseline_dir / f"{profile}.json"
+        baseline = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+        report(profile, result, baseline)
+        if args.save_baseline:
+            result.update(
+                profile=profile,
+                regime=args.regime,
+                python=platform.python_version(),
+                machine=f"{platform.system()} {platform.machine()}",
+            )
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+            print(f"baseline saved: {path}")
+        elif baseline is not None:
+            for line in compare(result, baseline, args.threshold):
+                print(f"REGRESSION {line}")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/bench_ruleset.py
+# Tags: #ccbench #ccengine
+#
+# Naive per-rule scanning vs. the compiled RuleSet (literal prefilter) as the
+# number of rules grows. Findings are checked for equality on every size.
+#
+#   python benchmarks/bench_ruleset.py [--sizes 10,100,1000] [--kb 1024]
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from cc_mvp import load_ruleset  # noqa: E402
+from src.engine import RuleSet, Rule, make_finding  # noqa: E402
+
+WORDS = (
+    "controller processor subprocessor retention encryption backup vendor incident "
+    "breach access review tenant firewall audit consent transfer safeguard"
+).split()
+
+
+def synthetic_rules(n: int, seed: int = 7) -> list[Rule]:
+    """Rules shaped like rules/*.yml: a term, a bounded gap, then a qualifier."""
+    rnd = random.Random(seed)
+    rules = []
+    for i in range(n):
+        a, b = rnd.sample(WORDS, 2)
+        value = rf"(?i)({a}\s+{b}{i}|{b}-{a}{i}).{{0,80}}(required|enforced|reviewed)"
+        rules.append(Rule(f"SYN-{i:05d}", f"Synthetic {i}", "info", re.compile(value)))
+    return rules
+
+
+def corpus_text(kb: int) -> str:
+    seed = "\n".join(
+        p.read_text(encoding="utf-8", errors="ignore")
+        for p in sorted((REPO / "data" / "testdocs").rglob("*.txt"))
+    )
+    reps = max(1, (kb * 1024) // max(1, len(seed)))
+    return (seed + "\n") * reps
+
+
+def naive_scan(text: str, rules: list[Rule]) -> list[dict]:
+    out = []
+    for r in rules:
+        for m in r.pattern.finditer(text):
+            out.append(make_finding(r, text, *m.span()))
+    return out
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Naive per-rule scan vs. compiled RuleSet")
+    ap.add_argument("--sizes", default="10,50,200,1000")
+    ap.add_argument("--kb", type=int, default=512, help="document size in KiB")
+    args = ap.parse_args()
+
+    real = load_ruleset("GDPR") + load_ruleset("SOC2")
+    text = corpus_text(args.kb)
+    print(f"document: {len(text) / 1024:.0f} KiB")
+    print(f"{'rules':>6} {'naive s':>9} {'ruleset s':>10} {'speedup':>8} {'findings':>9}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        rules = real + synthetic_rules(n)
+        expected, t_naive = timed(naive_scan, text, rules)
+        compiled = RuleSet(rules)
+        got, t_set = timed(lambda: list(compiled.scan(text)))
+        assert got == expected, f"findings differ at {n} rules"
+        print(
+            f"{len(rules):>6} {t_naive:>9.3f} {t_set:>10.3f} {t_naive / t_set:>7.1f}x {len(got):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
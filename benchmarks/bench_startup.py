@@ -0,0 +1,91 @@
+# benchmarks/bench_startup.py
+# Tags: #ccbench #ccstartup
+#
+# CLI start-up cost: `python -X importtime -c "import cc_mvp"` broken down by
+# module, plus wall time of `cc_mvp.py --help`. Readers, YAML and the AI layer
+# are imported lazily; tests/test_startup.py enforces the budget below.
+#
+#   python benchmarks/bench_startup.py [--runs 5] [--top 15]
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+
+# Cumulative `import cc_mvp` time; override on slow machines with CC_STARTUP_BUDGET_MS
+STARTUP_BUDGET_MS = float(os.getenv("CC_STARTUP_BUDGET_MS", "100"))
+# Must not be imported just to start the CLI
+HEAVY_MODULES = ("pdfplumber", "docx", "yaml", "openai", "requests", "pandas", "src.llm_layer")
+
+
+def import_times(module: str = "cc_mvp") -> list[tuple[str, int, int]]:
+    """(name, self us, cumulative us) per module imported by `import module`."""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    out = []
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line.split(":", 1)[1].split("|")
+        out.append((name.strip(), int(self_us), int(cum_us)))
+    return out
+
+
+def startup_ms(module: str = "cc_mvp", runs: int = 5) -> float:
+    """Median cumulative import time of `module` over `runs` fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        cum = {name: c for name, _, c in import_times(module)}
+        samples.append(cum[module] / 1000)
+    return statistics.median(samples)
+
+
+def loaded_modules(module: str = "cc_mvp") -> set[str]:
+    res = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(res.stdout.split())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="cc_mvp start-up / import-time breakdown")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args()
+
+    times = import_times()
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, self_us, cum_us in sorted(times, key=lambda t: -t[2])[: args.top]:
+        print(f"{cum_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+    walls = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "cc_mvp.py", "--help"], cwd=REPO, capture_output=True)
+        walls.append(time.perf_counter() - t0)
+    ms = startup_ms(runs=args.runs)
+    heavy = sorted(m for m in HEAVY_MODULES if m in loaded_modules())
+    print(f"\nimport cc_mvp (median of {args.runs}): {ms:.1f} ms  budget {STARTUP_BUDGET_MS} ms")
+    print(f"cc_mvp.py --help wall (median): {statistics.median(walls) * 1000:.1f} ms")
+    print(f"heavy modules loaded at start-up: {heavy or 'none'}")
+    if ms > STARTUP_BUDGET_MS or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
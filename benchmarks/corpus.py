@@ -0,0 +1,103 @@
+# benchmarks/corpus.py
+# Tags: #ccbench
+#
+# Synthetic document corpora for the scale benchmarks. Sentences are drawn from
+# data/testdocs and the exemplars (so rules fire at realistic rates), mixed
+# with neutral filler, and roughened with the extraction noise normalize_text
+# cleans up (space runs, tabs, hyphen line breaks, blank-line runs). Output is
+# deterministic for a given seed.
+#
+#   python benchmarks/corpus.py OUT_DIR [--docs 1000] [--kb 2] [--seed 0]
+from __future__ import annotations
+
+import argparse
+import random
+import re
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+SEED_DIRS = (REPO / "data" / "testdocs", REPO / "data" / "docs" / "exemplars")
+PER_DIR = 1000  # files per subdirectory, so discovery recurses like a real share
+
+FILLER = [
+    "This section describes general operating practices for the organisation.",
+    "Staff receive onboarding material covering office logistics and tooling.",
+    "The document is reviewed periodically by the policy owner.",
+    "Questions about this policy may be directed to the compliance team.",
+    "Teams coordinate through the standard change management calendar.",
+    "Budget approvals follow the finance delegation matrix.",
+    "Meeting notes are stored in the shared workspace for reference.",
+    "Vendors are onboarded through the procurement intake form.",
+]
+
+
+def seed_sentences() -> list[str]:
+    text = "\n".join(
+        p.read_text(encoding="utf-8", errors="ignore")
+        for d in SEED_DIRS
+        for p in sorted(d.rglob("*.txt"))
+    )
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.strip()) > 20]
+
+
+def roughen(sentence: str, rnd: random.Random) -> str:
+    """Inject the kind of noise PDF/DOCX extraction leaves behind."""
+    roll = rnd.random()
+    if roll < 0.1:
+        return sentence.replace(" ", "  ", 2)
+    if roll < 0.15:
+        cut = sentence.find(" ", len(sentence) // 2)
+        if cut > 4:
+            return f"{sentence[: cut - 2]}-\n{sentence[cut - 2:]}"
+    if roll < 0.2:
+        return sentence + "\t"
+    return sentence
+
+
+def document(size: int, rnd: random.Random, seeds: list[str]) -> str:
+    """About `size` characters of paragraphs; roughly one sentence in four is compliance text."""
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        sentences = [
+            roughen(rnd.choice(seeds) if rnd.random() < 0.25 else rnd.choice(FILLER), rnd)
+            for _ in range(rnd.randint(2, 6))
+        ]
+        paragraph = " ".join(sentences)
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return ("\n\n\n" if rnd.random() < 0.1 else "\n\n").join(parts)
+
+
+def generate_corpus(out_dir: Path, docs: int, kb: float = 2, seed: int = 0) -> list[Path]:
+    """
+    Write `docs` .txt files of about `kb` KiB each (sizes vary from half to
+    twice that) under `out_dir`, PER_DIR per subdirectory. Returns the paths.
+    """
+    rnd = random.Random(seed)
+    seeds = seed_sentences()
+    paths = []
+    for i in range(docs):
+        path = Path(out_dir) / f"batch_{i // PER_DIR:04d}" / f"doc_{i:07d}.txt"
+        if i % PER_DIR == 0:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        size = int(kb * 1024 * rnd.uniform(0.5, 2.0))
+        path.write_text(document(size, rnd, seeds), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Generate a synthetic document corpus")
+    ap.add_argument("out_dir", type=Path)
+    ap.add_argument("--docs", type=int, default=1000)
+    ap.add_argument("--kb", type=float, default=2, help="average document size in KiB")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    paths = generate_corpus(args.out_dir, args.docs, args.kb, args.seed)
+    total = sum(p.stat().st_size for p in paths)
+    print(f"{len(paths)} documents, {total / 2**20:.1f} MiB under {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
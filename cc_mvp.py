@@ -4,44 +4,177 @@
 from __future__ import annotations
 
 from pathlib import Path
+import os
 import re
-import csv
-import json
+import sys
+import time
+import tracemalloc
 import argparse
-import datetime
+import importlib
+from array import array
+from bisect import bisect_right
 from collections import Counter
+from contextlib import nullcontext
+from itertools import accumulate
 
-from src.audit import write_events, new_run_id
+from src.audit import AuditSink, new_run_id
+from src.budget import BUDGET_SOURCE, DEFAULT_RULE_BUDGET_MS, ScanBudget
+from src.cache import (
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL_DAYS,
+    TEXT_CACHE_MAX_BYTES,
+    FindingsCache,
+    LLMCache,
+    TextStore,
+    file_digest,
+)
+from src.engine import (
+    CHUNK_OVERLAP,
+    MAX_CHUNK,
+    RuleSet,
+    chunk_spans,
+    chunk_text,
+    Rule,
+    compile_rules,
+    load_rules,
+    ruleset_pool,
+)
+from src.findings import FindingBatch
+from src.rulesets import compiled_ruleset, regimes
+from src.keywords import KeywordRule
+from src.metrics import RunMetrics
+from src.outputs import DEFAULT_FORMATS, OUT_DIR, FindingsOutputs, parse_formats
 
 APP_VERSION = "0.2.2"  # ASCII-only stdout + per-file resilience
+# Part of the findings-cache key: bump it whenever the findings emitted for a
+# document change shape or content (new columns, spans, snippets, sources), so
+# entries stored by an older build are scanned again instead of served.
+FINDINGS_VERSION = 1
 
-# ---------- Optional deps ----------
-import pdfplumber
-from docx import Document as DocxDocument
-import yaml
+# Heavy/optional backends (pdfplumber, python-docx, PyYAML, the AI layer) are
+# imported where they are first used, so e.g. a TXT-only run never loads them.
 
 # ---------- Ingestion / normalization ----------
-MAX_CHUNK = 1200
-CHUNK_OVERLAP = 150
-ALLOWED_SUFFIXES = {".txt", ".pdf", ".docx"}
+PARALLEL_CHUNK_MIN_BYTES = 1 << 20  # a lone document this big is chunk-scanned on the pool
+NORMALIZE_VERSION = 1
+
+# Every edit normalization makes, as one pattern: space/tab runs -> " ",
+# newline runs holding hyphen breaks -> their remaining newlines (at most two),
+# 3+ newlines -> "\n\n". The lookahead lets the scanner skip other characters
+# quickly; text needing no edits comes back as the same string object.
+_EDITS = re.compile(r"(?=[ \t\n-])(?:([ \t]{2,}|\t)|((?:-?\n)*-\n(?:-?\n)*)|(\n{3,}))")
+
+
+def _edit(m: re.Match) -> str:
+    if m.lastindex == 1:
+        return " "
+    if m.lastindex == 2:  # hyphen breaks are joined, then newlines collapse
+        s = m.group()
+        return "\n" * min(s.count("\n") - s.count("-"), 2)
+    return "\n\n"
+
+
+def _normalize_body(t: str) -> str:
+    return _EDITS.sub(_edit, t)
 
 
 def normalize_text(t: str) -> str:
-    t = re.sub(r"[ \t]+", " ", t)
-    t = re.sub(r"-\n", "", t)  # join hyphen linebreaks
-    t = re.sub(r"\n{3,}", "\n\n", t)
-    return t.strip()
+    return _normalize_body(t).strip()
 
 
-def read_pdf(path: Path) -> str:
-    parts = []
+class OffsetMap:
+    """
+    Normalized -> raw offsets for one normalize_with_offsets() result. Only the
+    end of each edit is recorded (two int64 arrays); between edits the shift is
+    constant, so a lookup is one bisect.
+    """
+
+    __slots__ = ("lead", "norm", "raw")
+
+    def __init__(self, lead: int = 0, norm: array | None = None, raw: array | None = None):
+        self.lead = lead  # characters strip() removed from the front
+        self.norm = norm if norm is not None else array("q")
+        self.raw = raw if raw is not None else array("q")
+
+    def __len__(self) -> int:
+        return len(self.norm)
+
+    def to_raw(self, pos: int) -> int:
+        """Raw offset of the character at normalized offset `pos`."""
+        pos += self.lead
+        i = bisect_right(self.norm, pos) - 1
+        return pos if i < 0 else self.raw[i] + (pos - self.norm[i])
+
+    def span(self, start: int, end: int) -> tuple[int, int]:
+        """Raw (start, end) of the normalized span; `end` follows its last character."""
+        return self.to_raw(start), (self.to_raw(end - 1) + 1 if end > start else self.to_raw(start))
+
+
+def normalize_with_offsets(t: str) -> tuple[str, OffsetMap]:
+    """normalize_text(t) plus the map back to offsets in `t`, in the same single pass."""
+    out: list[str] = []
+    norm, raw = array("q"), array("q")
+    pos = shift = 0
+    for m in _EDITS.finditer(t):
+        start, end = m.span()
+        rep = _edit(m)
+        out += (t[pos:start], rep)
+        pos = end
+        shift += end - start - len(rep)
+        norm.append(end - shift)
+        raw.append(end)
+    out.append(t[pos:])
+    body = "".join(out)
+    text = body.strip()
+    return text, OffsetMap(len(body) - len(body.lstrip()) if text else 0, norm, raw)
+
+
+def iter_normalized(pages):
+    """
+    Streaming normalize_text over pages joined by newlines (as read_pdf joins them).
+    Yields (page_no, text) pieces whose concatenation equals
+    normalize_text("\n".join(pages)). Trailing whitespace/hyphens are held back
+    until the next page arrives, since they may merge with it (e.g. a hyphen
+    break across pages); everything before the last other character is final.
+    """
+    held, started = "", False
+    for page_no, raw in enumerate(pages, 1):
+        piece = held + ("\n" if page_no > 1 else "") + raw
+        cut = len(piece)
+        while cut and (piece[cut - 1].isspace() or piece[cut - 1] == "-"):
+            cut -= 1
+        out, held = _normalize_body(piece[:cut]), piece[cut:]
+        if not started:
+            out = out.lstrip()
+            started = bool(out)
+        if out:
+            yield page_no, out
+    tail = _normalize_body(held).rstrip()
+    if tail and not started:
+        tail = tail.lstrip()
+    if tail:
+        yield page_no, tail
+
+
+def iter_pdf_pages(path: Path):
+    """Yield the text of each PDF page, releasing page objects as we go."""
+    import pdfplumber
+
     with pdfplumber.open(str(path)) as pdf:
         for page in pdf.pages:
-            parts.append(page.extract_text() or "")
-    return "\n".join(parts)
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+
+def read_pdf(path: Path) -> str:
+    return "\n".join(iter_pdf_pages(path))
 
 
 def read_docx(path: Path) -> str:
+    from docx import Document as DocxDocument
+
     doc = DocxDocument(str(path))
     return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
 
@@ -50,67 +183,83 @@ def read_txt(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="ignore")
 
 
-def chunk_text(text: str):
-    i, n = 0, len(text)
-    while i < n:
-        end = min(n, i + MAX_CHUNK)
-        yield (i, end, text[i:end])
-        if end == n:
-            break
-        i = end - CHUNK_OVERLAP
+# ---------- Reader registry (suffix -> backend) ----------
+class Reader:
+    __slots__ = ("suffix", "pages", "paged", "dist", "module")
+
+    def __init__(
+        self,
+        suffix: str,
+        pages,
+        paged: bool = False,
+        dist: str | None = None,
+        module: str | None = None,
+    ):
+        self.suffix = suffix
+        self.pages = pages
+        self.paged = paged
+        self.dist = dist
+        self.module = module
+
+
+READERS: dict[str, Reader] = {}
+ALLOWED_SUFFIXES = READERS.keys()  # live view: registering a reader admits its suffix
+
+
+def register_reader(
+    suffix: str,
+    pages,
+    paged: bool = False,
+    dist: str | None = None,
+    module: str | None = None,
+) -> Reader:
+    """
+    Register `pages(path)`, which yields the raw text of each page of a file
+    (a single item for formats without pages). Backends import their library
+    inside `pages`, so it is only loaded once such a file is actually read.
+    `paged` readers are streamed page by page and their findings carry a
+    `page`; `dist` names the extractor distribution and makes the normalized
+    output worth keeping in the text store (keyed by its version). `module` is
+    what warm_readers() imports ahead of time.
+    """
+    reader = READERS[suffix.lower()] = Reader(suffix.lower(), pages, paged, dist, module)
+    return reader
+
+
+def reader_for(path: Path) -> Reader:
+    """Reader for `path`'s suffix; anything unregistered is read as plain text."""
+    return READERS.get(path.suffix.lower()) or READERS[".txt"]
+
+
+def warm_readers() -> None:
+    """Import every reader backend now; long-running processes pay this once, up front."""
+    for reader in READERS.values():
+        if reader.module:
+            importlib.import_module(reader.module)
+
+
+register_reader(".txt", lambda path: [read_txt(path)])
+register_reader(".pdf", iter_pdf_pages, paged=True, dist="pdfplumber", module="pdfplumber")
+register_reader(".docx", lambda path: [read_docx(path)], dist="python-docx", module="docx")
 
 
 # ---------- Rules loading / scanning ----------
-class Rule:
-    __slots__ = ("id", "label", "severity", "pattern")
-
-    def __init__(self, id: str, label: str, severity: str, pattern: re.Pattern):
-        self.id = id
-        self.label = label
-        self.severity = severity
-        self.pattern = pattern
-
-
-def load_rules_file(yaml_path: Path) -> list[Rule]:
-    data = yaml.safe_load(yaml_path.read_text(encoding="utf-8"))
-    rules: list[Rule] = []
-    for r in data.get("rules", []):
-        if r.get("type", "regex") != "regex":
-            continue
-        pat = re.compile(r["value"])
-        rules.append(Rule(r["id"], r["label"], r.get("severity", "info"), pat))
-    return rules
-
-
-def load_ruleset(regime: str) -> list[Rule]:
-    base = Path("rules")
-    if regime.upper() == "GDPR":
-        files = [base / "gdpr_critical.yml"]
-    elif regime.upper() == "SOC2":
-        files = [base / "soc2_critical.yml"]
-    else:
-        files = []
-    rules: list[Rule] = []
-    for f in files:
-        if not f.exists():
-            raise FileNotFoundError(f"Missing rules file: {f}")
-        rules.extend(load_rules_file(f))
-    return rules
-
-
-def scan_text(text: str, rules: list[Rule]):
-    for r in rules:
-        for m in r.pattern.finditer(text):
-            start, end = m.span()
-            snippet = text[max(0, start - 80) : min(len(text), end + 80)].replace("\n", " ")
-            yield {
-                "rule_id": r.id,
-                "label": r.label,
-                "severity": r.severity,
-                "start": start,
-                "end": end,
-                "snippet": snippet,
-            }
+def load_rules_file(yaml_path: Path) -> list[Rule | KeywordRule]:
+    """The rules of one YAML file (src.engine.load_rules)."""
+    return load_rules(yaml_path)
+
+
+def load_ruleset(regime: str) -> list[Rule | KeywordRule]:
+    """A regime's rules, from its memoized compiled RuleSet (src.rulesets)."""
+    return list(compiled_ruleset(regime).rules)
+
+
+def scan_text(text: str, rules: list[Rule | KeywordRule] | RuleSet) -> FindingBatch:
+    """
+    Findings for `text` as a FindingBatch (iterate it for finding dicts; snippets
+    are built then). Pass a compiled RuleSet when scanning many docs.
+    """
+    return compile_rules(rules).find(text)
 
 
 # ---------- Input discovery (recurse + skip dirs) ----------
@@ -123,126 +272,518 @@ def iter_input_docs(root: Path = Path("data/docs")) -> list[Path]:
         return []
     docs: list[Path] = []
     for p in root.rglob("*"):
-        if p.is_file() and p.suffix.lower() in ALLOWED_SUFFIXES:
+        if p.is_file() and p.suffix.lower() in READERS:
             docs.append(p)
     return sorted(docs)
 
 
 # ---------- Orchestration ----------
-def process_docs(regime: str, use_ai: bool = False):
+def read_document(path: Path) -> str:
+    """Extract (per suffix) and normalize one document."""
+    return normalize_text("\n".join(reader_for(path).pages(path)))
+
+
+def reader_version(suffix: str) -> str:
+    """
+    Identifies the extractor + normalizer behind a stored text. Bump
+    NORMALIZE_VERSION when normalize_text/iter_normalized change; library
+    upgrades invalidate stored text on their own.
+    """
+    import importlib.metadata
+
+    dist = READERS[suffix].dist
+    return f"{dist}-{importlib.metadata.version(dist)}/norm-{NORMALIZE_VERSION}"
+
+
+def scan_document(
+    path: Path,
+    ruleset: RuleSet,
+    keep_text: bool = False,
+    executor=None,
+    content_hash: str | None = None,
+    text_store: TextStore | None = None,
+    raw_offsets: bool = False,
+    stats: dict | None = None,
+):
+    """
+    Read, normalize and scan one document.
+    Returns (hits, text): hits are a FindingBatch (snippets are cut from the
+    text when rows are read); text is only kept when asked for and the rules
+    missed (the AI pass needs it), so workers don't ship whole documents back.
+    Paged documents (PDFs) are streamed page by page and their findings carry a
+    `page` number; others are scanned per chunk_text chunk (on `executor` if
+    given). With a text store and the file's content hash, extracted PDF/DOCX
+    text is read back from the store instead (and stored on a miss).
+
+    With `raw_offsets`, findings also carry `raw_start`/`raw_end`: offsets into
+    the extracted text before normalization (pages joined by newlines). That
+    needs the raw text, so the document is read whole and the store is skipped.
+
+    A `stats` dict receives the seconds spent reading (extraction or the text
+    store), normalizing and scanning; read and normalize time are measured
+    around the page iterators, since streaming interleaves the three.
+    """
+    reader = reader_for(path)
+    t_start = time.perf_counter()
+
+    def read_pages(p: Path):
+        if stats is None:
+            return reader.pages(p)
+        t0 = time.perf_counter()
+        pages = reader.pages(p)  # TXT/DOCX readers do all their work here
+        spent = time.perf_counter() - t0
+        stats["read"] = stats.get("read", 0.0) + spent
+        stats["extract"] = stats.get("extract", 0.0) + spent
+        return _timed(pages, stats, "read")
+
+    if raw_offsets:
+        pages = list(read_pages(path))
+        t0 = time.perf_counter()
+        text, offsets = normalize_with_offsets("\n".join(pages))
+        if stats is not None:
+            stats["normalize"] = time.perf_counter() - t0
+        hits = ruleset.scan_chunked(text, list(chunk_spans(len(text))), executor=executor)
+        starts = list(accumulate((len(p) + 1 for p in pages[:-1]), initial=0))
+        spans = [offsets.span(s, e) for s, e in zip(hits.start, hits.end)]
+        hits.set_raw_offsets((s for s, _ in spans), (e for _, e in spans))
+        if reader.paged:
+            hits.page = array("i", (bisect_right(starts, s) for s, _ in spans))
+        _scan_seconds(stats, t_start)
+        return hits, (text if keep_text and not hits else None)
+
+    segments = None
+    stored = False  # served by the text store: all of it counts as reading
+    if text_store is not None and content_hash is not None and reader.dist:
+        version = reader_version(reader.suffix)
+        segments = text_store.get(content_hash, version)
+        stored = segments is not None
+        if segments is None:
+            segments = text_store.record(content_hash, version, iter_normalized(read_pages(path)))
+    if segments is None:
+        segments = iter_normalized(read_pages(path))
+    if stats is not None:
+        segments = _timed(segments, stats, "read" if stored else "extract")
+
+    if not reader.paged:
+        text = "".join(piece for _, piece in segments)
+        hits = ruleset.scan_chunked(text, list(chunk_spans(len(text))), executor=executor)
+        _scan_seconds(stats, t_start)
+        return hits, (text if keep_text and not hits else None)
+
+    kept: list[str] | None = [] if keep_text else None
+
+    def pages():
+        for page_no, piece in segments:
+            if kept is not None:
+                kept.append(piece)
+            yield page_no, piece
+
+    hits = ruleset.scan_segments(pages())
+    _scan_seconds(stats, t_start)
+    return hits, ("".join(kept) if kept is not None and not hits else None)
+
+
+_DONE = object()
+
+
+def _timed(items, stats: dict, key: str):
+    """Yield from `items`, adding the time spent producing them to stats[key]."""
+    it = iter(items)
+    while True:
+        t0 = time.perf_counter()
+        item = next(it, _DONE)
+        stats[key] = stats.get(key, 0.0) + time.perf_counter() - t0
+        if item is _DONE:
+            return
+        yield item
+
+
+def _scan_seconds(stats: dict | None, t_start: float) -> None:
+    """Split scan_document's elapsed time: `extract` (read + normalize) and the rest (scan)."""
+    if stats is None:
+        return
+    total = time.perf_counter() - t_start
+    extract = stats.pop("extract", None)
+    stats.setdefault("read", 0.0)
+    if extract is not None and "normalize" not in stats:
+        stats["normalize"] = max(0.0, extract - stats["read"])
+    stats.setdefault("normalize", 0.0)
+    stats["scan"] = max(0.0, total - stats["read"] - stats["normalize"])
+
+
+# Per-process state for pool workers (set once by the initializer, not per task)
+_worker_ruleset: RuleSet | None = None
+_worker_text_store: TextStore | None = None
+
+
+def _init_worker(
+    ruleset: RuleSet, text_store: TextStore | None = None, trace_memory: bool = False
+) -> None:
+    global _worker_ruleset, _worker_text_store
+    _worker_ruleset = ruleset
+    _worker_text_store = text_store
+    if trace_memory:
+        tracemalloc.start()
+
+
+def _scan_task(
+    path: Path,
+    keep_text: bool,
+    content_hash: str | None = None,
+    ruleset: RuleSet | None = None,
+    text_store: TextStore | None = None,
+    executor=None,
+    raw_offsets: bool = False,
+    budget: ScanBudget | None = None,
+):
+    """
+    Worker entry point: never raises, so one bad file can't sink the batch.
+    Returns (hits, text, error, stats); hits are a detached FindingBatch (it
+    keeps only the text around its matches), stats are scan_document's stage times
+    plus per-rule match times ("rules") and, while tracemalloc is tracing,
+    the document's peak traced memory ("peak_bytes").
+
+    Under a `budget`, every rule that ran out of time on this document is
+    stopped and reported by a SCAN-BUDGET finding after the rule findings.
+    """
+    if ruleset is None:
+        ruleset, text_store = _worker_ruleset, _worker_text_store
+    stats: dict = {}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    ruleset.timing, ruleset.budget = {}, budget
+    try:
+        with budget.document() if budget is not None else nullcontext():
+            hits, text = scan_document(
+                path, ruleset, keep_text, executor, content_hash, text_store, raw_offsets, stats
+            )
+        if budget is not None and budget.stopped:
+            hits.extend(budget.markers())
+        return hits.detach(), text, None, stats
+    except Exception as e:
+        return None, None, str(e), None
+    finally:
+        stats["rules"], ruleset.timing, ruleset.budget = ruleset.timing, None, None
+        if tracing:
+            stats["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+
+
+def _size_or_zero(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def scan_documents(
+    docs: list[Path],
+    ruleset: RuleSet,
+    workers: int = 1,
+    keep_text=False,
+    hashes: list[str | None] | None = None,
+    text_store: TextStore | None = None,
+    on_result=None,
+    raw_offsets: bool = False,
+    budget: ScanBudget | None = None,
+):
+    """
+    Scan `docs` and return one (hits, text, error, stats) tuple per doc (see
+    _scan_task), in the order of `docs`. With workers > 1 the batch fans out
+    over a process pool with the largest files scheduled first; results are
+    returned in input order, and process_docs writes CSV/JSON/audit output in
+    that order too, so it does not depend on completion order.
+    A single large text document is instead split into chunks for the pool.
+    `hashes` (content hashes, parallel to `docs`) enable the text store.
+    `on_result(i, result)` is called as each document finishes (in completion
+    order), so callers can persist findings while the rest are still scanning.
+    Pool workers trace memory when this process does (tracemalloc). Each
+    document is scanned within `budget` (src.budget.ScanBudget), if given.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    hashes = hashes or [None] * len(docs)
+    results: list = [None] * len(docs)
+
+    def done(i: int, res) -> None:
+        results[i] = res
+        if on_result is not None:
+            on_result(i, res)
+
+    if (
+        workers > 1
+        and len(docs) == 1
+        and not reader_for(docs[0]).paged  # paged documents are streamed instead
+        and _size_or_zero(docs[0]) >= PARALLEL_CHUNK_MIN_BYTES
+    ):
+        with ruleset_pool(ruleset, workers) as pool:
+            done(
+                0,
+                _scan_task(
+                    docs[0], keep_text, hashes[0], ruleset, text_store, pool, raw_offsets, budget
+                ),
+            )
+        return results
+
+    workers = max(1, min(workers, len(docs)))
+    if workers == 1:
+        for i, (p, h) in enumerate(zip(docs, hashes)):
+            res = _scan_task(
+                p, keep_text, h, ruleset, text_store, raw_offsets=raw_offsets, budget=budget
+            )
+            done(i, res)
+        return results
+
+    order = sorted(range(len(docs)), key=lambda i: _size_or_zero(docs[i]), reverse=True)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(ruleset, text_store, tracemalloc.is_tracing()),
+    ) as pool:
+        futures = {
+            pool.submit(
+                _scan_task, docs[i], keep_text, hashes[i], raw_offsets=raw_offsets, budget=budget
+            ): i
+            for i in order
+        }
+        for fut in as_completed(futures):
+            try:
+                res = fut.result()
+            except Exception as e:  # e.g. a worker died (BrokenProcessPool)
+                res = (None, None, f"worker failed: {e!r}", None)
+            done(futures[fut], res)
+    return results
+
+
+def process_docs(
+    regime: str,
+    use_ai: bool = False,
+    workers: int | None = None,
+    cache: FindingsCache | None = None,
+    text_store: TextStore | None = None,
+    ruleset: RuleSet | None = None,
+    sink: AuditSink | None = None,
+    outputs: FindingsOutputs | None = None,
+    llm=None,
+    raw_offsets: bool = False,
+    metrics: RunMetrics | None = None,
+    budget: ScanBudget | None = None,
+):
+    """
+    Scan data/docs and return (rows, processed docs), both in document order;
+    rows are one FindingBatch over all documents (finding dicts on access).
+    Each document's findings are handed to the audit `sink` and to `outputs`
+    as soon as that document and every document sorted before it are
+    finished, instead of after the whole batch; both therefore receive them
+    in document order, whatever the order workers finish in, so the audit
+    events (and their ids) and the files are the same for any --workers.
+
+    With `use_ai`, documents the rules miss are escalated to `llm` (an
+    src.llm_layer.EscalationStage; one is created for the call if omitted).
+    Escalations run concurrently while the remaining documents are scanned
+    and are settled as they complete.
+
+    `raw_offsets` adds each finding's `raw_start`/`raw_end` in the extracted
+    text before normalization (see scan_document).
+
+    `metrics` collects each scanned document's stage and rule timings plus the
+    AI, audit and output time per document (src.metrics.RunMetrics).
+
+    `budget` (src.budget.ScanBudget) limits how long each rule may match per
+    document; stopped rules are reported as SCAN-BUDGET findings, and those
+    documents are not cached, so the next run scans them again.
+    """
     docs = iter_input_docs(Path("data/docs"))
     if not docs:
         print("WARN: No input docs found. Add files under data/docs/ (PDF/DOCX/TXT).")
-        return [], []
+        return FindingBatch.concat([]), []
 
-    rules = load_ruleset(regime)
-    if not rules:
+    if ruleset is None:
+        ruleset = compiled_ruleset(regime)
+    if not len(ruleset):
         print(f"WARN: No rules loaded for {regime}. Check rules/ folder.")
-        return [], []
+        return FindingBatch.concat([]), []
 
     # Lazy import AI only if needed and requested
-    analyze_text = None
-    if use_ai:
+    own_llm = False
+    if use_ai and llm is None:
         try:
-            from src.llm_layer import analyze_text as _analyze_text
+            from src.llm_layer import EscalationStage
 
-            analyze_text = _analyze_text
+            llm, own_llm = EscalationStage(), True
         except Exception as e:
             print(f"WARN: AI layer unavailable: {e}. Proceeding rules-only.")
             use_ai = False
 
-    all_rows = []
-    doc_list = []
-    for path in docs:
-        try:
-            # ingest per suffix
-            suffix = path.suffix.lower()
-            if suffix == ".pdf":
-                raw = read_pdf(path)
-            elif suffix == ".docx":
-                raw = read_docx(path)
-            else:
-                raw = read_txt(path)
-            text = normalize_text(raw)
-
-            # (simple chunking placeholder for future)
-            _ = list(chunk_text(text))
-
-            # scan (rules-first)
-            hits = list(scan_text(text, rules))
-
-            # If rules miss and AI requested, try AI assistance
-            if use_ai and not hits and analyze_text is not None:
-                try:
-                    llm_hits = analyze_text(regime, text)
-                    for h in llm_hits:
-                        h["doc"] = path.name
-                        h.setdefault("source", "llm")
-                    hits.extend(llm_hits)
-                except Exception as e:
-                    print(f"WARN: AI analysis failed on {path.name}: {e}")
-
-            # annotate and accumulate
-            for h in hits:
-                h["doc"] = path.name
-            all_rows.extend(hits)
-            doc_list.append(str(path.relative_to("data/docs")))
+    keys: list = [None] * len(docs)
+    hashes: list[str | None] = [None] * len(docs)
+    per_doc: list[FindingBatch | None] = [None] * len(docs)  # None = skipped
+    unwritten: dict[int, list[dict]] = {}  # doc index -> finding dicts waiting for the writers
+    done = [False] * len(docs)
+    next_out = 0  # first document not yet handed to `outputs`
 
-        except Exception as e:
-            # Production-friendly behavior: skip bad files, keep pipeline alive
-            print(f"WARN: Skipping {path} due to error: {e}")
+    def timed(stage: str):
+        return metrics.timer(stage) if metrics is not None else nullcontext()
+
+    def release(i: int) -> None:
+        nonlocal next_out
+        done[i] = True
+        while next_out < len(docs) and done[next_out]:
+            rows = unwritten.pop(next_out, None)
+            if rows and sink is not None:
+                with timed("audit"):  # blocks only when the writer falls behind
+                    sink.write(rows)
+            if rows and outputs is not None:
+                with timed("outputs"):
+                    outputs.write(rows)
+            next_out += 1
+
+    def settle(i: int, hits: FindingBatch | list[dict], cacheable: bool) -> None:
+        if not isinstance(hits, FindingBatch):
+            hits = FindingBatch.of_rows(hits)  # AI answers
+        hits.set_doc(docs[i].name)
+        per_doc[i] = hits
+        # the finding dicts (and their snippets) are built once, for the writers
+        rows = list(hits) if cacheable or sink is not None or outputs is not None else []
+        if cacheable:
+            cache.put(keys[i], rows)
+        if rows and (sink is not None or outputs is not None):
+            unwritten[i] = rows
+        release(i)
+
+    pending: dict[int, tuple] = {}  # doc index -> (escalation Future, cacheable)
+
+    def drain(block: bool = False) -> None:
+        """Settle the escalations that have completed (all of them with `block`)."""
+        for i in sorted(pending):
+            fut, cacheable = pending[i]
+            if not block and not fut.done():
+                continue
+            del pending[i]
+            try:
+                hits = fut.result()
+            except Exception as e:
+                from src.llm_layer import AIFallback  # loaded: its stage made the future
 
-    return all_rows, doc_list
+                if isinstance(e, AIFallback):
+                    print(f"WARN: AI unavailable for {docs[i].name}; heuristic findings kept")
+                    hits = e.rows
+                else:
+                    print(f"WARN: AI analysis failed on {docs[i].name}: {e}")
+                    hits = []
+                cacheable = False  # retry the AI next run instead of caching the miss
+            for h in hits:
+                h.setdefault("source", "llm")
+            settle(i, hits, cacheable)
 
+    def finish(i: int, result, fresh: bool) -> None:
+        path = docs[i]
+        hits, text, error, stats = result
+        if metrics is not None and stats is not None:
+            metrics.add_document(stats, hits.rule_ids() if hits is not None else ())
+        if error is not None:
+            # Production-friendly behavior: skip bad files, keep pipeline alive
+            print(f"WARN: Skipping {path} due to error: {error}")
+            release(i)
+        else:
+            cacheable = fresh and cache is not None and keys[i] is not None
+            for h in hits.stored.values():
+                if h.get("source") == BUDGET_SOURCE:
+                    print(f"WARN: {path.name}: {h['snippet']}")
+                    cacheable = False  # scan again next run rather than keep a partial result
+            # If rules miss and AI requested, escalate without waiting for the answer
+            if use_ai and not hits and text is not None:
+                fut = llm.submit(regime, text)
+                if metrics is not None:
+                    t0 = time.perf_counter()
+                    fut.add_done_callback(
+                        lambda _, t0=t0: metrics.add("ai", time.perf_counter() - t0)
+                    )
+                pending[i] = (fut, cacheable)
+            else:
+                settle(i, hits, cacheable)
+        drain()
 
-def write_outputs(rows, regime: str):
-    ts = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-    out_dir = Path("data/outputs")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    csv_path = out_dir / f"findings_{regime.lower()}_{ts}.csv"
-    json_path = out_dir / f"findings_{regime.lower()}_{ts}.json"
+    # Unchanged documents (same bytes, rules, findings version, AI mode) reuse stored findings
+    todo: list[int] = []
+    for i, path in enumerate(docs):
+        if cache is not None or text_store is not None:
+            try:
+                hashes[i] = file_digest(path)
+            except OSError:
+                pass  # unreadable: let the scan report it
+        if cache is not None and hashes[i] is not None:
+            version = f"{APP_VERSION}/findings-{FINDINGS_VERSION}/norm-{NORMALIZE_VERSION}"
+            version += "+raw" if raw_offsets else ""
+            keys[i] = (hashes[i], ruleset.fingerprint, version, use_ai)
+            cached = cache.get(keys[i])
+            if cached is not None:
+                finish(i, (FindingBatch.of_rows(cached), None, None, None), fresh=False)
+                continue
+        todo.append(i)
 
-    # CSV
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(
-            f, fieldnames=["doc", "rule_id", "label", "severity", "start", "end", "snippet"]
+    try:
+        scan_documents(
+            [docs[i] for i in todo],
+            ruleset,
+            workers or os.cpu_count() or 1,
+            keep_text=use_ai,
+            hashes=[hashes[i] for i in todo],
+            text_store=text_store,
+            on_result=lambda j, res: finish(todo[j], res, fresh=True),
+            raw_offsets=raw_offsets,
+            budget=budget,
         )
-        w.writeheader()
-        for r in rows:
-            w.writerow(
-                {
-                    "doc": r["doc"],
-                    "rule_id": r["rule_id"],
-                    "label": r["label"],
-                    "severity": r["severity"],
-                    "start": r["start"],
-                    "end": r["end"],
-                    "snippet": r["snippet"],
-                }
-            )
+        drain(block=True)
+    finally:
+        if own_llm:
+            llm.close()
+    if text_store is not None:
+        text_store.prune()
+
+    doc_list = [str(p.relative_to("data/docs")) for p, h in zip(docs, per_doc) if h is not None]
+    return FindingBatch.concat(h for h in per_doc if h is not None), doc_list
 
-    # JSON
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(rows, f, indent=2, ensure_ascii=False)
 
-    return csv_path, json_path
+def write_outputs(rows, regime: str, formats=DEFAULT_FORMATS, compress: bool = False):
+    """Write already collected findings; returns the created paths in `formats` order."""
+    with FindingsOutputs(regime, formats, compress) as outputs:
+        outputs.write(rows)
+    return tuple(outputs.paths)
 
 
-def print_summary(rows, regime: str, processed_docs):
+def print_summary(
+    rows,
+    regime: str,
+    processed_docs,
+    cache: FindingsCache | None = None,
+    llm=None,
+    metrics: RunMetrics | None = None,
+):
     total = len(rows)
-    by_rule = Counter(r["rule_id"] for r in rows)
-    llm_count = sum(1 for r in rows if r.get("source") == "llm")
+    by_rule: Counter = Counter()
+    labels: dict[str, str] = {}
+    llm_count = 0
+    for rid, label, source in rows.fields("rule_id", "label", "source"):  # no snippets built
+        by_rule[rid] += 1
+        labels.setdefault(rid, label)
+        llm_count += source == "llm"
 
     print("\n============================")
     print(f" Compliance Results - {regime}")
     print("============================")
     print(f"Processed docs: {len(processed_docs)} -> {processed_docs}")
+    if cache is not None:
+        print(f"Findings cache: {cache.summary()}")
+    if llm is not None:
+        print(f"AI escalation: {llm.summary()}")
+        if llm.cache is not None:
+            print(f"AI response cache: {llm.cache.summary()}")
     print(f"Total findings: {total}  (AI adds: {llm_count})")
     if total:
         print("\nTop rules:")
         for rid, cnt in by_rule.most_common():
-            lbl = next((r["label"] for r in rows if r["rule_id"] == rid), rid)
-            print(f"  - {rid} ({lbl}): {cnt}")
+            print(f"  - {rid} ({labels[rid]}): {cnt}")
         print("\nPreview (first 3 findings):")
         for r in rows[:3]:
             s = r["snippet"]
@@ -253,35 +794,257 @@ def print_summary(rows, regime: str, processed_docs):
             print(f"  • [{r['doc']}] {r['rule_id']}{extra}: {preview}")
     else:
         print("No matches found.")
+    if metrics is not None and (metrics.stages or metrics.peak_bytes is not None):
+        print("\nTimings (ms per document):")
+        for line in metrics.lines():
+            print(f"  {line}")
+
+
+def save_profile(profiler, path: Path, top: int = 15) -> None:
+    """Dump cProfile stats to `path` and print the `top` entries by cumulative time."""
+    import pstats
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+    print(f"\nProfile: {path} (python -m pstats {path}); top {top} by cumulative time:")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+# `cc_mvp.py <name> ...` -> <module>.main(...), imported only when used
+SUBCOMMANDS = {
+    "serve": "src.server",
+    "rebuild-rollups": "src.audit",
+    "export-audit": "src.audit_parquet",
+    "rules": "src.rule_lint",
+}
+
 
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] and argv[0] in SUBCOMMANDS:
+        return importlib.import_module(SUBCOMMANDS[argv[0]]).main(argv[1:])
 
-def main():
-    parser = argparse.ArgumentParser(description="Compliance Classifier MVP")
-    parser.add_argument("--regime", choices=["GDPR", "SOC2"], required=True)
+    parser = argparse.ArgumentParser(
+        description="Compliance Classifier MVP",
+        epilog="Subcommands: `%(prog)s serve` (long-running scan server),"
+        " `%(prog)s rebuild-rollups` (recompute the audit log's rollup tables),"
+        " `%(prog)s export-audit` (audit log to partitioned Parquet),"
+        " `%(prog)s rules lint|profile` (rule cost checks); see their --help.",
+    )
+    parser.add_argument(
+        "--regime",
+        choices=regimes(),
+        required=True,
+        help="Regulatory regime; one per rules/<regime>_*.yml prefix.",
+    )
     parser.add_argument(
         "--ai",
         action="store_true",
         help="Enable AI-assisted findings when rules miss (requires local API keys).",
     )
-    args = parser.parse_args()
-
-    rows, processed_docs = process_docs(args.regime, use_ai=args.ai)
-    print_summary(rows, args.regime, processed_docs)
+    parser.add_argument(
+        "--ai-concurrency",
+        type=int,
+        default=4,
+        help="AI requests in flight at once while scanning continues (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--ai-rpm", type=int, default=60, help="AI requests per minute (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--ai-tpm",
+        type=int,
+        default=60_000,
+        help="AI tokens per minute, prompt + completion (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--ai-prompt-tokens",
+        type=int,
+        default=1000,
+        help="Token budget of the excerpt sent per escalated document; its most"
+        " relevant chunks are chosen by keyword hints (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--ai-cache-days",
+        type=float,
+        default=LLM_CACHE_TTL_DAYS,
+        help="Reuse cached AI responses for this many days (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--ai-cache-mb",
+        type=int,
+        default=LLM_CACHE_MAX_BYTES >> 20,
+        help="Size cap of the AI response cache (least recently used evicted).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel document workers (default: CPU count; 1 = in-process).",
+    )
+    cache_opts = parser.add_mutually_exclusive_group()
+    cache_opts.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-extract and re-scan every document; don't read or update any cache.",
+    )
+    cache_opts.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Drop cached findings, extracted text and AI responses, then re-scan and repopulate.",
+    )
+    parser.add_argument(
+        "--text-cache-mb",
+        type=int,
+        default=TEXT_CACHE_MAX_BYTES >> 20,
+        help="Size cap of the extracted PDF/DOCX text cache (least recently used evicted).",
+    )
+    parser.add_argument(
+        "--format",
+        type=parse_formats,
+        default=DEFAULT_FORMATS,
+        help=(
+            "Comma-separated findings outputs: csv, ndjson, json, parquet (zstd-compressed;"
+            " needs pyarrow) (default: csv,json)."
+        ),
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help=(
+            "Gzip-compress the findings outputs (.csv.gz, .ndjson.gz, .json.gz); Parquet"
+            " is always zstd-compressed and ignores it."
+        ),
+    )
+    parser.add_argument(
+        "--rules-bundle",
+        type=Path,
+        default=None,
+        help="Precompiled ruleset bundle: loaded instead of parsing YAML, rebuilt when stale.",
+    )
+    parser.add_argument(
+        "--raw-offsets",
+        action="store_true",
+        help="Also report each finding's raw_start/raw_end in the extracted text"
+        " before normalization (documents are re-extracted, not read from the text cache).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Report peak memory per run via tracemalloc (in every worker; slows the run down).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under cProfile, in-process unless --workers is given, and save the"
+        " stats next to the findings outputs (data/outputs/profile_<regime>_<run>.pstats).",
+    )
+    parser.add_argument(
+        "--rule-budget-ms",
+        type=float,
+        default=DEFAULT_RULE_BUDGET_MS,
+        help="Time each regex rule may spend matching one document before it is stopped"
+        " and reported as a SCAN-BUDGET finding; 0 disables budgets (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--doc-budget-ms",
+        type=float,
+        default=None,
+        help="Time all regex rules together may spend on one document (default: no limit).",
+    )
+    args = parser.parse_args(argv)
 
-    # Persist to SQLite audit log
+    ruleset = compiled_ruleset(args.regime, args.rules_bundle)
+    budget = (
+        ScanBudget(args.rule_budget_ms or None, args.doc_budget_ms)
+        if args.rule_budget_ms or args.doc_budget_ms
+        else None
+    )
+    cache = None if args.no_cache else FindingsCache(rebuild=args.rebuild_cache)
+    text_store = (
+        None
+        if args.no_cache
+        else TextStore(max_bytes=args.text_cache_mb << 20, rebuild=args.rebuild_cache)
+    )
+    # Findings stream into the audit log while documents are still being scanned
     run_id = new_run_id()
-    if rows:
-        count, db_path = write_events(rows, args.regime, APP_VERSION, run_id)
-        print(f"\nAudit log: wrote {count} events to {db_path} (run_id={run_id})")
+    sink = AuditSink(args.regime, APP_VERSION, run_id, ruleset=ruleset.fingerprint)
+    # ...and into the findings files, which are only created once there is a finding
+    outputs = FindingsOutputs(args.regime, args.format, args.gzip)
+    llm = llm_cache = None
+    if args.ai:
+        from src.llm_layer import EscalationStage
+
+        if not args.no_cache:
+            llm_cache = LLMCache(
+                ttl_days=args.ai_cache_days,
+                max_bytes=args.ai_cache_mb << 20,
+                rebuild=args.rebuild_cache,
+            )
+        llm = EscalationStage(
+            cache=llm_cache,
+            prompt_tokens=args.ai_prompt_tokens,
+            concurrency=args.ai_concurrency,
+            rpm=args.ai_rpm,
+            tpm=args.ai_tpm,
+        )
+    metrics = RunMetrics(trace_memory=args.trace_memory)
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    try:
+        metrics.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            rows, processed_docs = process_docs(
+                args.regime,
+                use_ai=args.ai,
+                workers=args.workers or (1 if args.profile else None),  # workers aren't profiled
+                cache=cache,
+                text_store=text_store,
+                ruleset=ruleset,
+                sink=sink,
+                outputs=outputs,
+                llm=llm,
+                raw_offsets=args.raw_offsets,
+                metrics=metrics,
+                budget=budget,
+            )
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            metrics.stop()
+        print_summary(rows, args.regime, processed_docs, cache, llm, metrics)
+    finally:
+        if llm is not None:
+            llm.close()
+        if llm_cache is not None:
+            llm_cache.close()
+        if cache is not None:
+            cache.close()
+        outputs.close()
+        sink.close()
+    sink.write_metrics(metrics.db_rows())
+
+    if profiler is not None:
+        save_profile(profiler, OUT_DIR / f"profile_{args.regime.lower()}_{run_id[:8]}.pstats")
+
+    if sink.count:
+        print(
+            f"\nAudit log: wrote {sink.count} events to {sink.path} "
+            f"(run_id={run_id}, ruleset={ruleset.fingerprint})"
+        )
 
-    if rows:
-        csv_path, json_path = write_outputs(rows, args.regime)
+    if outputs.paths:
         print("\nOutputs written:")
-        print(f"  CSV : {csv_path}")
-        print(f"  JSON: {json_path}")
+        for path in outputs.paths:
+            print(f"  {path.name.split('.', 1)[1].upper():<4}: {path}")
     else:
         print("\nNo outputs written (no findings).")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
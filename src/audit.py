@@ -1,35 +1,279 @@
 from pathlib import Path
-import sqlite3, datetime, uuid
+import sqlite3, datetime, hashlib, uuid
+import queue, threading
+from collections import Counter
 from typing import Dict, Tuple
 
 from collections.abc import Iterable
 
 DB_PATH = Path("data/cc_audit.sqlite")
 
+# Long-lived writer connection: WAL lets the dashboard read while a run appends,
+# NORMAL sync is durable per committed batch in WAL mode (only the OS can lose it)
+PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-65536",  # KiB
+    "busy_timeout=5000",
+)
+QUEUE_MAX = 1024  # pending write() calls before producers block (backpressure)
+BATCH_ROWS = 10_000  # max events per transaction
+
+SCHEMA_VERSION = 6  # PRAGMA user_version of the current layout
+
+# v2: one `runs` row per run and a `rules` dimension, referenced by integer keys;
+# snippets are stored once per distinct text (re-runs log the same findings over
+# and over). `events` is a read-compatible view over the old flat layout.
 SCHEMA = """
-CREATE TABLE IF NOT EXISTS events (
-  id       INTEGER PRIMARY KEY AUTOINCREMENT,
+CREATE TABLE IF NOT EXISTS runs (
+  id       INTEGER PRIMARY KEY,
+  run_id   TEXT NOT NULL UNIQUE,
   ts       TEXT NOT NULL,
-  run_id   TEXT NOT NULL,
   version  TEXT NOT NULL,
   regime   TEXT NOT NULL,
-  doc      TEXT NOT NULL,
+  ruleset  TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS rules (
+  id       INTEGER PRIMARY KEY,
   rule_id  TEXT NOT NULL,
   label    TEXT NOT NULL,
   severity TEXT NOT NULL,
-  snippet  TEXT NOT NULL
+  UNIQUE (rule_id, label, severity)
+);
+CREATE TABLE IF NOT EXISTS snippets (
+  id       INTEGER PRIMARY KEY,
+  hash     INTEGER NOT NULL,  -- snippet_hash(text): the lookup key, matched on text
+  text     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+  id       INTEGER PRIMARY KEY AUTOINCREMENT,
+  run      INTEGER NOT NULL REFERENCES runs(id),
+  rule     INTEGER NOT NULL REFERENCES rules(id),
+  doc      TEXT NOT NULL,
+  snippet  INTEGER NOT NULL REFERENCES snippets(id)
 );
-CREATE INDEX IF NOT EXISTS idx_events_run    ON events(run_id);
-CREATE INDEX IF NOT EXISTS idx_events_doc    ON events(doc);
-CREATE INDEX IF NOT EXISTS idx_events_regime ON events(regime);
-CREATE INDEX IF NOT EXISTS idx_events_rule   ON events(rule_id);
+-- v3: composite indexes for the dashboard's filters (src/audit_query.py).
+-- Regime/date filters resolve to a few runs, then (run, rule, doc) answers the
+-- KPIs and per-rule/per-doc counts from the index alone.
+CREATE INDEX IF NOT EXISTS idx_runs_regime_ts     ON runs(regime, ts);
+CREATE INDEX IF NOT EXISTS idx_findings_run_rule  ON findings(run, rule, doc);
+CREATE INDEX IF NOT EXISTS idx_findings_rule_run  ON findings(rule, run);
+CREATE INDEX IF NOT EXISTS idx_findings_doc_run   ON findings(doc, run);
+-- v6: snippet hashes are no longer unique (v2-v5 made them the dedup key, so
+-- a colliding text was silently logged as the first one)
+CREATE INDEX IF NOT EXISTS idx_snippets_hash      ON snippets(hash);
+
+CREATE VIEW IF NOT EXISTS events AS
+SELECT f.id, r.ts, r.run_id, r.version, r.regime, f.doc,
+       u.rule_id, u.label, u.severity, s.text AS snippet, r.ruleset
+FROM findings f
+JOIN runs r     ON r.id = f.run
+JOIN rules u    ON u.id = f.rule
+JOIN snippets s ON s.id = f.snippet;
+
+-- existing cleanup code (`DELETE FROM events`) keeps working against the view
+CREATE TRIGGER IF NOT EXISTS events_delete INSTEAD OF DELETE ON events
+BEGIN
+  DELETE FROM findings WHERE id = OLD.id;
+END;
+
+-- v4: finding counts pre-aggregated per (run, rule), (run, doc) and
+-- (day, regime, rule). The sink adds each batch's counts in the batch's own
+-- transaction; deleted findings are subtracted by the trigger below.
+CREATE TABLE IF NOT EXISTS rollup_run_rule (
+  run      INTEGER NOT NULL REFERENCES runs(id),
+  rule     INTEGER NOT NULL REFERENCES rules(id),
+  n        INTEGER NOT NULL,
+  PRIMARY KEY (run, rule)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_run_doc (
+  run      INTEGER NOT NULL REFERENCES runs(id),
+  doc      TEXT NOT NULL,
+  n        INTEGER NOT NULL,
+  PRIMARY KEY (run, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_day_rule (
+  day      TEXT NOT NULL,  -- YYYY-MM-DD of the run's ts
+  regime   TEXT NOT NULL,
+  rule     INTEGER NOT NULL REFERENCES rules(id),
+  n        INTEGER NOT NULL,
+  PRIMARY KEY (day, regime, rule)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS findings_rollup_delete AFTER DELETE ON findings
+BEGIN
+  UPDATE rollup_run_rule SET n = n - 1 WHERE run = OLD.run AND rule = OLD.rule;
+  DELETE FROM rollup_run_rule WHERE run = OLD.run AND rule = OLD.rule AND n <= 0;
+  UPDATE rollup_run_doc SET n = n - 1 WHERE run = OLD.run AND doc = OLD.doc;
+  DELETE FROM rollup_run_doc WHERE run = OLD.run AND doc = OLD.doc AND n <= 0;
+  UPDATE rollup_day_rule SET n = n - 1
+  WHERE (day, regime) = (SELECT substr(ts, 1, 10), regime FROM runs WHERE id = OLD.run)
+    AND rule = OLD.rule;
+  DELETE FROM rollup_day_rule
+  WHERE (day, regime) = (SELECT substr(ts, 1, 10), regime FROM runs WHERE id = OLD.run)
+    AND rule = OLD.rule AND n <= 0;
+END;
+
+-- v5: where a run's time went (src/metrics.py). Stage rows hold per-document
+-- latencies (n = documents), rule rows the match time per rule (n = hits),
+-- `run` rows the wall time and the peak traced memory (n = bytes).
+CREATE TABLE IF NOT EXISTS run_metrics (
+  run      INTEGER NOT NULL REFERENCES runs(id),
+  kind     TEXT NOT NULL,  -- stage | rule | run
+  name     TEXT NOT NULL,
+  n        INTEGER NOT NULL,
+  total_ms REAL NOT NULL,
+  p50_ms   REAL,
+  p95_ms   REAL,
+  p99_ms   REAL,
+  max_ms   REAL,
+  PRIMARY KEY (run, kind, name)
+) WITHOUT ROWID;
 """
+SUPERSEDED_INDEXES = ("idx_findings_run", "idx_findings_rule", "idx_findings_doc")  # v2
+
+# (upsert, SELECT recomputing the whole table from findings) per rollup table
+ROLLUPS = {
+    "rollup_run_rule": (
+        "INSERT INTO rollup_run_rule (run, rule, n) VALUES (?, ?, ?)"
+        " ON CONFLICT (run, rule) DO UPDATE SET n = n + excluded.n",
+        "SELECT run, rule, COUNT(*) FROM findings GROUP BY run, rule",
+    ),
+    "rollup_run_doc": (
+        "INSERT INTO rollup_run_doc (run, doc, n) VALUES (?, ?, ?)"
+        " ON CONFLICT (run, doc) DO UPDATE SET n = n + excluded.n",
+        "SELECT run, doc, COUNT(*) FROM findings GROUP BY run, doc",
+    ),
+    "rollup_day_rule": (
+        "INSERT INTO rollup_day_rule (day, regime, rule, n) VALUES (?, ?, ?, ?)"
+        " ON CONFLICT (day, regime, rule) DO UPDATE SET n = n + excluded.n",
+        """SELECT substr(r.ts, 1, 10), r.regime, f.rule, COUNT(*)
+           FROM findings f JOIN runs r ON r.id = f.run GROUP BY 1, 2, 3""",
+    ),
+}
+
+
+def snippet_hash(text: str) -> int:
+    """64-bit content hash of a snippet (its dedup key)."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _statements(script: str) -> list[str]:
+    """Split a schema script into statements (trigger bodies contain `;` too)."""
+    out, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    return out
+
+
+def _migrate_v1(cx: sqlite3.Connection) -> None:
+    """Copy the renamed flat v1 table (`events_v1`) into the v2 tables, keeping ids."""
+    cols = {row[1] for row in cx.execute("PRAGMA table_info(events_v1)")}
+    ruleset = "ruleset" if "ruleset" in cols else "''"
+    cx.create_function("snippet_hash", 1, snippet_hash, deterministic=True)
+    cx.execute(f"""
+        INSERT OR IGNORE INTO runs (run_id, ts, version, regime, ruleset)
+        SELECT run_id, MIN(ts), MAX(version), MAX(regime), MAX({ruleset})
+        FROM events_v1 GROUP BY run_id ORDER BY MIN(id)
+        """)
+    cx.execute("""
+        INSERT OR IGNORE INTO rules (rule_id, label, severity)
+        SELECT rule_id, label, severity FROM events_v1 ORDER BY id
+        """)
+    cx.execute("""
+        INSERT INTO snippets (hash, text)
+        SELECT snippet_hash(snippet), snippet FROM events_v1 GROUP BY snippet ORDER BY MIN(id)
+        """)
+    cx.execute("""
+        INSERT INTO findings (id, run, rule, doc, snippet)
+        SELECT e.id, r.id, u.id, e.doc, s.id
+        FROM events_v1 e
+        JOIN runs r     ON r.run_id = e.run_id
+        JOIN rules u    ON u.rule_id = e.rule_id AND u.label = e.label AND u.severity = e.severity
+        JOIN snippets s ON s.hash = snippet_hash(e.snippet) AND s.text = e.snippet
+        ORDER BY e.id
+        """)
+    cx.execute("DROP TABLE events_v1")
+
+
+def _migrate_v5_snippets(cx: sqlite3.Connection) -> None:
+    """Rebuild a v2-v5 `snippets` table without the UNIQUE hash, keeping ids."""
+    cx.execute("DROP VIEW IF EXISTS events")  # recreated by SCHEMA (with its trigger)
+    cx.execute(
+        "CREATE TABLE snippets_v6"
+        " (id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, text TEXT NOT NULL)"
+    )
+    cx.execute("INSERT INTO snippets_v6 (id, hash, text) SELECT id, hash, text FROM snippets")
+    cx.execute("DROP TABLE snippets")
+    cx.execute("ALTER TABLE snippets_v6 RENAME TO snippets")
+
+
+def _rebuild_rollups(cx: sqlite3.Connection) -> None:
+    """Recompute every rollup table from `findings` (inside the caller's transaction)."""
+    for table, (_, select) in ROLLUPS.items():
+        cx.execute(f"DELETE FROM {table}")
+        cx.execute(f"INSERT INTO {table} {select}")
+
+
+def _prepare(cx: sqlite3.Connection) -> None:
+    """
+    Bring the log up to the current schema in one transaction: a v1 `events`
+    table is migrated into the v2 tables, a v2 log gains the v3 indexes,
+    older logs get their v4 rollups computed from the findings they hold and
+    the (empty) v5 run_metrics table, and v6 drops the UNIQUE snippet hash.
+    """
+    version = cx.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    cx.execute("BEGIN IMMEDIATE")
+    try:
+        legacy = cx.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='events'"
+        ).fetchone()
+        if legacy:
+            cx.execute("ALTER TABLE events RENAME TO events_v1")
+            for name in ("run", "doc", "regime", "rule"):
+                cx.execute(f"DROP INDEX IF EXISTS idx_events_{name}")
+        snippets = cx.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='snippets'"
+        ).fetchone()
+        if snippets and "UNIQUE" in snippets[0]:
+            _migrate_v5_snippets(cx)
+        for stmt in _statements(SCHEMA):
+            cx.execute(stmt)
+        if legacy:
+            _migrate_v1(cx)
+        for name in SUPERSEDED_INDEXES:
+            cx.execute(f"DROP INDEX IF EXISTS {name}")
+        if version < 4:
+            _rebuild_rollups(cx)
+        cx.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        cx.execute("COMMIT")
+    except BaseException:
+        cx.execute("ROLLBACK")
+        raise
 
 
 def init_db() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     with sqlite3.connect(DB_PATH) as cx:
-        cx.executescript(SCHEMA)
+        _prepare(cx)
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Writer connection with the tuned pragmas and the schema in place."""
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cx = sqlite3.connect(path)
+    for pragma in PRAGMAS:
+        cx.execute(f"PRAGMA {pragma}")
+    _prepare(cx)
+    return cx
 
 
 def new_run_id() -> str:
@@ -40,33 +284,245 @@ def now_iso() -> str:
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 
-def write_events(rows: Iterable[dict], regime: str, version: str, run_id: str) -> tuple[int, str]:
-    """Persist findings to SQLite; returns (count, db_path)."""
-    init_db()
-    ts = now_iso()
+INSERT_FINDING = "INSERT INTO findings (run, rule, doc, snippet) VALUES (?, ?, ?, ?)"
+INSERT_RUN = (
+    "INSERT OR IGNORE INTO runs (run_id, ts, version, regime, ruleset) VALUES (?, ?, ?, ?, ?)"
+)
+INSERT_METRIC = "INSERT OR REPLACE INTO run_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SNIPPET_CACHE = 50_000  # snippet text -> id entries a sink remembers
 
-    # 🔧 MATERIAL FIX: realize the iterable once so we can both insert and count
-    rows_list = list(rows)
 
-    with sqlite3.connect(DB_PATH) as cx:
-        cx.executemany(
-            """
-            INSERT INTO events (ts, run_id, version, regime, doc, rule_id, label, severity, snippet)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            [
-                (
-                    ts,
-                    run_id,
-                    version,
-                    regime,
-                    r.get("doc", ""),
-                    r.get("rule_id", ""),
-                    r.get("label", ""),
-                    r.get("severity", "info"),
-                    r.get("snippet", ""),
+class AuditSink:
+    """
+    Streams one run's findings into the audit log. `write()` only enqueues
+    (blocking when QUEUE_MAX writes are pending); a background thread owns a
+    single connection and drains the queue in batched transactions, so events
+    are durable while the run is still scanning. The connection (and the
+    database file) is only opened once there is something to write.
+    """
+
+    def __init__(
+        self,
+        regime: str,
+        version: str,
+        run_id: str,
+        ruleset: str = "",
+        path: Path | None = None,
+        batch_rows: int = BATCH_ROWS,
+        queue_max: int = QUEUE_MAX,
+    ):
+        self.path = Path(path or DB_PATH)
+        self.run = (run_id, now_iso(), version, regime, ruleset)
+        self.batch_rows = batch_rows
+        self.count = 0  # events committed so far
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_max)
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+        # integer keys already resolved on the writer connection
+        self._run_pk: int | None = None
+        self._run_day: list[str] = []  # [YYYY-MM-DD, regime] of the run row
+        self._rule_pks: dict[tuple[str, str, str], int] = {}
+        self._snippet_pks: dict[str, int] = {}  # snippet text -> id
+
+    @staticmethod
+    def _key(cx: sqlite3.Connection, insert: str, values: tuple, select: str, key: tuple) -> int:
+        """Id of a dimension row, inserting it first if it is new."""
+        cur = cx.execute(insert, values)
+        if cur.rowcount == 1:
+            return cur.lastrowid
+        return cx.execute(select, key).fetchone()[0]
+
+    def _insert(self, cx: sqlite3.Connection, rows: list[dict]) -> None:
+        if self._run_pk is None:
+            cx.execute(INSERT_RUN, self.run)
+            # an existing row (same run_id) keeps its own ts/regime for the rollups
+            self._run_pk, *self._run_day = cx.execute(
+                "SELECT id, substr(ts, 1, 10), regime FROM runs WHERE run_id=?", self.run[:1]
+            ).fetchone()
+        if len(self._snippet_pks) > SNIPPET_CACHE:
+            self._snippet_pks.clear()
+        keyed, new_snippets = [], {}  # new_snippets: ordered set of unseen texts
+        for r in rows:
+            rule = (r.get("rule_id", ""), r.get("label", ""), r.get("severity", "info"))
+            rule_pk = self._rule_pks.get(rule)
+            if rule_pk is None:
+                rule_pk = self._rule_pks[rule] = self._key(
+                    cx,
+                    "INSERT OR IGNORE INTO rules (rule_id, label, severity) VALUES (?, ?, ?)",
+                    rule,
+                    "SELECT id FROM rules WHERE rule_id=? AND label=? AND severity=?",
+                    rule,
                 )
-                for r in rows_list
-            ],
+            text = r.get("snippet") or ""
+            if text not in self._snippet_pks:
+                new_snippets[text] = None
+            keyed.append((rule_pk, r.get("doc", ""), text))
+        if new_snippets:
+            self._resolve_snippets(cx, list(new_snippets))
+        params = [(self._run_pk, rule_pk, doc, self._snippet_pks[t]) for rule_pk, doc, t in keyed]
+        cx.executemany(INSERT_FINDING, params)
+        self._add_rollups(cx, keyed)
+
+    def _resolve_snippets(self, cx: sqlite3.Connection, texts: list[str]) -> None:
+        """
+        Look up the ids of `texts` in bulk, storing the ones not logged yet.
+        Rows are found by hash and matched on the text itself, so texts whose
+        hashes collide each keep a row of their own.
+        """
+        by_hash: dict[int, list[str]] = {}
+        for text in texts:
+            by_hash.setdefault(snippet_hash(text), []).append(text)
+
+        def lookup(hashes: list[int]) -> None:
+            for i in range(0, len(hashes), 500):
+                part = hashes[i : i + 500]
+                marks = ",".join("?" * len(part))
+                for pk, h, text in cx.execute(
+                    f"SELECT id, hash, text FROM snippets WHERE hash IN ({marks})", part
+                ):
+                    if text in by_hash[h]:
+                        self._snippet_pks[text] = pk
+
+        lookup(list(by_hash))
+        missing = [(h, t) for h, ts in by_hash.items() for t in ts if t not in self._snippet_pks]
+        if missing:
+            cx.executemany("INSERT INTO snippets (hash, text) VALUES (?, ?)", missing)
+            lookup(list(dict.fromkeys(h for h, _ in missing)))
+
+    def _add_rollups(self, cx: sqlite3.Connection, keyed: list[tuple[int, str, str]]) -> None:
+        """Add one batch's counts to the rollup tables (same transaction as the batch)."""
+        by_rule = Counter(rule_pk for rule_pk, _, _ in keyed)
+        by_doc = Counter(doc for _, doc, _ in keyed)
+        run, (day, regime) = self._run_pk, self._run_day
+        cx.executemany(ROLLUPS["rollup_run_rule"][0], [(run, k, n) for k, n in by_rule.items()])
+        cx.executemany(ROLLUPS["rollup_run_doc"][0], [(run, d, n) for d, n in by_doc.items()])
+        cx.executemany(
+            ROLLUPS["rollup_day_rule"][0], [(day, regime, k, n) for k, n in by_rule.items()]
         )
-    return (len(rows_list), str(DB_PATH))
+
+    def _run(self) -> None:
+        cx = None
+        try:
+            cx = connect(self.path)
+        except BaseException as e:
+            self._error = e
+        stop = False
+        while not stop:
+            items = [self._queue.get()]
+            rows: list[dict] = []
+            while True:
+                if items[-1] is None:
+                    stop = True
+                    break
+                rows.extend(items[-1])
+                if len(rows) >= self.batch_rows:
+                    break
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if rows and self._error is None:
+                    with cx:
+                        self._insert(cx, rows)
+                    self.count += len(rows)
+            except BaseException as e:  # keep draining so producers never block forever
+                self._error = e
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+        if cx is not None:
+            cx.close()
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"audit writer failed: {self._error}") from self._error
+
+    def write(self, rows: Iterable[dict]) -> None:
+        """Queue a document's findings (or any batch of rows)."""
+        self._raise()
+        rows = list(rows)
+        if not rows:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+        self._queue.put(rows)
+
+    def flush(self) -> None:
+        """Block until everything written so far is committed."""
+        if self._thread is not None:
+            self._queue.join()
+        self._raise()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._raise()
+
+    def write_metrics(self, rows: Iterable[tuple]) -> None:
+        """
+        Store the run's metrics (src.metrics.RunMetrics.db_rows) in `run_metrics`,
+        synchronously and after the findings written so far; a run without
+        findings still gets its `runs` row.
+        """
+        self.flush()
+        cx = connect(self.path)
+        try:
+            with cx:
+                cx.execute(INSERT_RUN, self.run)
+                (run_pk,) = cx.execute(
+                    "SELECT id FROM runs WHERE run_id=?", self.run[:1]
+                ).fetchone()
+                cx.executemany(INSERT_METRIC, [(run_pk, *row) for row in rows])
+        finally:
+            cx.close()
+
+    def __enter__(self) -> "AuditSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_events(
+    rows: Iterable[dict], regime: str, version: str, run_id: str, ruleset: str = ""
+) -> tuple[int, str]:
+    """
+    Persist findings to SQLite; returns (count, db_path).
+    `ruleset` is the RuleSet fingerprint the findings were produced with.
+    One-shot wrapper around AuditSink; long runs should keep a sink open.
+    """
+    with AuditSink(regime, version, run_id, ruleset) as sink:
+        sink.write(rows)
+    return (sink.count, str(sink.path))
+
+
+def rebuild_rollups(path: Path | None = None) -> dict[str, int]:
+    """Recompute the rollup tables of an existing log; returns the rows per table."""
+    cx = connect(path)  # also upgrades an older log
+    try:
+        with cx:
+            _rebuild_rollups(cx)
+        return {t: cx.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ROLLUPS}
+    finally:
+        cx.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="cc_mvp.py rebuild-rollups",
+        description="Recompute the audit log's rollup tables from its findings.",
+    )
+    parser.add_argument(
+        "--db", type=Path, default=DB_PATH, help="Audit log (default: %(default)s)."
+    )
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        parser.error(f"audit log not found: {args.db}")
+    counts = rebuild_rollups(args.db)
+    print(f"Rebuilt rollups in {args.db}: " + ", ".join(f"{t}={n}" for t, n in counts.items()))
@@ -0,0 +1,286 @@
+# src/audit_parquet.py
+# Tags: #ccaudit #ccdash
+#
+# `python cc_mvp.py export-audit`: the audit log as a Parquet dataset,
+# hive-partitioned by regime and run date (regime=GDPR/date=2025-03-01/...).
+# Events are streamed out of SQLite in record batches, so the export never
+# holds the log in memory; the repetitive columns are dictionary encoded.
+#
+# The read side mirrors src/audit_query.py (same functions, same Filters and
+# row layout) over a pyarrow dataset, so the dashboard can run on an export
+# instead of the live SQLite file. Regime/date filters prune partitions.
+from __future__ import annotations
+
+from collections.abc import Iterator
+from functools import reduce
+from pathlib import Path
+import argparse
+import operator
+import sqlite3
+
+from src.audit import DB_PATH, connect
+from src.audit_query import COLUMNS, EXPORT_BATCH, PAGE_SIZE, Filters
+
+EXPORT_DIR = Path("data/exports/audit")
+# events per record batch and at most per row group; the export's memory is a
+# few batches of Python rows, whatever the size of the log
+BATCH_ROWS = 16_384
+PARTITIONS = ("regime", "date")
+
+EXPORT_SELECT = """
+SELECT f.id, r.ts, r.run_id, r.version, r.regime, substr(r.ts, 1, 10), f.doc,
+       u.rule_id, u.label, u.severity, s.text, r.ruleset
+FROM findings f
+JOIN runs r     ON r.id = f.run
+JOIN rules u    ON u.id = f.rule
+JOIN snippets s ON s.id = f.snippet
+"""
+
+
+def schema():
+    import pyarrow as pa
+
+    words = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("ts", words),  # one value per run
+            ("run_id", words),
+            ("version", words),
+            ("regime", pa.string()),  # partition keys: stored in the path
+            ("date", pa.string()),
+            ("doc", words),
+            ("rule_id", words),
+            ("label", words),
+            ("severity", words),
+            ("snippet", pa.string()),
+            ("ruleset", words),
+        ]
+    )
+
+
+def partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([(p, pa.string()) for p in PARTITIONS]), flavor="hive")
+
+
+def _batches(cx: sqlite3.Connection, since: str | None, batch_rows: int):
+    import pyarrow as pa
+
+    sch = schema()
+    sql, params = EXPORT_SELECT, []
+    if since:
+        sql += " WHERE f.run IN (SELECT id FROM runs WHERE ts >= ?)"
+        params.append(since)
+    cur = cx.execute(sql + " ORDER BY f.id", params)
+    while rows := cur.fetchmany(batch_rows):
+        columns = [list(col) for col in zip(*rows)]
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, sch)], schema=sch
+        )
+
+
+def export_audit(
+    db: Path | None = None,
+    out: Path = EXPORT_DIR,
+    since: str | None = None,
+    batch_rows: int = BATCH_ROWS,
+) -> int:
+    """
+    Write the log (or the runs since the ISO date `since`) under `out`, one
+    regime=/date= directory per partition. Partitions that receive data are
+    replaced, others are left alone, so re-exporting recent days is cheap.
+    Returns the number of events written.
+    """
+    import pyarrow.dataset as ds
+
+    db = Path(db or DB_PATH)
+    connect(db).close()  # upgrade an older log first
+    # pyarrow pulls the batches from one of its own threads
+    cx = sqlite3.connect(db, check_same_thread=False)
+    count = 0
+
+    def counted(batches):
+        nonlocal count
+        for batch in batches:
+            count += batch.num_rows
+            yield batch
+
+    try:
+        file_options = ds.ParquetFileFormat().make_write_options(compression="zstd")
+        ds.write_dataset(
+            counted(_batches(cx, since, batch_rows)),
+            Path(out),
+            schema=schema(),
+            format="parquet",
+            partitioning=partitioning(),
+            file_options=file_options,
+            basename_template="part-{i}.parquet",
+            existing_data_behavior="delete_matching",
+            max_rows_per_group=batch_rows,
+        )
+    finally:
+        cx.close()
+    return count
+
+
+# ---------- Read side (dashboard) ----------
+def open_log(path: Path = EXPORT_DIR):
+    """The exported dataset; raises FileNotFoundError when there is none."""
+    import pyarrow.dataset as ds
+
+    path = Path(path)
+    if not path.is_dir():
+        raise FileNotFoundError(f"audit export not found: {path}")
+    return ds.dataset(path, format="parquet", partitioning=partitioning(), schema=schema())
+
+
+def _expression(filters: Filters, before: int | None = None):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    conds = []
+    for column, values in (
+        ("regime", filters.regimes),
+        ("rule_id", filters.rule_ids),
+        ("doc", filters.docs),
+    ):
+        if values is not None:
+            conds.append(pc.field(column).isin(pa.array(values, pa.string())))
+    if filters.start is not None:
+        conds.append(pc.field("date") >= filters.start.isoformat())
+    if filters.end is not None:
+        conds.append(pc.field("date") <= filters.end.isoformat())
+    if before is not None:
+        conds.append(pc.field("id") < before)
+    return reduce(operator.and_, conds) if conds else None
+
+
+def _strings(column):
+    import pyarrow as pa
+
+    return column.cast(pa.string())  # dictionary chunks may carry different dictionaries
+
+
+def _counts(dataset, filters: Filters, keys: list[str]) -> list[tuple]:
+    import pyarrow as pa
+
+    table = dataset.to_table(columns=keys, filter=_expression(filters))
+    table = pa.table({k: _strings(table[k]) for k in keys})
+    grouped = table.group_by(keys).aggregate([([], "count_all")]).to_pylist()
+    return [tuple(row[k] for k in keys) + (row["count_all"],) for row in grouped]
+
+
+def options(dataset) -> dict[str, list[str]]:
+    import pyarrow.compute as pc
+
+    table = dataset.to_table(columns=["regime", "rule_id", "doc"])
+    return {
+        key: sorted(pc.unique(_strings(table[column])).to_pylist())
+        for key, column in (("regimes", "regime"), ("rule_ids", "rule_id"), ("docs", "doc"))
+    }
+
+
+def ts_range(dataset) -> tuple[str | None, str | None]:
+    import pyarrow.compute as pc
+
+    ts = _strings(dataset.to_table(columns=["ts"])["ts"])
+    if not len(ts):
+        return None, None
+    bounds = pc.min_max(ts).as_py()
+    return bounds["min"], bounds["max"]
+
+
+def kpis(dataset, filters: Filters) -> dict:
+    import pyarrow.compute as pc
+
+    table = dataset.to_table(
+        columns=["id", "run_id", "doc", "rule_id"], filter=_expression(filters)
+    )
+    latest = None
+    if table.num_rows:
+        latest = table["run_id"][pc.index(table["id"], pc.max(table["id"])).as_py()].as_py()
+    return {
+        "findings": table.num_rows,
+        "docs": pc.count_distinct(_strings(table["doc"])).as_py(),
+        "rules": pc.count_distinct(_strings(table["rule_id"])).as_py(),
+        "latest_run": latest,
+    }
+
+
+def counts_by_rule(dataset, filters: Filters) -> list[tuple[str, str, int]]:
+    return sorted(_counts(dataset, filters, ["rule_id", "label"]), key=lambda r: (-r[2], r[0]))
+
+
+def counts_by_doc(dataset, filters: Filters, limit: int | None = None) -> list[tuple[str, int]]:
+    rows = sorted(_counts(dataset, filters, ["doc"]), key=lambda r: (-r[1], r[0]))
+    return rows if limit is None else rows[:limit]
+
+
+def counts_by_day(dataset, filters: Filters) -> list[tuple[str, int]]:
+    return sorted(_counts(dataset, filters, ["date"]))
+
+
+def _rows(dataset, expression, lo: int, hi: int) -> list[tuple]:
+    """Filtered events with lo <= id <= hi, newest first (files are id-ordered, so
+    row-group statistics skip everything outside the range)."""
+    import pyarrow.compute as pc
+
+    expression &= (pc.field("id") >= lo) & (pc.field("id") <= hi)
+    table = dataset.to_table(columns=list(COLUMNS), filter=expression)
+    table = table.sort_by([("id", "descending")])
+    return list(zip(*(table[c].to_pylist() for c in COLUMNS)))
+
+
+def recent_page(
+    dataset, filters: Filters, before: int | None = None, limit: int = PAGE_SIZE
+) -> tuple[list[tuple], int | None]:
+    import pyarrow.compute as pc
+
+    expression = _expression(filters, before)
+    ids = dataset.to_table(columns=["id"], filter=expression)["id"]
+    top = pc.select_k_unstable(ids, k=limit, sort_keys=[("id", "descending")])
+    if not len(top):
+        return [], None
+    page_ids = pc.take(ids, top)
+    expression = expression if expression is not None else pc.scalar(True)
+    rows = _rows(dataset, expression, pc.min(page_ids).as_py(), pc.max(page_ids).as_py())
+    return rows, (rows[-1][0] if len(rows) == limit else None)
+
+
+def iter_findings(dataset, filters: Filters, batch: int = EXPORT_BATCH) -> Iterator[tuple]:
+    import pyarrow.compute as pc
+
+    expression = _expression(filters)
+    ordered = dataset.to_table(columns=["id"], filter=expression)["id"].sort("descending")
+    expression = expression if expression is not None else pc.scalar(True)
+    for i in range(0, len(ordered), batch):
+        chunk = ordered[i : i + batch]
+        yield from _rows(dataset, expression, chunk[-1].as_py(), chunk[0].as_py())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cc_mvp.py export-audit",
+        description="Export the audit log to Parquet, partitioned by regime and run date.",
+    )
+    parser.add_argument(
+        "--db", type=Path, default=DB_PATH, help="Audit log (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--out", type=Path, default=EXPORT_DIR, help="Dataset directory (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="Only export runs from this date on (their partitions are replaced).",
+    )
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = parser.parse_args(argv)
+    if not args.db.exists():
+        parser.error(f"audit log not found: {args.db}")
+    count = export_audit(args.db, args.out, args.since, args.batch_rows)
+    print(f"Exported {count} events from {args.db} to {args.out}")
@@ -0,0 +1,248 @@
+# src/audit_query.py
+# Tags: #ccaudit #ccdash
+#
+# Read-side queries over the audit log for the dashboard. Filters become
+# parameterized WHERE clauses on the normalized tables (never string-formatted
+# values), KPIs and per-rule/per-doc/per-day tables are read from the rollup
+# tables the writer maintains (raw findings only when a query filters on both
+# rules and documents), and "recent findings" are paged by id (keyset), so
+# nothing scales with the size of the log except what is actually shown.
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+import sqlite3
+
+from src.audit import DB_PATH, SCHEMA_VERSION, connect
+
+PAGE_SIZE = 300
+EXPORT_BATCH = 5_000
+
+COLUMNS = (
+    "id", "ts", "run_id", "version", "regime", "doc", "rule_id", "label", "severity", "snippet"
+)  # fmt: skip
+SELECT_EVENTS = """
+SELECT f.id, r.ts, r.run_id, r.version, r.regime, f.doc,
+       u.rule_id, u.label, u.severity, s.text
+FROM findings f
+JOIN runs r     ON r.id = f.run
+JOIN rules u    ON u.id = f.rule
+JOIN snippets s ON s.id = f.snippet
+"""
+
+
+@dataclass(frozen=True)
+class Filters:
+    """
+    Dashboard filters. `None` means "no constraint" (the dashboard passes None
+    when every option is selected); an empty tuple matches nothing. `start` and
+    `end` are inclusive run dates.
+    """
+
+    regimes: tuple[str, ...] | None = None
+    rule_ids: tuple[str, ...] | None = None
+    docs: tuple[str, ...] | None = None
+    start: date | None = None
+    end: date | None = None
+
+    def where(self, daily: bool = False) -> tuple[str, list]:
+        """
+        SQL condition over `f`: `findings` or a per-run rollup (run/rule/doc
+        columns), or with `daily` the per-day rollup (day/regime/rule columns).
+        """
+        clauses, params = [], []
+        runs, run_params = [], []
+        if self.regimes is not None:
+            runs.append(f"regime IN ({_marks(self.regimes)})")
+            run_params.extend(self.regimes)
+        if daily:
+            if self.docs is not None:
+                raise ValueError("the daily rollup has no per-document counts")
+            if self.start is not None:
+                runs.append("day >= ?")
+                run_params.append(self.start.isoformat())
+            if self.end is not None:
+                runs.append("day <= ?")
+                run_params.append(self.end.isoformat())
+            clauses.extend(f"f.{c}" for c in runs)
+        else:
+            if self.start is not None:
+                runs.append("ts >= ?")
+                run_params.append(self.start.isoformat())
+            if self.end is not None:
+                runs.append("ts < ?")  # ts is ISO text: before the next day's midnight
+                run_params.append((self.end + timedelta(days=1)).isoformat())
+            if runs:
+                clauses.append(f"f.run IN (SELECT id FROM runs WHERE {' AND '.join(runs)})")
+        params.extend(run_params)
+        if self.rule_ids is not None:
+            clauses.append(
+                f"f.rule IN (SELECT id FROM rules WHERE rule_id IN ({_marks(self.rule_ids)}))"
+            )
+            params.extend(self.rule_ids)
+        if self.docs is not None:
+            clauses.append(f"f.doc IN ({_marks(self.docs)})")
+            params.extend(self.docs)
+        return " AND ".join(clauses) or "1", params
+
+
+def _marks(values: Sequence) -> str:
+    return ",".join("?" * len(values))
+
+
+def _source(filters: Filters, by: str) -> tuple[str, str]:
+    """
+    (table, count expression) for counts grouped `by` "rule" or "doc". The
+    per-run rollups answer any filter that doesn't constrain the other
+    dimension; only a rule filter combined with a document filter (or the
+    other way round) needs the raw findings.
+    """
+    if by == "rule" and filters.docs is None:
+        return "rollup_run_rule", "SUM(f.n)"
+    if by == "doc" and filters.rule_ids is None:
+        return "rollup_run_doc", "SUM(f.n)"
+    return "findings", "COUNT(*)"
+
+
+def open_log(path: Path | None = None) -> sqlite3.Connection:
+    """
+    Read-only connection to the audit log. A log written by an older version is
+    upgraded once (through the writer connection) so the indexes and rollup
+    tables exist.
+    """
+    path = Path(path or DB_PATH)
+    if not path.exists():
+        raise FileNotFoundError(f"audit log not found: {path}")
+    with sqlite3.connect(path) as cx:
+        current = cx.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION
+    if not current:
+        connect(path).close()
+    return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+def options(cx: sqlite3.Connection) -> dict[str, list[str]]:
+    """Distinct values for the filter widgets."""
+    return {
+        "regimes": [r for (r,) in cx.execute("SELECT DISTINCT regime FROM runs ORDER BY 1")],
+        "rule_ids": [r for (r,) in cx.execute("SELECT DISTINCT rule_id FROM rules ORDER BY 1")],
+        "docs": [d for (d,) in cx.execute("SELECT DISTINCT doc FROM findings ORDER BY 1")],
+    }
+
+
+def ts_range(cx: sqlite3.Connection) -> tuple[str | None, str | None]:
+    """First and last run timestamp (ISO text), or (None, None) for an empty log."""
+    return cx.execute("SELECT MIN(ts), MAX(ts) FROM runs").fetchone()
+
+
+def kpis(cx: sqlite3.Connection, filters: Filters) -> dict:
+    """Total findings, distinct docs and rule ids hit, and the latest run's id."""
+    where, params = filters.where()
+    table, count = _source(filters, "rule")
+    total, latest = cx.execute(
+        f"SELECT {count}, MAX(f.run) FROM {table} f WHERE {where}", params
+    ).fetchone()
+    (rules,) = cx.execute(
+        "SELECT COUNT(DISTINCT rule_id) FROM rules"
+        f" WHERE id IN (SELECT f.rule FROM {table} f WHERE {where})",
+        params,
+    ).fetchone()
+    table, _ = _source(filters, "doc")
+    (docs,) = cx.execute(
+        f"SELECT COUNT(DISTINCT f.doc) FROM {table} f WHERE {where}", params
+    ).fetchone()
+    run_id = cx.execute("SELECT run_id FROM runs WHERE id=?", (latest,)).fetchone()
+    return {
+        "findings": total or 0,
+        "docs": docs,
+        "rules": rules,
+        "latest_run": run_id[0] if run_id else None,
+    }
+
+
+def counts_by_rule(cx: sqlite3.Connection, filters: Filters) -> list[tuple[str, str, int]]:
+    """(rule_id, label, count), most frequent first."""
+    if filters.docs is None:
+        where, params = filters.where(daily=True)
+        per_rule = (
+            f"SELECT f.rule, SUM(f.n) AS n FROM rollup_day_rule f WHERE {where} GROUP BY f.rule"
+        )
+    else:
+        where, params = filters.where()
+        per_rule = f"SELECT f.rule, COUNT(*) AS n FROM findings f WHERE {where} GROUP BY f.rule"
+    # count per integer key first; only the few groups are joined to their labels
+    return cx.execute(
+        f"""
+        SELECT u.rule_id, u.label, SUM(c.n) AS count
+        FROM ({per_rule}) c
+        JOIN rules u ON u.id = c.rule
+        GROUP BY u.rule_id, u.label
+        ORDER BY count DESC, u.rule_id
+        """,
+        params,
+    ).fetchall()
+
+
+def counts_by_doc(
+    cx: sqlite3.Connection, filters: Filters, limit: int | None = None
+) -> list[tuple[str, int]]:
+    """(doc, count), most frequent first; `limit` keeps only the top documents."""
+    where, params = filters.where()
+    table, count = _source(filters, "doc")
+    return cx.execute(
+        f"""
+        SELECT f.doc, {count} AS count FROM {table} f WHERE {where}
+        GROUP BY f.doc ORDER BY count DESC, f.doc LIMIT ?
+        """,
+        [*params, -1 if limit is None else limit],
+    ).fetchall()
+
+
+def counts_by_day(cx: sqlite3.Connection, filters: Filters) -> list[tuple[str, int]]:
+    """(YYYY-MM-DD, count) per run day, oldest first."""
+    if filters.docs is None:
+        where, params = filters.where(daily=True)
+        sql = f"SELECT f.day, SUM(f.n) FROM rollup_day_rule f WHERE {where} GROUP BY f.day"
+    else:
+        where, params = filters.where()
+        sql = f"""
+            SELECT substr(r.ts, 1, 10) AS day, c.n
+            FROM (SELECT f.run, COUNT(*) AS n FROM findings f WHERE {where} GROUP BY f.run) c
+            JOIN runs r ON r.id = c.run
+            """
+        sql = f"SELECT day, SUM(n) FROM ({sql}) GROUP BY day"
+    return cx.execute(f"{sql} ORDER BY 1", params).fetchall()
+
+
+def recent_page(
+    cx: sqlite3.Connection,
+    filters: Filters,
+    before: int | None = None,
+    limit: int = PAGE_SIZE,
+) -> tuple[list[tuple], int | None]:
+    """
+    One page of findings (COLUMNS), newest first, strictly older than id
+    `before`. Returns the rows and the cursor for the next page (None on the
+    last one).
+    """
+    where, params = filters.where()
+    if before is not None:
+        where += " AND f.id < ?"
+        params.append(before)
+    rows = cx.execute(
+        f"{SELECT_EVENTS} WHERE {where} ORDER BY f.id DESC LIMIT ?", [*params, limit]
+    ).fetchall()
+    return rows, (rows[-1][0] if len(rows) == limit else None)
+
+
+def iter_findings(
+    cx: sqlite3.Connection, filters: Filters, batch: int = EXPORT_BATCH
+) -> Iterator[tuple]:
+    """Every filtered finding (COLUMNS), newest first, fetched `batch` rows at a time."""
+    before = None
+    while True:
+        rows, before = recent_page(cx, filters, before, batch)
+        yield from rows
+        if before is None:
+            return
@@ -0,0 +1,143 @@
+# src/budget.py
+# Tags: #ccengine #ccrules
+#
+# Scan-time budgets for regex rules. Each rule gets a time budget per document
+# (and, optionally, all rules together get one per document). A rule whose
+# finditer overruns is interrupted, skipped for the rest of the document and
+# reported as a SCAN-BUDGET marker finding, so one catastrophic pattern can't
+# hold a document (or a worker) hostage. Interruption uses a SIGALRM interval
+# timer, which only exists on POSIX and only fires in the main thread; anywhere
+# else an overrunning pass is allowed to finish and the rule is stopped after it.
+from __future__ import annotations
+
+from contextlib import contextmanager
+import signal
+import threading
+import time
+
+DEFAULT_RULE_BUDGET_MS = 2000.0
+BUDGET_RULE_ID = "SCAN-BUDGET"
+BUDGET_SOURCE = "budget"  # `source` of marker findings (never cached)
+
+_MAX_TIMER = 86_400.0  # seconds; stands in for "no limit" when arming the timer
+_CAN_INTERRUPT = hasattr(signal, "setitimer") and hasattr(signal, "SIGALRM")
+
+
+class RuleTimeout(Exception):
+    """Raised inside a regex pass when its budget runs out."""
+
+
+def _interrupt(signum, frame):
+    raise RuleTimeout()
+
+
+def can_interrupt() -> bool:
+    """True when an overrunning match can be stopped here (POSIX, main thread)."""
+    return _CAN_INTERRUPT and threading.current_thread() is threading.main_thread()
+
+
+class ScanBudget:
+    """
+    Per-document limits: `rule_ms` per rule and `doc_ms` for all rule passes
+    together (None: no such limit). Open `document()` around each document's scan; the
+    RuleSet runs every regex pass through `run()`. `stopped` maps each rule
+    that ran out to the milliseconds it had used.
+
+    A pickled budget (sent to a pool process with the RuleSet) carries only
+    its limits; the copy starts its own accounting.
+    """
+
+    def __init__(self, rule_ms: float | None = DEFAULT_RULE_BUDGET_MS, doc_ms: float | None = None):
+        self.rule_ms = rule_ms
+        self.doc_ms = doc_ms
+        self.active = False
+        self.stopped: dict[str, float] = {}
+        self._spent: dict[str, float] = {}
+        self._total = 0.0
+        self._interrupt: int | None = None  # thread id the SIGALRM handler serves
+
+    def __getstate__(self):
+        return {"rule_ms": self.rule_ms, "doc_ms": self.doc_ms}
+
+    def __setstate__(self, state):
+        self.__init__(state["rule_ms"], state["doc_ms"])
+
+    def __repr__(self) -> str:
+        return f"ScanBudget(rule_ms={self.rule_ms}, doc_ms={self.doc_ms})"
+
+    @contextmanager
+    def document(self):
+        """Fresh accounting for one document; installs the SIGALRM handler when usable."""
+        self.stopped, self._spent, self._total = {}, {}, 0.0
+        self._interrupt = threading.get_ident() if can_interrupt() else None
+        previous = signal.signal(signal.SIGALRM, _interrupt) if self._interrupt else None
+        self.active = True
+        try:
+            yield self
+        finally:
+            self.active = False
+            if self._interrupt:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+                self._interrupt = None
+
+    def _remaining(self, rule_id: str) -> float:
+        left = float("inf")
+        if self.rule_ms is not None:
+            left = self.rule_ms - self._spent.get(rule_id, 0.0)
+        if self.doc_ms is not None:
+            left = min(left, self.doc_ms - self._total)
+        return left
+
+    def run(self, rule_id: str, fn):
+        """
+        `fn()` within what is left of `rule_id`'s budget; None when the rule
+        has been (or now is) stopped.
+        """
+        if rule_id in self.stopped:
+            return None
+        left = self._remaining(rule_id)
+        if left <= 0:
+            self.stopped[rule_id] = self._spent.get(rule_id, 0.0)
+            return None
+        t0 = time.perf_counter()
+        out = None
+        try:
+            if self._interrupt == threading.get_ident():  # not from a thread pool's threads
+                signal.setitimer(signal.ITIMER_REAL, min(left / 1000, _MAX_TIMER))
+                try:
+                    out = fn()
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            else:
+                out = fn()
+        except RuleTimeout:
+            out = None
+        ms = (time.perf_counter() - t0) * 1000
+        self._spent[rule_id] = self._spent.get(rule_id, 0.0) + ms
+        self._total += ms
+        if out is None or ms >= left:  # not interruptible here: keep what it found, then stop
+            self.stopped[rule_id] = self._spent[rule_id]
+        return out
+
+    def markers(self) -> list[dict]:
+        """One SCAN-BUDGET finding per stopped rule, for the outputs and the audit log."""
+        limits = [f"{self.rule_ms:.0f} ms per rule"] if self.rule_ms is not None else []
+        if self.doc_ms is not None:
+            limits.append(f"{self.doc_ms:.0f} ms per document")
+        limit = ", ".join(limits)
+        out = []
+        for rule_id, ms in self.stopped.items():
+            out.append(
+                {
+                    "rule_id": BUDGET_RULE_ID,
+                    "label": f"Scan budget exceeded: {rule_id}",
+                    "severity": "info",
+                    "start": 0,
+                    "end": 0,
+                    "snippet": f"{rule_id} stopped after {ms:.0f} ms (budget {limit});"
+                    " its findings for this document may be incomplete.",
+                    "source": BUDGET_SOURCE,
+                }
+            )
+        return out
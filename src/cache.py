@@ -0,0 +1,360 @@
+# src/cache.py
+# Tags: #cccache #ccengine
+#
+# Content-addressed findings cache. A document whose bytes, ruleset, app and
+# findings-format version and AI mode are unchanged since the last run reuses
+# its stored findings instead of being read, extracted and scanned again. A
+# separate on-disk text store keeps the normalized text of PDF/DOCX files, so
+# runs with edited rules still skip the slow pdfplumber/python-docx extraction.
+# AI responses are cached on their own (LLMCache), so edited rules or a new app
+# version don't pay for the same prompt twice.
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+CACHE_PATH = Path("data/cc_cache.sqlite")  # lives next to data/cc_audit.sqlite
+MAX_AGE_DAYS = 30  # entries not used for this long are pruned on open
+TEXT_CACHE_DIR = Path("data/cache/text")
+TEXT_CACHE_MAX_BYTES = 512 << 20  # compressed size cap, least recently used evicted first
+LLM_CACHE_TTL_DAYS = 30  # AI responses older than this are asked again
+LLM_CACHE_MAX_BYTES = 64 << 20  # stored response size cap, least recently used evicted first
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings_cache (
+  content_hash TEXT NOT NULL,
+  ruleset_hash TEXT NOT NULL,
+  version      TEXT NOT NULL,
+  ai           INTEGER NOT NULL,
+  findings     TEXT NOT NULL,
+  last_used    TEXT NOT NULL,
+  PRIMARY KEY (content_hash, ruleset_hash, version, ai)
+) WITHOUT ROWID;
+"""
+
+LLM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+  regime         TEXT NOT NULL,
+  model          TEXT NOT NULL,
+  prompt_version INTEGER NOT NULL,
+  text_hash      TEXT NOT NULL,
+  response       TEXT NOT NULL,
+  size           INTEGER NOT NULL,
+  created        REAL NOT NULL,
+  last_used      REAL NOT NULL,
+  PRIMARY KEY (regime, model, prompt_version, text_hash)
+);
+"""
+
+CacheKey = tuple[str, str, str, bool]  # (content hash, ruleset hash, version, ai)
+LLMCacheKey = tuple[str, str, int, str]  # (regime, model, prompt version, text hash)
+
+
+def file_digest(path: Path, block: int = 1 << 20) -> str:
+    """sha256 of the file's bytes (streamed, so large PDFs aren't loaded whole)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(block):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _today() -> str:
+    return datetime.date.today().isoformat()
+
+
+class FindingsCache:
+    """
+    SQLite-backed map from CacheKey to the findings a document produced
+    (without the `doc` name, so renamed-but-identical files still hit).
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, rebuild: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._cx = sqlite3.connect(self.path)
+        self._cx.execute("PRAGMA journal_mode=WAL;")
+        self._cx.executescript(SCHEMA)
+        with self._cx:
+            if rebuild:
+                self._cx.execute("DELETE FROM findings_cache")
+            cutoff = (datetime.date.today() - datetime.timedelta(days=MAX_AGE_DAYS)).isoformat()
+            self._cx.execute("DELETE FROM findings_cache WHERE last_used < ?", (cutoff,))
+
+    def get(self, key: CacheKey) -> list[dict] | None:
+        row = self._cx.execute(
+            """
+            SELECT findings FROM findings_cache
+            WHERE content_hash=? AND ruleset_hash=? AND version=? AND ai=?
+            """,
+            (key[0], key[1], key[2], int(key[3])),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._cx:
+            self._cx.execute(
+                """
+                UPDATE findings_cache SET last_used=?
+                WHERE content_hash=? AND ruleset_hash=? AND version=? AND ai=? AND last_used<>?
+                """,
+                (_today(), key[0], key[1], key[2], int(key[3]), _today()),
+            )
+        return json.loads(row[0])
+
+    def put(self, key: CacheKey, findings: list[dict]) -> None:
+        stored = [{k: v for k, v in f.items() if k != "doc"} for f in findings]
+        with self._cx:
+            self._cx.execute(
+                """
+                INSERT OR REPLACE INTO findings_cache
+                  (content_hash, ruleset_hash, version, ai, findings, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key[0],
+                    key[1],
+                    key[2],
+                    int(key[3]),
+                    json.dumps(stored, ensure_ascii=False),
+                    _today(),
+                ),
+            )
+
+    def summary(self) -> str:
+        return f"{self.hits} hits / {self.misses} misses ({self.path})"
+
+    def close(self) -> None:
+        self._cx.close()
+
+    def __enter__(self) -> FindingsCache:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Raw AI responses keyed by LLMCacheKey, in the findings cache's SQLite
+    file. Entries expire `ttl_days` after they were fetched; on close the
+    least recently used are evicted until the responses fit in `max_bytes`.
+    The escalation stage stores answers from its event loop thread, so the
+    connection is shared behind a lock.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttl_days: float = LLM_CACHE_TTL_DAYS,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        rebuild: bool = False,
+        clock=time.time,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_days * 86400
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._used: dict[LLMCacheKey, float] = {}  # last_used bumps, written on close
+        self._lock = threading.Lock()
+        self._cx = sqlite3.connect(self.path, check_same_thread=False)
+        self._cx.execute("PRAGMA journal_mode=WAL;")
+        self._cx.executescript(LLM_SCHEMA)
+        with self._cx:
+            if rebuild:
+                self._cx.execute("DELETE FROM llm_cache")
+            self._cx.execute("DELETE FROM llm_cache WHERE created < ?", (self.clock() - self.ttl,))
+
+    def get(self, key: LLMCacheKey) -> str | None:
+        now = self.clock()
+        with self._lock:
+            row = self._cx.execute(
+                """
+                SELECT response FROM llm_cache
+                WHERE regime=? AND model=? AND prompt_version=? AND text_hash=? AND created>=?
+                """,
+                (*key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._used[key] = now
+        return row[0]
+
+    def put(self, key: LLMCacheKey, response: str) -> None:
+        now = self.clock()
+        with self._lock, self._cx:
+            self._cx.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                  (regime, model, prompt_version, text_hash, response, size, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (*key, response, len(response.encode("utf-8")), now, now),
+            )
+
+    def prune(self) -> int:
+        """Evict least recently used responses beyond `max_bytes`; returns how many."""
+        with self._lock, self._cx:
+            evicted = self._cx.execute(
+                """
+                DELETE FROM llm_cache WHERE rowid IN (
+                  SELECT rowid FROM (
+                    SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC, rowid DESC) AS kept
+                    FROM llm_cache
+                  ) WHERE kept > ?
+                )
+                """,
+                (self.max_bytes,),
+            ).rowcount
+        self.evicted += evicted
+        return evicted
+
+    def summary(self) -> str:
+        evicted = f", {self.evicted} evicted" if self.evicted else ""
+        return f"{self.hits} hits / {self.misses} misses{evicted} ({self.path})"
+
+    def close(self) -> None:
+        with self._lock, self._cx:
+            self._cx.executemany(
+                """
+                UPDATE llm_cache SET last_used=?
+                WHERE regime=? AND model=? AND prompt_version=? AND text_hash=?
+                """,
+                [(used, *key) for key, used in self._used.items()],
+            )
+            self._used.clear()
+        self.prune()
+        self._cx.close()
+
+    def __enter__(self) -> LLMCache:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TextStore:
+    """
+    Gzip-compressed normalized text of extracted documents, one file per
+    (content hash, reader version) under `root`. Entries are the (page, text)
+    segments the scanner consumes, written one JSON line each so PDFs can be
+    streamed back without holding the whole document.
+
+    Reads bump the file mtime; `prune()` evicts the least recently used files
+    until the store fits in `max_bytes`. Plain files and atomic renames keep it
+    safe to share between pool workers without a lock.
+    """
+
+    def __init__(
+        self, root: Path = TEXT_CACHE_DIR, max_bytes: int = TEXT_CACHE_MAX_BYTES, rebuild=False
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        if rebuild:
+            for f in self._files():
+                f.unlink(missing_ok=True)
+
+    def _path(self, content_hash: str, reader: str) -> Path:
+        key = hashlib.sha256(f"{content_hash}:{reader}".encode()).hexdigest()[:32]
+        return self.root / key[:2] / f"{key}.jsonl.gz"
+
+    def _files(self) -> list[Path]:
+        return list(self.root.glob("*/*.jsonl.gz")) if self.root.exists() else []
+
+    def get(self, content_hash: str, reader: str) -> Iterator[tuple[int | None, str]] | None:
+        """
+        The stored segments, or None on a miss. An entry that is truncated or
+        corrupt (its gzip CRC/length trailer is checked by decompressing it
+        once, far cheaper than extraction) is deleted and reported as a miss,
+        so the document is extracted and stored again instead of failing.
+        """
+        path = self._path(content_hash, reader)
+        try:
+            with gzip.open(path, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+            os.utime(path)
+            f = gzip.open(path, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error):
+            path.unlink(missing_ok=True)
+            return None
+
+        def segments():
+            try:
+                with f:
+                    for line in f:
+                        page, text = json.loads(line)
+                        yield page, text
+            except (OSError, EOFError, zlib.error, ValueError):
+                path.unlink(missing_ok=True)  # unreadable after all: re-extract next time
+                raise
+
+        return segments()
+
+    def record(
+        self, content_hash: str, reader: str, segments: Iterable[tuple[int | None, str]]
+    ) -> Iterator[tuple[int | None, str]]:
+        """
+        Pass `segments` through unchanged while writing them to the store. The
+        entry only becomes visible once the iterator is exhausted, so a reader
+        error or an abandoned scan never leaves a truncated entry behind.
+        """
+        path = self._path(content_hash, reader)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        done = False
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+                for page, text in segments:
+                    f.write(json.dumps([page, text], ensure_ascii=False) + "\n")
+                    yield page, text
+            os.replace(tmp, path)
+            done = True
+        finally:
+            if not done:
+                Path(tmp).unlink(missing_ok=True)
+
+    def prune(self) -> int:
+        """Evict least recently used entries beyond `max_bytes`; returns how many."""
+        entries = []
+        for f in self._files():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, f in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        return evicted
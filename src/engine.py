@@ -1,9 +1,25 @@
+from bisect import bisect_right
 from pathlib import Path
-import re, yaml
+import hashlib, json, re, time
 from dataclasses import dataclass
 from typing import List, Dict, Tuple
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
+
+from src.findings import SNIPPET_CONTEXT, FindingBatch, SnippetSource
+from src.keywords import KEYWORD_TYPES, KeywordMatcher, KeywordRule, keyword_rule_from_spec
+
+try:  # Python 3.11+ ships the regex parser as a private submodule
+    from re import _constants as _sre_c, _parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_constants as _sre_c, sre_parse as _sre_parse
+
+MIN_LITERAL = 2  # shorter runs are too common to be worth prefiltering on
+MAX_MATCH_WIDTH = 2048  # hard cap on any rule's assumed match width
+UNBOUNDED_REPEAT = 64  # `\s*`, `.+` ... are assumed to repeat at most this often
+MIN_WINDOW = 64 * 1024  # streamed text is scanned in windows of at least this many chars
+MAX_CHUNK = 1200
+CHUNK_OVERLAP = 150
 
 
 @dataclass
@@ -14,11 +30,24 @@ class Rule:
     pattern: re.Pattern
 
 
-def load_rules(yaml_path: Path) -> list[Rule]:
-    data = yaml.safe_load(yaml_path.read_text(encoding="utf-8"))
-    out: list[Rule] = []
+def load_rules(yaml_path: Path, referenced: list[Path] | None = None) -> list[Rule | KeywordRule]:
+    """
+    The rules of one YAML file. `referenced`, if given, receives the path of
+    every keyword `terms_file` the rules read (resolved), so callers can track
+    them without parsing the file again.
+    """
+    import yaml  # only needed when compiling from YAML (not for bundles / warm rulesets)
+
+    data = yaml.safe_load(yaml_path.read_text(encoding="utf-8")) or {}
+    out: list[Rule | KeywordRule] = []
     for r in data.get("rules", []):
-        if r.get("type", "regex") != "regex":
+        kind = r.get("type", "regex")
+        if kind in KEYWORD_TYPES:
+            out.append(keyword_rule_from_spec(r, yaml_path.parent))
+            if referenced is not None and r.get("terms_file"):
+                referenced.append((yaml_path.parent / r["terms_file"]).resolve())
+            continue
+        if kind != "regex":
             continue
         pat = re.compile(r["value"])
         out.append(
@@ -27,16 +56,577 @@ def load_rules(yaml_path: Path) -> list[Rule]:
     return out
 
 
+# ---------- Literal extraction ----------
+_REPEATS = {_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT}
+if hasattr(_sre_c, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(_sre_c.POSSESSIVE_REPEAT)
+
+
+def _required_groups(seq) -> list[frozenset[str]]:
+    """
+    Walk a parsed regex and return literal groups that every match must contain.
+    The result is an AND of ORs: each group needs at least one of its literals present.
+    """
+    groups: list[frozenset[str]] = []
+    run: list[str] = []
+
+    def flush() -> None:
+        if len(run) >= MIN_LITERAL:
+            groups.append(frozenset(["".join(run)]))
+        run.clear()
+
+    for op, av in seq:
+        if op is _sre_c.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is _sre_c.SUBPATTERN:
+            groups.extend(_required_groups(av[-1]))
+        elif op is _sre_c.BRANCH:
+            alt = _branch_group(av[1])
+            if alt:
+                groups.append(alt)
+        elif op in _REPEATS:
+            lo, _hi, sub = av
+            if lo >= 1:
+                groups.extend(_required_groups(sub))
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            groups.extend(_required_groups(av))
+        # IN / ANY / AT / NOT_LITERAL / asserts / backrefs constrain nothing literal
+    flush()
+    return groups
+
+
+def _branch_group(alternatives) -> frozenset[str] | None:
+    """One group covering a whole alternation: the most selective literal of each branch."""
+    picked: set[str] = set()
+    for alt in alternatives:
+        groups = _required_groups(alt)
+        if not groups:
+            return None  # this branch can match without any literal we know of
+        best = max(groups, key=lambda g: (min(len(s) for s in g), -len(g)))
+        picked.update(best)
+    return frozenset(picked)
+
+
+def required_literals(pattern: re.Pattern) -> list[frozenset[str]]:
+    """Literal groups required by `pattern`; empty when nothing can be extracted."""
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return []
+    # A group of identical alternatives adds nothing; keep the order stable for fingerprints
+    seen: list[frozenset[str]] = []
+    for g in _required_groups(list(parsed)):
+        if g not in seen:
+            seen.append(g)
+    return seen
+
+
+_ONE_CHAR = {_sre_c.LITERAL, _sre_c.NOT_LITERAL, _sre_c.ANY, _sre_c.IN}
+_ASSERTS = {_sre_c.ASSERT, _sre_c.ASSERT_NOT}
+_BACKREFS = {_sre_c.GROUPREF, _sre_c.GROUPREF_EXISTS, getattr(_sre_c, "GROUPREF_IGNORE", None)}
+
+
+def _width(seq) -> int:
+    """How far past its start a match (plus any lookahead) can reach."""
+    total = 0
+    for op, av in seq:
+        if op in _ONE_CHAR:
+            total += 1
+        elif op is _sre_c.SUBPATTERN:
+            total += _width(av[-1])
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            total += _width(av)
+        elif op is _sre_c.BRANCH:
+            total += max(_width(alt) for alt in av[1])
+        elif op in _REPEATS:
+            _lo, hi, sub = av
+            total += (UNBOUNDED_REPEAT if hi == _sre_c.MAXREPEAT else hi) * _width(sub)
+        elif op in _ASSERTS:
+            direction, sub = av
+            if direction == 1:  # lookahead inspects text beyond the match
+                total += _width(sub)
+        elif op in _BACKREFS:
+            return MAX_MATCH_WIDTH
+        if total >= MAX_MATCH_WIDTH:
+            return MAX_MATCH_WIDTH
+    return total
+
+
+def max_match_width(rule) -> int:
+    """
+    Longest stretch of text a match of `rule` depends on, capped at
+    MAX_MATCH_WIDTH. Unbounded repeats count as UNBOUNDED_REPEAT iterations;
+    this sizes chunk/window overlaps, so only absurdly long matches are at risk.
+    """
+    if isinstance(rule, KeywordRule):
+        return min(rule.max_width + 1, MAX_MATCH_WIDTH)  # +1: whole-word check
+    try:
+        parsed = _sre_parse.parse(rule.pattern.pattern, rule.pattern.flags)
+    except Exception:
+        return MAX_MATCH_WIDTH
+    return min(_width(list(parsed)) + 1, MAX_MATCH_WIDTH)  # +1: `\b`/`$` look one past
+
+
+def _trie_pattern(words) -> str:
+    """
+    Regex for a set of literals with shared prefixes factored out. A flat
+    alternation makes `re` try every literal at every position; the trie form
+    only follows branches whose first characters actually match.
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # Greedy optional: longer literals are tried before the shorter prefix ends
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+# ---------- Compiled rule set ----------
+def chunk_spans(n: int):
+    i = 0
+    while i < n:
+        end = min(n, i + MAX_CHUNK)
+        yield (i, end)
+        if end == n:
+            break
+        i = end - CHUNK_OVERLAP
+
+
+def chunk_text(text: str):
+    for i, end in chunk_spans(len(text)):
+        yield (i, end, text[i:end])
+
+
+def make_finding(rule, text: str, start: int, end: int) -> dict:
+    snippet = text[max(0, start - SNIPPET_CONTEXT) : min(len(text), end + SNIPPET_CONTEXT)]
+    return {
+        "rule_id": rule.id,
+        "label": rule.label,
+        "severity": rule.severity,
+        "start": start,
+        "end": end,
+        "snippet": snippet.replace("\n", " "),
+    }
+
+
+class RuleSet:
+    """
+    Rules compiled for scanning many documents.
+
+    Required literals are pulled out of every regex and folded into a single
+    case-insensitive prefilter. One pass over a document tells us which rules can
+    possibly match; only those get a full `finditer`. Findings (and their order)
+    are identical to running every rule over the whole text.
+
+    Keyword/dictionary rules share one Aho-Corasick automaton and are matched in
+    a single pass regardless of how many terms they carry.
+    """
+
+    # rule id -> seconds spent matching, while a caller profiles the scan (set it
+    # to {} to start); "(prefilter)" and "(keywords)" are the shared passes
+    timing: dict[str, float] | None = None
+    # src.budget.ScanBudget limiting each regex pass, while a caller enforces one
+    budget = None
+    _meta: list[tuple[str, str, str]] | None = None
+
+    def __init__(self, rules: Sequence):
+        self.rules = list(rules)
+        self.widths = [max_match_width(r) for r in self.rules]
+        self._regex_idx = [i for i, r in enumerate(self.rules) if not isinstance(r, KeywordRule)]
+        self._regex = [self.rules[i] for i in self._regex_idx]
+        self._keyword_idx = [i for i, r in enumerate(self.rules) if isinstance(r, KeywordRule)]
+        self._keywords = (
+            KeywordMatcher([self.rules[i] for i in self._keyword_idx])
+            if self._keyword_idx
+            else None
+        )
+
+        literals: dict[str, str] = {}  # lower-cased key -> literal as written
+        self._rule_groups: list[list[frozenset[str]]] = []
+        for r in self._regex:
+            groups = required_literals(r.pattern)
+            for g in groups:
+                for s in g:
+                    literals.setdefault(s.lower(), s)
+            self._rule_groups.append([frozenset(s.lower() for s in g) for g in groups])
+
+        self._literals = sorted(literals)
+        # A prefilter hit on "notification" also proves "notif" is present
+        keys = set(self._literals)
+        self._credit: dict[str, frozenset[str]] = {
+            key: frozenset(key[:i] for i in range(1, len(key) + 1) if key[:i] in keys)
+            for key in self._literals
+        }
+        self._prefilter: re.Pattern | None = None
+        if self._literals:
+            # Lower-casing can change length ("İ"); keep those literals as written too
+            words = set(self._literals) | {v for k, v in literals.items() if len(k) != len(v)}
+            # Lookahead so overlapping literals ("data breach" / "breach") are all reported
+            self._prefilter = re.compile(f"(?=({_trie_pattern(words)}))", re.IGNORECASE)
+        self._fallback: dict[str, re.Pattern] = {}
+        self._fingerprint: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of every rule definition; changes whenever a rule would scan differently."""
+        if self._fingerprint is None:
+            h = hashlib.sha256()
+            for r in self.rules:
+                if isinstance(r, KeywordRule):
+                    spec = [
+                        "keyword",
+                        r.id,
+                        r.label,
+                        r.severity,
+                        r.case_sensitive,
+                        r.whole_word,
+                        list(r.terms),
+                    ]
+                else:
+                    spec = ["regex", r.id, r.label, r.severity, r.pattern.pattern, r.pattern.flags]
+                h.update(json.dumps(spec, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._fingerprint = h.hexdigest()[:16]
+        return self._fingerprint
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    @property
+    def meta(self) -> list[tuple[str, str, str]]:
+        """(rule_id, label, severity) per rule: what a FindingBatch row needs to become a dict."""
+        if self._meta is None:
+            self._meta = [(r.id, r.label, r.severity) for r in self.rules]
+        return self._meta
+
+    def _literals_in(self, text: str) -> set[str]:
+        seen: set[str] = set()
+        if self._prefilter is None:
+            return seen
+        remaining = len(self._literals)
+        for m in self._prefilter.finditer(text):
+            hit = m.group(1)
+            credit = self._credit.get(hit.lower())
+            if credit is None:
+                credit = self._credit_casefold(hit)
+            new = credit - seen
+            if new:
+                seen |= new
+                remaining -= len(new)
+                if remaining <= 0:
+                    break
+        return seen
+
+    def _credit_casefold(self, hit: str) -> frozenset[str]:
+        """Slow path for characters where str.lower() and re.IGNORECASE disagree."""
+        out = []
+        for key in self._literals:
+            pat = self._fallback.get(key)
+            if pat is None:
+                pat = self._fallback[key] = re.compile(re.escape(key), re.IGNORECASE)
+            if pat.match(hit):
+                out.append(key)
+        return frozenset(out)
+
+    def _candidate_idx(self, text: str) -> list[int]:
+        seen = self._literals_in(text)
+        return [
+            i
+            for i, groups in zip(self._regex_idx, self._rule_groups)
+            if all(not g.isdisjoint(seen) for g in groups)
+        ]
+
+    def candidates(self, text: str) -> list:
+        """Regex rules whose required literals all occur in `text`, in rule order."""
+        return [self.rules[i] for i in self._candidate_idx(text)]
+
+    def spans(self, text: str, lo: Sequence[int] | None = None) -> list[list[tuple[int, int]]]:
+        """
+        Match spans per rule (same order as `rules`). When `lo` is given, rule i
+        only reports matches starting at or after lo[i], exactly as a scan that
+        resumed there would (context before lo[i] still counts for lookbehinds).
+        """
+        if self.timing is not None or self.budget is not None:
+            return self._guarded_spans(text, lo, self.timing, self.budget)
+        out: list[list[tuple[int, int]]] = [[] for _ in self.rules]
+        if self._keywords is not None:
+            kw_lo = [lo[i] for i in self._keyword_idx] if lo is not None else None
+            for i, found in zip(self._keyword_idx, self._keywords.find(text, kw_lo)):
+                out[i] = found
+        for i in self._candidate_idx(text):
+            pos = lo[i] if lo is not None else 0
+            out[i] = [m.span() for m in self.rules[i].pattern.finditer(text, pos)]
+        return out
+
+    def _guarded_spans(self, text: str, lo, timing: dict[str, float] | None, budget):
+        """
+        spans(), adding the time each pass takes to `timing` and running each
+        regex pass within `budget` (a stopped rule reports no further spans).
+        """
+        clock = time.perf_counter
+        out: list[list[tuple[int, int]]] = [[] for _ in self.rules]
+        if self._keywords is not None:
+            t0 = clock()
+            kw_lo = [lo[i] for i in self._keyword_idx] if lo is not None else None
+            for i, found in zip(self._keyword_idx, self._keywords.find(text, kw_lo)):
+                out[i] = found
+            if timing is not None:
+                timing["(keywords)"] = timing.get("(keywords)", 0.0) + clock() - t0
+        t0 = clock()
+        candidates = self._candidate_idx(text)
+        if timing is not None:
+            timing["(prefilter)"] = timing.get("(prefilter)", 0.0) + clock() - t0
+        for i in candidates:
+            pattern, rid = self.rules[i].pattern, self.rules[i].id
+            pos = lo[i] if lo is not None else 0
+            t0 = clock()
+            if budget is None:
+                out[i] = [m.span() for m in pattern.finditer(text, pos)]
+            else:
+                out[i] = budget.run(rid, lambda: [m.span() for m in pattern.finditer(text, pos)])
+                out[i] = out[i] or []
+            if timing is not None:
+                timing[rid] = timing.get(rid, 0.0) + clock() - t0
+        return out
+
+    def find(self, text: str) -> FindingBatch:
+        """Findings of every rule, rule by rule, as a compact batch (snippets built on access)."""
+        batch = FindingBatch(self.meta, text)
+        for i, found in enumerate(self.spans(text)):
+            if found:
+                batch.extend_spans(i, found)
+        return batch
+
+    def scan(self, text: str) -> Iterable[dict]:
+        yield from self.find(text)
+
+    def window_spans(
+        self, text: str, offset: int, lo: int, owned_hi: int, resume: Sequence[int] | None = None
+    ) -> list[list[tuple[int, int]]]:
+        """
+        Per rule, spans (in document coordinates) of matches starting in
+        [lo, owned_hi). `text` is the document slice starting at `offset`; it
+        must reach max width past owned_hi (or the document end) and carry a
+        little context before lo for lookbehinds and word boundaries.
+        """
+        start_at = [max(lo, r) - offset for r in resume] if resume else [lo - offset] * len(self)
+        out = []
+        for found in self.spans(text, start_at):
+            kept = []
+            for s, e in found:
+                if s + offset >= owned_hi:
+                    break
+                kept.append((s + offset, e + offset))
+            out.append(kept)
+        return out
+
+    def _chunk_windows(self, n: int, chunks: Sequence[tuple[int, int]]):
+        """
+        (slice_start, slice_end, lo, owned_hi) per chunk; chunk k owns up to
+        chunk k+1, and the last chunk also owns empty matches at the text end.
+        """
+        reach = max(self.widths, default=0)
+        starts = [c[0] for c in chunks] or [0]
+        out = []
+        for k, lo in enumerate(starts):
+            owned_hi = starts[k + 1] if k + 1 < len(starts) else n + 1
+            if owned_hi <= lo:
+                continue
+            out.append((max(0, lo - SNIPPET_CONTEXT), min(n, owned_hi + reach), lo, owned_hi))
+        return out
+
+    def scan_chunked(
+        self, text: str, chunks: Sequence[tuple[int, int]], executor=None, batch: int = 32
+    ) -> FindingBatch:
+        """
+        Scan `text` chunk by chunk (chunks are (start, end) spans, overlapping
+        as chunk_text produces them). Each chunk owns the matches that start
+        before the next chunk does and is scanned max-rule-width past that
+        point, so matches crossing a boundary are caught once and overlap
+        duplicates never arise. If a chunk's first match overlaps the previous
+        chunk's last one for that rule, that rule is re-scanned from where the
+        previous match ended. Findings equal `scan(text)`, as a FindingBatch,
+        as long as no match is longer than its rule's assumed width (see
+        max_match_width: unbounded repeats count as UNBOUNDED_REPEAT, capped at
+        MAX_MATCH_WIDTH); a longer match is cut at the end of the text a chunk
+        is scanned on. Empty matches count too, at chunk edges and the text end.
+
+        With an `executor` (thread or process pool), batches of chunk slices
+        are scanned in parallel. A pool from `ruleset_pool(self, ...)` already
+        holds the RuleSet; any other process pool is sent it with each batch.
+        Under a `budget`, a pool process accounts each batch on its own and
+        the rules it stopped are added to this process's budget.
+        """
+        windows = self._chunk_windows(len(text), chunks)
+        batches = [windows[i : i + batch] for i in range(0, len(windows), batch)]
+        if executor is None:
+            results = [
+                _scan_batch(self, [(text[a:b], a, lo, hi) for a, b, lo, hi in w]) for w in batches
+            ]
+        elif getattr(executor, "ruleset", None) is self:
+            results = list(
+                executor.map(
+                    _scan_pooled,
+                    [[(text[a:b], a, lo, hi) for a, b, lo, hi in w] for w in batches],
+                    [self.budget] * len(batches),
+                )
+            )
+        else:
+            results = list(
+                executor.map(
+                    _scan_batch,
+                    [self] * len(batches),
+                    [[(text[a:b], a, lo, hi) for a, b, lo, hi in w] for w in batches],
+                )
+            )
+        per_window = []
+        for spans, stopped in results:
+            per_window += spans
+            if stopped and self.budget is not None:
+                for rid, ms in stopped.items():
+                    self.budget.stopped.setdefault(rid, ms)
+
+        out = FindingBatch(self.meta, text)
+        for i in range(len(self.rules)):
+            last_end = 0
+            for (a, b, lo, owned_hi), spans in zip(windows, per_window):
+                found = spans[i]
+                if found and found[0][0] < last_end:
+                    # Started inside the previous chunk's match: resume where a full scan would
+                    resume = [owned_hi] * len(self)
+                    resume[i] = last_end
+                    found = self.window_spans(text[a:b], a, lo, owned_hi, resume)[i]
+                for start, end in found:
+                    out.append(i, start, end)
+                if found:
+                    last_end = found[-1][1]
+        return out
+
+    def scan_segments(
+        self, segments: Iterable[tuple[int | None, str]], min_window: int = MIN_WINDOW
+    ) -> FindingBatch:
+        """
+        Scan a stream of (page, text) segments without holding the whole
+        document. Segments are concatenated into a sliding window that keeps
+        `max width + snippet context` characters of overlap, so matches that
+        cross a page break are still found. A match is only accepted once the
+        window extends far enough past it to fix its extent and snippet; rules
+        resume where they left off, which keeps offsets, snippets and order the
+        same as `scan` over the joined text (rules wider than MAX_MATCH_WIDTH
+        excepted). Each finding also records the `page` its match starts on.
+        The batch keeps only the text around matches for their snippets.
+        """
+        carry = max(self.widths, default=0) + 2 * SNIPPET_CONTEXT
+        resume = [0] * len(self.rules)
+        found: list[tuple[int, int, int, int | None]] = []  # (rule, start, end, page)
+        pieces: list[tuple[int, str]] = []  # (global offset, text) around each match
+        buf, base = "", 0
+        pages: list[tuple[int, int | None]] = []  # (global offset, page) overlapping buf
+
+        def page_at(offset: int):
+            if not pages:
+                return None  # empty document
+            return pages[bisect_right(pages, offset, key=lambda p: p[0]) - 1][1]
+
+        def scan_window(final: bool) -> None:
+            lo = [max(0, r - base) for r in resume]
+            for i, spans in enumerate(self.spans(buf, lo)):
+                settle = len(buf) + 1 if final else len(buf) - self.widths[i] - SNIPPET_CONTEXT
+                for start, end in spans:
+                    if start >= settle:
+                        break  # may still grow (or move) once more text arrives
+                    at = max(0, start - SNIPPET_CONTEXT)
+                    pieces.append((base + at, buf[at : end + SNIPPET_CONTEXT]))
+                    found.append((i, base + start, base + end, page_at(base + start)))
+                    resume[i] = base + end
+                resume[i] = max(resume[i], base + settle)
+
+        for page, seg in segments:
+            if not seg:
+                continue
+            pages.append((base + len(buf), page))
+            buf += seg
+            if len(buf) < carry + min_window:
+                continue
+            scan_window(final=False)
+            cut = len(buf) - carry
+            buf, base = buf[cut:], base + cut
+            while len(pages) > 1 and pages[1][0] <= base:
+                pages.pop(0)
+        scan_window(final=True)  # also for an empty document: empty matches at 0
+
+        found.sort(key=lambda t: t[0])  # stable: per rule, matches stay in text order
+        batch = FindingBatch(self.meta)
+        batch.sources[0] = SnippetSource.of_pieces(pieces)
+        for i, start, end, page in found:
+            batch.append(i, start, end, page)
+        return batch
+
+
+def _scan_batch(ruleset: RuleSet, windows) -> tuple[list, dict[str, float]]:
+    """
+    Pool task: spans for a batch of (slice, offset, lo, owned_hi) chunk
+    windows, plus the rules the batch's budget stopped (rule id -> ms).
+    """
+    budget = ruleset.budget
+    if budget is None or budget.active:  # none, or already accounted by the caller
+        return [ruleset.window_spans(sl, offset, lo, hi) for sl, offset, lo, hi in windows], {}
+    with budget.document():  # a pool process's copy: this batch is its document
+        spans = [ruleset.window_spans(sl, offset, lo, hi) for sl, offset, lo, hi in windows]
+    return spans, budget.stopped
+
+
+# The RuleSet a ruleset_pool worker was started with
+_pool_ruleset: RuleSet | None = None
+
+
+def _init_pool_worker(ruleset: RuleSet) -> None:
+    global _pool_ruleset
+    _pool_ruleset = ruleset
+
+
+def _scan_pooled(windows, budget) -> tuple[list, dict[str, float]]:
+    """Pool task of a ruleset_pool: _scan_batch on the worker's RuleSet under a copy of `budget`."""
+    ruleset = _pool_ruleset
+    ruleset.timing, ruleset.budget = None, budget
+    try:
+        return _scan_batch(ruleset, windows)
+    finally:
+        ruleset.budget = None
+
+
+def ruleset_pool(ruleset: RuleSet, workers: int):
+    """
+    A process pool for `ruleset.scan_chunked`: the RuleSet (keyword automaton
+    included) is sent to each worker once, by the initializer, instead of
+    with every batch of chunks.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_pool_worker, initargs=(ruleset,)
+    )
+    pool.ruleset = ruleset
+    return pool
+
+
+def compile_rules(rules) -> RuleSet:
+    return rules if isinstance(rules, RuleSet) else RuleSet(rules)
+
+
 def scan_chunks(text: str, rules: list[Rule]) -> Iterable[dict]:
-    for r in rules:
-        for m in r.pattern.finditer(text):
-            start, end = m.span()
-            snippet = text[max(0, start - 80) : min(len(text), end + 80)]
-            yield {
-                "rule_id": r.id,
-                "label": r.label,
-                "severity": r.severity,
-                "start": start,
-                "end": end,
-                "snippet": snippet.replace("\n", " "),
-            }
+    yield from compile_rules(rules).scan(text)
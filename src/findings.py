@@ -0,0 +1,315 @@
+# src/findings.py
+# Tags: #ccengine
+#
+# Compact findings. A FindingBatch keeps one row per match in parallel arrays
+# (rule index, start, end, doc index, plus page and raw offsets when known)
+# and only builds the finding dicts everything downstream reads (rule_id,
+# label, severity, start, end, snippet, ...) when a row is accessed, i.e. when
+# findings are written or displayed. Counting rules or carrying a run's
+# findings around costs a few bytes per finding instead of a dict and a
+# snippet string each.
+#
+# Snippets are cut from the document text while the batch holds it;
+# `detach()` (and pickling, when a worker hands a batch back) keeps only the
+# text around the matches. Findings that arrive as dicts (AI answers,
+# scan-budget markers, cached findings) are stored as they are, in order with
+# the compact rows.
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+
+SNIPPET_CONTEXT = 80
+
+NO_PAGE = -2  # `page` column: the row has no page key
+NULL_PAGE = -1  # ...the row's page is None
+NO_OFFSET = -1  # raw offset columns: the row has none
+STORED = -1  # rule column: the row is a stored dict
+
+RuleMeta = tuple[str, str, str]  # (rule_id, label, severity)
+_META_FIELDS = {"rule_id": 0, "label": 1, "severity": 2}
+
+
+class SnippetSource:
+    """Document text (or the pieces of it around matches) that snippets are cut from."""
+
+    __slots__ = ("starts", "texts", "whole")
+
+    def __init__(self, starts: list[int], texts: list[str], whole: bool = False):
+        self.starts = starts
+        self.texts = texts
+        self.whole = whole
+
+    @classmethod
+    def of_text(cls, text: str) -> "SnippetSource":
+        return cls([0], [text], whole=True)
+
+    @classmethod
+    def of_pieces(cls, pieces: Iterable[tuple[int, str]]) -> "SnippetSource":
+        """Merge (offset, text) pieces of one document; overlapping pieces must agree."""
+        starts: list[int] = []
+        parts: list[list[str]] = []  # per merged piece, the texts it is joined from
+        end = -1
+        for at, piece in sorted(pieces, key=lambda p: p[0]):
+            if starts and at <= end:
+                if at + len(piece) > end:
+                    parts[-1].append(piece[end - at :])
+                    end = at + len(piece)
+                continue
+            starts.append(at)
+            parts.append([piece])
+            end = at + len(piece)
+        return cls(starts, ["".join(p) for p in parts])
+
+    def snippet(self, start: int, end: int) -> str:
+        """The text around [start, end), newlines as spaces (as engine.make_finding cuts it)."""
+        lo = max(0, start - SNIPPET_CONTEXT)
+        k = bisect_right(self.starts, lo) - 1 if len(self.starts) > 1 else 0
+        base = self.starts[k]
+        return self.texts[k][lo - base : end + SNIPPET_CONTEXT - base].replace("\n", " ")
+
+
+class FindingBatch(Sequence):
+    """
+    Findings as parallel arrays; `batch[i]` and iteration yield finding dicts
+    (equal to engine.make_finding's, plus `page`, `raw_start`/`raw_end` and
+    `doc` where known). Rows are built on every access, so changes made to a
+    yielded dict are not kept: name the document with `set_doc()`. Stored
+    dicts are the exception and are returned as they are.
+    """
+
+    __slots__ = (
+        "meta",
+        "rule",
+        "start",
+        "end",
+        "doc",
+        "page",
+        "raw_start",
+        "raw_end",
+        "docs",
+        "sources",
+        "stored",
+    )
+
+    def __init__(self, meta: Sequence[RuleMeta], text: str | None = None, doc: str | None = None):
+        self.meta = meta
+        self.rule = array("i")
+        self.start = array("q")
+        self.end = array("q")
+        self.doc = array("i")
+        self.page: array | None = None  # created by the first row with a page
+        self.raw_start: array | None = None
+        self.raw_end: array | None = None
+        self.docs: list[str | None] = [doc]
+        self.sources = [SnippetSource.of_text(text) if text is not None else SnippetSource([], [])]
+        self.stored: dict[int, dict] = {}  # row -> finding dict kept as given
+
+    @classmethod
+    def of_rows(cls, rows: Iterable[dict], doc: str | None = None) -> "FindingBatch":
+        """A batch of stored finding dicts (AI answers, cached findings)."""
+        batch = cls([])
+        batch.extend(rows)
+        if doc is not None:
+            batch.set_doc(doc)
+        return batch
+
+    # ---- building ----
+    def append(self, rule: int, start: int, end: int, page: int | None = NO_PAGE) -> None:
+        if page != NO_PAGE:
+            if self.page is None:
+                self.page = array("i", [NO_PAGE]) * len(self.rule)
+            self.page.append(NULL_PAGE if page is None else page)
+        elif self.page is not None:
+            self.page.append(NO_PAGE)
+        self.rule.append(rule)
+        self.start.append(start)
+        self.end.append(end)
+        self.doc.append(0)
+
+    def extend_spans(self, rule: int, spans: Sequence[tuple[int, int]]) -> None:
+        """Append one rule's (start, end) spans, without pages."""
+        if self.page is not None:
+            self.page.extend(array("i", [NO_PAGE]) * len(spans))
+        self.rule.extend(array("i", [rule]) * len(spans))
+        self.start.extend([s for s, _ in spans])
+        self.end.extend([e for _, e in spans])
+        self.doc.extend(array("i", [0]) * len(spans))
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        """Append finding dicts as stored rows."""
+        for row in rows:
+            self.stored[len(self.rule)] = row
+            self.append(STORED, row.get("start") or 0, row.get("end") or 0)
+
+    def set_doc(self, name: str) -> None:
+        """Name the document of a single-document batch (the `doc` of every row)."""
+        self.docs = [name]
+        for row in self.stored.values():
+            row["doc"] = name
+
+    def set_raw_offsets(self, raw_start: Iterable[int], raw_end: Iterable[int]) -> None:
+        self.raw_start = array("q", raw_start)
+        self.raw_end = array("q", raw_end)
+
+    def detach(self) -> "FindingBatch":
+        """
+        Keep only the text the snippets need instead of whole documents. A
+        document whose snippet windows could cover all of it is kept as is:
+        the pieces would add up to about the same text.
+        """
+        for d, source in enumerate(self.sources):
+            if not source.whole:
+                continue
+            text = source.texts[0]
+            rows = len(self.rule) if len(self.sources) == 1 else self.doc.count(d)
+            if rows * 2 * SNIPPET_CONTEXT >= len(text):
+                source.whole = False
+                continue
+            spans = sorted(
+                (max(0, s - SNIPPET_CONTEXT), e + SNIPPET_CONTEXT)
+                for r, s, e, di in zip(self.rule, self.start, self.end, self.doc)
+                if di == d and r != STORED
+            )
+            merged: list[list[int]] = []
+            for lo, hi in spans:
+                if merged and lo <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], hi)
+                else:
+                    merged.append([lo, hi])
+            self.sources[d] = SnippetSource(
+                [lo for lo, _ in merged], [text[lo:hi] for lo, hi in merged]
+            )
+        return self
+
+    def __getstate__(self):
+        self.detach()  # don't ship whole documents between processes
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @classmethod
+    def concat(cls, batches: Iterable["FindingBatch"]) -> "FindingBatch":
+        """All rows of `batches`, in order; each keeps its documents."""
+        out = cls([])
+        out.docs, out.sources = [], []
+        index: dict[RuleMeta, int] = {}
+        for b in batches:
+            remap = [index.setdefault(tuple(m), len(index)) for m in b.meta]
+            n, docs = len(out.rule), len(out.docs)
+            out.rule.extend(remap[r] if r != STORED else STORED for r in b.rule)
+            out.start.extend(b.start)
+            out.end.extend(b.end)
+            out.doc.extend(d + docs for d in b.doc)
+            for name, fill in (("page", NO_PAGE), ("raw_start", NO_OFFSET), ("raw_end", NO_OFFSET)):
+                column, part = getattr(out, name), getattr(b, name)
+                if part is None and column is None:
+                    continue
+                if column is None:
+                    column = array(part.typecode, [fill]) * n
+                    setattr(out, name, column)
+                column.extend(part if part is not None else array(column.typecode, [fill]) * len(b))
+            out.docs += b.docs
+            out.sources += b.sources
+            out.stored.update((n + i, row) for i, row in b.stored.items())
+        out.meta = list(index)
+        return out
+
+    # ---- reading ----
+    def __len__(self) -> int:
+        return len(self.rule)
+
+    def row(self, i: int) -> dict:
+        r = self.rule[i]
+        if r == STORED:
+            return self.stored[i]
+        rule_id, label, severity = self.meta[r]
+        start, end, d = self.start[i], self.end[i], self.doc[i]
+        f = {
+            "rule_id": rule_id,
+            "label": label,
+            "severity": severity,
+            "start": start,
+            "end": end,
+            "snippet": self.sources[d].snippet(start, end),
+        }
+        if self.page is not None and self.page[i] != NO_PAGE:
+            f["page"] = None if self.page[i] == NULL_PAGE else self.page[i]
+        if self.raw_start is not None and self.raw_start[i] != NO_OFFSET:
+            f["raw_start"], f["raw_end"] = self.raw_start[i], self.raw_end[i]
+        if self.docs[d] is not None:
+            f["doc"] = self.docs[d]
+        return f
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("finding index out of range")
+        return self.row(i)
+
+    def __iter__(self) -> Iterator[dict]:
+        if self.page is not None or self.raw_start is not None:
+            for i in range(len(self.rule)):
+                yield self.row(i)
+            return
+        # row() inlined for the common case (no page or raw offset columns)
+        meta, docs, sources, stored = self.meta, self.docs, self.sources, self.stored
+        for i, (r, start, end, d) in enumerate(zip(self.rule, self.start, self.end, self.doc)):
+            if r == STORED:
+                yield stored[i]
+                continue
+            rule_id, label, severity = meta[r]
+            f = {
+                "rule_id": rule_id,
+                "label": label,
+                "severity": severity,
+                "start": start,
+                "end": end,
+                "snippet": sources[d].snippet(start, end),
+            }
+            if docs[d] is not None:
+                f["doc"] = docs[d]
+            yield f
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (FindingBatch, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"FindingBatch({len(self)} findings, {len(self.docs)} docs)"
+
+    def rule_ids(self) -> Iterator[str]:
+        """Each row's rule_id, without building the rows."""
+        return (r[0] for r in self.fields("rule_id"))
+
+    def fields(self, *names: str) -> Iterator[tuple]:
+        """
+        Tuples of the named fields per row (None where a row has no such
+        field); snippets are only built when asked for.
+        """
+        for i, r in enumerate(self.rule):
+            if r == STORED:
+                row = self.stored[i]
+                yield tuple(row.get(n) for n in names)
+            else:
+                yield tuple(self._field(i, r, n) for n in names)
+
+    def _field(self, i: int, r: int, name: str):
+        if name in _META_FIELDS:
+            return self.meta[r][_META_FIELDS[name]]
+        if name == "start" or name == "end":
+            return getattr(self, name)[i]
+        if name == "doc":
+            return self.docs[self.doc[i]]
+        if name in ("snippet", "page", "raw_start", "raw_end"):
+            return self.row(i).get(name)
+        return None
@@ -0,0 +1,148 @@
+# src/hints.py
+# Tags: #ccai #ccrules
+#
+# Keyword hints for the AI layer, one rules/hints/<regime>.yml per regime:
+# named term groups (plus extra `conditions`), the heuristic findings they
+# imply, and the model prompt. Every group and condition is a KeywordRule
+# without word boundaries in one shared Aho-Corasick automaton, so a document
+# is matched in a single pass however many terms the lists grow to, and each
+# match comes back as a (start, end) span.
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+import os
+
+from src.keywords import KeywordMatcher, KeywordRule
+from src.rulesets import RULES_DIR
+
+HINTS_DIR = RULES_DIR / "hints"
+
+Spans = dict[str, list[tuple[int, int]]]  # group/condition name -> spans that fired
+
+
+@dataclass(frozen=True)
+class HintFinding:
+    id: str
+    label: str
+    severity: str
+    requires: tuple[str, ...]  # groups that must all fire
+    confidence: float
+    rationale: str = ""
+    # (if, unless, confidence): `if` fired and `unless` didn't -> lower confidence
+    downgrade: tuple[str, str | None, float] | None = None
+
+
+class HintSet:
+    """One regime's hints, compiled into a single matcher."""
+
+    def __init__(
+        self,
+        groups: dict[str, Sequence[str]],
+        conditions: dict[str, Sequence[str]] | None = None,
+        findings: Sequence[HintFinding] = (),
+        prompt: str | None = None,
+    ):
+        self.groups = list(groups)
+        self.findings = list(findings)
+        self.prompt = prompt
+        named = {**(conditions or {}), **groups}
+        for f in self.findings:
+            needed = set(f.requires) | set(f.downgrade[:2] if f.downgrade else ())
+            unknown = needed - set(named) - {None}
+            if unknown:
+                raise ValueError(f"Hint finding {f.id} refers to unknown groups {sorted(unknown)}")
+        self.names = [name for name, terms in named.items() if terms]
+        self.matcher = KeywordMatcher(
+            [KeywordRule(name, name, "info", named[name], whole_word=False) for name in self.names]
+        )
+
+    def match(self, text: str) -> Spans:
+        """Spans per group/condition that fired (names that didn't are absent)."""
+        if not self.names:
+            return {}
+        return {n: spans for n, spans in zip(self.names, self.matcher.find(text)) if spans}
+
+    def _within(self, spans: Spans, start: int, end: int):
+        """(group, matches) for the group matches lying entirely inside [start, end)."""
+        for name in self.groups:
+            found = spans.get(name, ())
+            lo, hi = bisect_left(found, (start,)), bisect_left(found, (end,))
+            yield name, [se for se in found[lo:hi] if se[1] <= end]
+
+    def relevance(self, spans: Spans, start: int, end: int) -> tuple[int, int]:
+        """(groups, occurrences) of the group matches inside [start, end)."""
+        inside = [len(m) for _, m in self._within(spans, start, end)]
+        return sum(n > 0 for n in inside), sum(inside)
+
+    def first(self, spans: Spans, start: int, end: int) -> int | None:
+        """Offset of the first group match inside [start, end)."""
+        return min((m[0][0] for _, m in self._within(spans, start, end) if m), default=None)
+
+    def classify(self, spans: Spans) -> list[tuple[HintFinding, float, list[tuple[int, int]]]]:
+        """
+        (finding, confidence, evidence) for each finding whose groups all fired;
+        the evidence is each required group's first span, in document order.
+        """
+        out = []
+        for f in self.findings:
+            if not all(g in spans for g in f.requires):
+                continue
+            confidence = f.confidence
+            if f.downgrade is not None:
+                when, unless, lowered = f.downgrade
+                if when in spans and (unless is None or unless not in spans):
+                    confidence = lowered
+            out.append((f, confidence, sorted(spans[g][0] for g in f.requires)))
+        return out
+
+
+def _terms(groups: dict | None) -> dict[str, list[str]]:
+    return {name: [str(t) for t in terms or []] for name, terms in (groups or {}).items()}
+
+
+def hints_from_spec(data: dict) -> HintSet:
+    findings = []
+    for spec in data.get("findings") or []:
+        down = spec.get("downgrade")
+        findings.append(
+            HintFinding(
+                id=spec["id"],
+                label=spec["label"],
+                severity=spec.get("severity", "low"),
+                requires=tuple(spec.get("requires") or ()),
+                confidence=float(spec.get("confidence", 0.5)),
+                rationale=" ".join(str(spec.get("rationale", "")).split()),
+                downgrade=(
+                    (down["if"], down.get("unless"), float(down["confidence"])) if down else None
+                ),
+            )
+        )
+    return HintSet(
+        _terms(data.get("groups")),
+        _terms(data.get("conditions")),
+        findings,
+        data.get("prompt"),
+    )
+
+
+_memo: dict[str, tuple[int, HintSet]] = {}  # path -> (mtime_ns, hints)
+
+
+def load_hints(regime: str, hints_dir: Path = HINTS_DIR) -> HintSet:
+    """The regime's hints (reloaded when the file changes); empty if it has none."""
+    path = hints_dir / f"{regime.lower()}.yml"
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return HintSet({})
+    hit = _memo.get(str(path))
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    import yaml
+
+    hints = hints_from_spec(yaml.safe_load(path.read_text(encoding="utf-8")) or {})
+    _memo[str(path)] = (mtime, hints)
+    return hints
@@ -0,0 +1,205 @@
+# src/keywords.py
+# Tags: #ccengine #ccrules
+#
+# Dictionary ("keyword") rules compiled into one Aho-Corasick automaton.
+# Matching is a single linear pass over the document no matter how many terms
+# (or keyword rules) are loaded; a regex alternation stops scaling after a few
+# thousand terms.
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+KEYWORD_TYPES = {"keyword", "dictionary"}
+
+
+class KeywordRule:
+    __slots__ = ("id", "label", "severity", "terms", "case_sensitive", "whole_word")
+
+    def __init__(
+        self,
+        id: str,
+        label: str,
+        severity: str,
+        terms: Sequence[str],
+        case_sensitive: bool = False,
+        whole_word: bool = True,
+    ):
+        self.id = id
+        self.label = label
+        self.severity = severity
+        self.terms = tuple(terms)
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+
+    @property
+    def max_width(self) -> int:
+        return max((len(t) for t in self.terms), default=0)
+
+
+def read_terms_file(path: Path) -> list[str]:
+    """One term per line; blank lines and `#` comments are ignored."""
+    out: list[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            out.append(line)
+    return out
+
+
+def keyword_rule_from_spec(spec: dict, base_dir: Path) -> KeywordRule:
+    """
+    Build a KeywordRule from a rules/*.yml entry:
+
+        - id: SOC2-VENDORS
+          label: Named Vendor
+          type: dictionary          # or: keyword
+          terms: [Acme Cloud, ...]  # inline terms, and/or
+          terms_file: vendors.txt   # one per line, relative to the YAML file
+          case_sensitive: false     # default
+          whole_word: true          # default
+    """
+    terms = list(spec.get("terms") or [])
+    if spec.get("terms_file"):
+        terms.extend(read_terms_file(base_dir / spec["terms_file"]))
+    terms = [str(t) for t in terms if str(t).strip()]
+    if not terms:
+        raise ValueError(f"Keyword rule {spec.get('id')} has no terms")
+    return KeywordRule(
+        spec["id"],
+        spec["label"],
+        spec.get("severity", "info"),
+        terms,
+        case_sensitive=bool(spec.get("case_sensitive", False)),
+        whole_word=bool(spec.get("whole_word", True)),
+    )
+
+
+def _fold(text: str) -> str:
+    """Lower-case without changing string length, so offsets stay valid."""
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class Automaton:
+    """Aho-Corasick automaton over (term, tag) pairs."""
+
+    def __init__(self, entries: Iterable[tuple[str, int]]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.depth: list[int] = [0]
+        self.out: list[tuple[int, ...]] = [()]
+        for term, tag in entries:
+            s = 0
+            for ch in term:
+                nxt = self.goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[s][ch] = nxt
+                    self.goto.append({})
+                    self.depth.append(self.depth[s] + 1)
+                    self.out.append(())
+                s = nxt
+            if tag not in self.out[s]:
+                self.out[s] += (tag,)
+        self._link()
+
+    def _link(self) -> None:
+        n = len(self.goto)
+        self.fail = [0] * n
+        self.dict_link = [0] * n  # nearest proper suffix state that emits something
+        queue = deque(self.goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in self.goto[s].items():
+                f = self.fail[s]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[t] = self.goto[f].get(ch, 0)
+                ft = self.fail[t]
+                self.dict_link[t] = ft if self.out[ft] else self.dict_link[ft]
+                queue.append(t)
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    def iter_matches(self, text: str) -> Iterable[tuple[int, int, int]]:
+        """Yield (start, end, tag) for every occurrence, overlapping ones included."""
+        goto, fail, out, depth, dict_link = (
+            self.goto,
+            self.fail,
+            self.out,
+            self.depth,
+            self.dict_link,
+        )
+        s = 0
+        for i, ch in enumerate(text):
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            e = s if out[s] else dict_link[s]
+            while e:
+                end = i + 1
+                start = end - depth[e]
+                for tag in out[e]:
+                    yield start, end, tag
+                e = dict_link[e]
+
+
+class KeywordMatcher:
+    """All keyword rules of a ruleset, sharing one automaton per case mode."""
+
+    def __init__(self, rules: Sequence[KeywordRule]):
+        self.rules = list(rules)
+        folded, exact = [], []
+        for idx, r in enumerate(self.rules):
+            for term in r.terms:
+                if r.case_sensitive:
+                    exact.append((term, idx))
+                else:
+                    folded.append((_fold(term), idx))
+        self._folded = Automaton(folded) if folded else None
+        self._exact = Automaton(exact) if exact else None
+
+    def find(
+        self, text: str, min_start: Sequence[int] | None = None
+    ) -> list[list[tuple[int, int]]]:
+        """
+        Per rule (same order as `rules`), the leftmost-longest non-overlapping
+        matches, mirroring what `finditer` would report for an alternation.
+        With `min_start`, rule k ignores matches starting before min_start[k].
+        """
+        raw: list[list[tuple[int, int]]] = [[] for _ in self.rules]
+        if self._folded is not None:
+            for start, end, idx in self._folded.iter_matches(_fold(text)):
+                raw[idx].append((start, end))
+        if self._exact is not None:
+            for start, end, idx in self._exact.iter_matches(text):
+                raw[idx].append((start, end))
+
+        n = len(text)
+        out: list[list[tuple[int, int]]] = []
+        for k, (r, spans) in enumerate(zip(self.rules, raw)):
+            if min_start is not None and min_start[k]:
+                spans = [(s, e) for s, e in spans if s >= min_start[k]]
+            if r.whole_word:
+                spans = [
+                    (s, e)
+                    for s, e in spans
+                    if (s == 0 or not _is_word(text[s - 1])) and (e == n or not _is_word(text[e]))
+                ]
+            spans.sort(key=lambda se: (se[0], -se[1]))
+            picked: list[tuple[int, int]] = []
+            last_end = -1
+            for s, e in spans:
+                if s >= last_end:
+                    picked.append((s, e))
+                    last_end = e
+            out.append(picked)
+        return out
@@ -0,0 +1,231 @@
+# src/llm_client.py
+# Tags: #ccai #ccengine
+#
+# Transport for the AI layer: one pooled HTTP session per process against an
+# OpenAI-compatible `/chat/completions` endpoint (OPENAI_BASE_URL), retried
+# with exponential backoff on rate limits, server errors and dropped
+# connections, plus an asyncio stage that keeps up to `concurrency` requests
+# in flight under a requests/tokens-per-minute budget while the caller's
+# thread carries on scanning.
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import os
+import threading
+import time
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a compliance assistant. Answer in strict JSON."
+MAX_COMPLETION_TOKENS = 400
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class LLMSettings:
+    api_key: str
+    base_url: str = DEFAULT_BASE_URL
+    model: str = DEFAULT_MODEL
+    concurrency: int = 4  # requests in flight
+    rpm: int = 60  # requests per minute
+    tpm: int = 60_000  # prompt + completion tokens per minute (estimated)
+    timeout: float = 60.0
+    max_attempts: int = 5
+
+    @classmethod
+    def from_env(cls, **overrides) -> "LLMSettings | None":
+        """Settings from OPENAI_API_KEY / OPENAI_BASE_URL / OPENAI_MODEL; None without a key."""
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        settings = cls(
+            api_key=api_key,
+            base_url=os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL,
+            model=os.getenv("OPENAI_MODEL") or DEFAULT_MODEL,
+        )
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(settings, name, value)
+        return settings
+
+
+class LLMError(Exception):
+    """The endpoint failed for good (or answered something unusable)."""
+
+
+class RetryableError(LLMError):
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough budget for one call: ~4 characters per prompt token plus the completion cap."""
+    return len(prompt) // 4 + MAX_COMPLETION_TOKENS
+
+
+class ChatClient:
+    """Blocking chat-completions client sharing one connection pool."""
+
+    def __init__(self, settings: LLMSettings):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.settings = settings
+        self.url = settings.base_url.rstrip("/") + "/chat/completions"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, settings.concurrency))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {settings.api_key}"
+        self.requests = 0  # HTTP attempts, retries included
+        self.retries = 0
+
+    def _post(self, prompt: str) -> str:
+        import requests
+
+        self.requests += 1
+        try:
+            resp = self.session.post(
+                self.url,
+                json={
+                    "model": self.settings.model,
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    "temperature": 0.1,
+                    "max_tokens": MAX_COMPLETION_TOKENS,
+                },
+                timeout=self.settings.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
+        if resp.status_code in RETRY_STATUS:
+            retry_after = resp.headers.get("Retry-After")
+            raise RetryableError(
+                f"HTTP {resp.status_code}",
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if resp.status_code != 200:
+            raise LLMError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+        try:
+            return resp.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"unexpected response: {e!r}") from e
+
+    def _wait(self, state) -> float:
+        self.retries += 1
+        error = state.outcome.exception()
+        if isinstance(error, RetryableError) and error.retry_after is not None:
+            return min(error.retry_after, 60.0)
+        return self._backoff(state)
+
+    def complete(self, prompt: str) -> str:
+        """The assistant message for `prompt`, retrying transient failures with backoff."""
+        from tenacity import (
+            Retrying,
+            retry_if_exception_type,
+            stop_after_attempt,
+            wait_random_exponential,
+        )
+
+        self._backoff = wait_random_exponential(multiplier=0.5, max=30)
+        retrying = Retrying(
+            retry=retry_if_exception_type(RetryableError),
+            wait=self._wait,
+            stop=stop_after_attempt(self.settings.max_attempts),
+            reraise=True,
+        )
+        return retrying(self._post, prompt)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per `period` seconds (a minute by
+    default). Each bucket holds up to one period's budget and refills
+    continuously; callers wait in arrival order.
+    """
+
+    def __init__(self, rpm: int, tpm: int, period: float = 60.0, clock=time.monotonic):
+        self.capacity = (float(rpm), float(tpm))
+        self.period = period
+        self.clock = clock
+        self.available = list(self.capacity)
+        self.updated = clock()
+        self._lock: asyncio.Lock | None = None
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed, self.updated = now - self.updated, now
+        for i, cap in enumerate(self.capacity):
+            self.available[i] = min(cap, self.available[i] + elapsed * cap / self.period)
+
+    def delay(self, tokens: int) -> float:
+        """Seconds until one request of `tokens` fits (0 = now)."""
+        self._refill()
+        need = (1.0, min(float(tokens), self.capacity[1]))
+        return max(
+            max(0.0, (n - have) * self.period / cap)
+            for n, have, cap in zip(need, self.available, self.capacity)
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while (wait := self.delay(tokens)) > 0:
+                await asyncio.sleep(wait)
+            self.available[0] -= 1.0
+            self.available[1] -= min(float(tokens), self.capacity[1])
+
+
+class AsyncChat:
+    """
+    Runs chat completions on a private event loop thread: `submit()` returns
+    at once with a Future, at most `concurrency` calls are in flight, and
+    each call first waits for the rate limiter. The blocking HTTP call itself
+    runs on the loop's thread pool, sized to the concurrency cap.
+    """
+
+    def __init__(self, settings: LLMSettings, client: ChatClient | None = None):
+        self.settings = settings
+        self.client = client or ChatClient(settings)
+        self.limiter = RateLimiter(settings.rpm, settings.tpm)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max(1, settings.concurrency), thread_name_prefix="llm-http")
+        )
+        self._semaphore: asyncio.Semaphore | None = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True)
+        self._thread.start()
+
+    async def _complete(self, prompt: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.settings.concurrency))
+        async with self._semaphore:
+            await self.limiter.acquire(estimate_tokens(prompt))
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await asyncio.to_thread(self.client.complete, prompt)
+            finally:
+                self.in_flight -= 1
+
+    def submit(self, prompt: str) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._complete(prompt), self._loop)
+
+    def close(self) -> None:
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.run_until_complete(self._loop.shutdown_default_executor())
+        self._loop.close()
+        self.client.close()
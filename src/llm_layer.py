@@ -1,13 +1,23 @@
 # src/llm_layer.py
 # Tags: #ccai #ccengine #ccproof
+from concurrent.futures import Future
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Optional
-import os, re
-from src.env import load_env, require
+import json
+from src.cache import LLMCache, LLMCacheKey, text_hash
+from src.engine import SNIPPET_CONTEXT, chunk_spans
+from src.env import load_env
+from src.hints import Spans, load_hints
+from src.llm_client import AsyncChat, ChatClient, LLMSettings
 
+# The key is looked up when the client is first needed (see LLMSettings.from_env):
+# without one the heuristics below answer, so importing this module never fails.
 load_env()
-OPENAI_API_KEY = require("OPENAI_API_KEY")
-ANTHROPIC_API_KEY = require("ANTHROPIC_API_KEY")
+
+# Part of the AI response cache key: bump whenever build_prompt() changes what
+# is asked, so stale answers are not reused.
+PROMPT_VERSION = 2
 
 
 @dataclass
@@ -17,165 +27,267 @@ class LLMFinding:
     severity: str
     confidence: float
     rationale: str
+    spans: tuple = ()  # heuristic evidence: the hint spans that fired (document offsets)
 
 
-def _heuristic_classify_gdpr(text: str) -> list[LLMFinding]:
-    """Cheap, deterministic fallback for GDPR hints when no LLM key is present."""
-    t = text.lower()
-    hints_time = any(
-        p in t for p in ["72 hours", "seventy-two hours", "three days", "undue delay", "promptly"]
-    )
-    hints_notify = any(p in t for p in ["notify", "notification", "inform", "report"])
-    hints_regulator = any(p in t for p in ["supervisory authority", "regulator", "controller"])
-    if hints_notify and hints_regulator and (hints_time or "promptly" in t):
-        conf = 0.65 if "promptly" in t and "72" not in t else 0.85
-        return [
-            LLMFinding(
-                rule_id="GDPR-BREACH-72H-IMPLICIT",
-                label="Breach Notification (timing implied)",
-                severity="medium",
-                confidence=conf,
-                rationale=(
-                    "Detected notification to regulator with implied/approximate timing "
-                    "(e.g., 'promptly'); recommend human review."
-                ),
-            )
-        ]
-    return []
-
-
-def _heuristic_classify_soc2(text: str) -> list[LLMFinding]:
-    """Cheap fallback for SOC 2 hints (access control/encryption)."""
-    t = text.lower()
-    mfa = "mfa" in t or "multi-factor" in t or "multifactor" in t
-    enc = "encryption" in t or "tls" in t or "at rest" in t or "in transit" in t
-    finds: list[LLMFinding] = []
-    if mfa:
-        finds.append(
-            LLMFinding(
-                rule_id="SOC2-ACCESS-CONTROL-IMPLICIT",
-                label="Access Controls (policy signal)",
-                severity="low",
-                confidence=0.6,
-                rationale="Mentions MFA/multi-factor; treat as supporting evidence, not a pass/fail.",
-            )
-        )
-    if enc:
-        finds.append(
-            LLMFinding(
-                rule_id="SOC2-ENCRYPTION-IMPLICIT",
-                label="Encryption (policy signal)",
-                severity="low",
-                confidence=0.6,
-                rationale="Mentions encryption/TLS; treat as supporting evidence, not a pass/fail.",
-            )
-        )
-    return finds
+PROMPT_TOKENS = 1000  # excerpt budget per prompt (~4000 characters, as before)
+TOP_K = 3  # most relevant chunks sent
+CHARS_PER_TOKEN = 4
+SNIPPET_CHARS = 200
 
 
-def _maybe_openai_client():
-    """Return a callable that takes prompt -> (label, confidence, rationale) if OPENAI_API_KEY is set, else None."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    try:
-        from openai import OpenAI  # openai>=1.0
-
-        client = OpenAI(api_key=api_key)
-
-        def _call(prompt: str) -> dict:
-            # Small, inexpensive model—adjust if desired
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a compliance assistant. Answer in strict JSON.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-            )
-            content = resp.choices[0].message.content
-            import json
-
-            return json.loads(content)
-
-        return _call
-    except Exception:
-        return None
+def heuristic_findings(regime: str, text: str, spans: Optional[Spans] = None) -> list[LLMFinding]:
+    """
+    The deterministic fallback for `regime` (no key, or the endpoint gave up):
+    the findings of rules/hints/<regime>.yml whose hint groups all fired.
+    `spans` is the document's hint match, if already computed.
+    """
+    hints = load_hints(regime)
+    if spans is None:
+        spans = hints.match(text)
+    return [
+        LLMFinding(f.id, f.label, f.severity, confidence, f.rationale, tuple(evidence))
+        for f, confidence, evidence in hints.classify(spans)
+    ]
 
 
-def analyze_text(regime: str, text: str) -> list[dict]:
+def select_chunks(
+    regime: str,
+    text: str,
+    budget_tokens: int = PROMPT_TOKENS,
+    top_k: int = TOP_K,
+    spans: Optional[Spans] = None,
+) -> list[tuple[int, int]]:
     """
-    Returns a list of dicts shaped like rule findings:
-    {rule_id, label, severity, start, end, snippet, confidence, source, rationale}
+    (start, end) spans of the chunk_spans chunks worth sending, best first: up
+    to `top_k` chunks with any hint, ranked by hint groups then occurrences
+    (earlier wins ties), within `budget_tokens`. Without any hint, the start
+    of the document. The document is matched once; chunks count its spans.
     """
-    llm = _maybe_openai_client()
-
-    # If no LLM configured, use heuristics
-    if not llm:
-        if regime.upper() == "GDPR":
-            findings = _heuristic_classify_gdpr(text)
-        elif regime.upper() == "SOC2":
-            findings = _heuristic_classify_soc2(text)
-        else:
-            findings = []
-    else:
-        # Minimal prompt—kept tight for cost/reliability.
-        if regime.upper() == "GDPR":
-            prompt = (
-                "Task: Determine if text implies GDPR breach-notification timing.\n"
-                "Return JSON with: label, rule_id, severity (low|medium|high), confidence (0-1), rationale.\n"
-                "Criteria: mentions notifying regulator/authority/controller AND mentions timing (72 hours, three days, or implied terms like 'promptly'/'undue delay').\n"
-                f"Text:\n{text[:4000]}"
-            )
-        elif regime.upper() == "SOC2":
-            prompt = (
-                "Task: Identify SOC 2-relevant policy signals for access controls or encryption.\n"
-                "Return JSON array (0-2 items), fields: label, rule_id, severity, confidence (0-1), rationale.\n"
-                f"Text:\n{text[:4000]}"
-            )
+    hints = load_hints(regime)
+    if spans is None:
+        spans = hints.match(text)
+    budget = max(1, budget_tokens) * CHARS_PER_TOKEN
+    ranked = []
+    for start, end in chunk_spans(len(text)):
+        groups, hits = hints.relevance(spans, start, end)
+        if hits:
+            ranked.append((-groups, -hits, start, end))
+    chosen: list[tuple[int, int]] = []
+    for _, _, start, end in sorted(ranked)[:top_k]:
+        if not chosen:
+            end = min(end, start + budget)  # the best chunk is always sent, clipped to fit
+        elif end - start > budget:
+            continue
+        chosen.append((start, end))
+        budget -= end - start
+    return chosen or [(0, min(len(text), budget))]
+
+
+def excerpt(text: str, spans: list[tuple[int, int]]) -> str:
+    """The spans in document order, overlapping chunks merged, gaps marked."""
+    merged: list[list[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
         else:
-            return []
-
-        try:
-            result = llm(prompt)
-            if isinstance(result, dict):
-                result = [result]
-            findings = []
-            for item in result or []:
-                findings.append(
-                    LLMFinding(
-                        rule_id=item.get("rule_id", "AI-GENERIC"),
-                        label=item.get("label", "AI Finding"),
-                        severity=item.get("severity", "low"),
-                        confidence=float(item.get("confidence", 0.5)),
-                        rationale=item.get("rationale", ""),
-                    )
-                )
-        except Exception:
-            # fall back to heuristics on any API failure
-            if regime.upper() == "GDPR":
-                findings = _heuristic_classify_gdpr(text)
-            elif regime.upper() == "SOC2":
-                findings = _heuristic_classify_soc2(text)
-            else:
-                findings = []
-
-    out: list[dict] = []
+            merged.append([start, end])
+    return "\n[...]\n".join(text[a:b] for a, b in merged)
+
+
+def build_prompt(regime: str, text: str) -> Optional[str]:
+    """The regime's prompt from its hints file plus the excerpt `text` (see
+    select_chunks); None for regimes without one."""
+    task = load_hints(regime).prompt
+    if not task:
+        return None
+    return f"{task.rstrip()}\nText (most relevant excerpts):\n{text}"
+
+
+def cache_key(regime: str, model: str, prompt: str) -> LLMCacheKey:
+    return (regime.upper(), model, PROMPT_VERSION, text_hash(prompt))
+
+
+def parse_findings(content: str) -> list[LLMFinding]:
+    """The model's JSON answer (one object or an array) as findings; raises on bad JSON."""
+    result = json.loads(content)
+    if isinstance(result, dict):
+        result = [result]
+    return [
+        LLMFinding(
+            rule_id=item.get("rule_id", "AI-GENERIC"),
+            label=item.get("label", "AI Finding"),
+            severity=item.get("severity", "low"),
+            confidence=float(item.get("confidence", 0.5)),
+            rationale=item.get("rationale", ""),
+        )
+        for item in result or []
+    ]
+
+
+def to_rows(
+    findings: List[LLMFinding], text: str, chunk: tuple[int, int], regime: str, spans: Spans
+) -> list[dict]:
+    """
+    Finding dicts located where the evidence is: heuristic findings span the
+    hints that fired, model findings point at `chunk`, the best chunk sent
+    (snippet from just before its first hint). `spans` is the hint match.
+    """
+    hints = load_hints(regime)
+    rows = []
     for f in findings:
-        out.append(
+        if f.spans:
+            start, end = f.spans[0][0], max(e for _, e in f.spans)
+            at = max(0, start - SNIPPET_CONTEXT)
+        else:
+            start, end = chunk
+            first = hints.first(spans, start, end)
+            at = start if first is None else max(start, first - SNIPPET_CONTEXT)
+        rows.append(
             {
                 "rule_id": f.rule_id,
                 "label": f.label,
                 "severity": f.severity,
-                "start": None,
-                "end": None,
-                "snippet": text[:200].replace("\n", " "),
+                "start": start,
+                "end": end,
+                "snippet": text[at : at + SNIPPET_CHARS].replace("\n", " "),
                 "confidence": round(f.confidence, 2),
                 "source": "llm",
                 "rationale": f.rationale,
             }
         )
-    return out
+    return rows
+
+
+@lru_cache(maxsize=1)
+def _shared_client() -> Optional[ChatClient]:
+    """One pooled client per process, or None without OPENAI_API_KEY."""
+    settings = LLMSettings.from_env()
+    return ChatClient(settings) if settings else None
+
+
+def analyze_text(
+    regime: str,
+    text: str,
+    cache: Optional[LLMCache] = None,
+    prompt_tokens: int = PROMPT_TOKENS,
+    top_k: int = TOP_K,
+) -> list[dict]:
+    """
+    Returns a list of dicts shaped like rule findings:
+    {rule_id, label, severity, start, end, snippet, confidence, source, rationale}
+    Only the `top_k` most relevant chunks (within `prompt_tokens`) are sent.
+    Blocking; batch runs go through EscalationStage instead. With `cache`, a
+    response stored for the same prompt and model is reused.
+    """
+    client = _shared_client()
+    fired = load_hints(regime).match(text)
+    chunks = select_chunks(regime, text, prompt_tokens, top_k, fired)
+    prompt = build_prompt(regime, excerpt(text, chunks))
+    if client is None or prompt is None:
+        return to_rows(heuristic_findings(regime, text, fired), text, chunks[0], regime, fired)
+    key = cache_key(regime, client.settings.model, prompt)
+    cached = cache.get(key) if cache is not None else None
+    try:
+        content = cached if cached is not None else client.complete(prompt)
+        findings = parse_findings(content)
+        if cache is not None and cached is None:
+            cache.put(key, content)  # only answers that parsed
+    except Exception:
+        # fall back to heuristics on any API failure
+        findings = heuristic_findings(regime, text, fired)
+    return to_rows(findings, text, chunks[0], regime, fired)
+
+
+class AIFallback(Exception):
+    """
+    The endpoint failed (or answered unreadably) and the heuristics answered
+    instead: `rows` are usable findings, but not the AI's, so callers should
+    not cache them as the AI answer.
+    """
+
+    def __init__(self, rows: list[dict], cause: BaseException):
+        super().__init__(f"endpoint failed ({cause!r}), answered by the heuristics")
+        self.rows = rows
+
+
+class EscalationStage:
+    """
+    AI escalation for a batch run. `submit()` returns immediately with a
+    Future of finding rows while the request waits for a slot, the rate
+    limiter and the endpoint on the AsyncChat loop; the caller keeps scanning.
+    Without a key every Future is already resolved with the heuristics.
+    With a `cache`, a stored answer resolves the Future without a request.
+    When the endpoint fails, the Future raises AIFallback carrying the
+    heuristic rows.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[LLMSettings] = None,
+        cache: Optional[LLMCache] = None,
+        prompt_tokens: int = PROMPT_TOKENS,
+        top_k: int = TOP_K,
+        **overrides,
+    ):
+        settings = settings or LLMSettings.from_env(**overrides)
+        self.chat = AsyncChat(settings) if settings else None
+        self.cache = cache
+        self.prompt_tokens = prompt_tokens
+        self.top_k = top_k
+        self.submitted = 0
+        self.fallbacks = 0  # answered by the heuristics after the endpoint failed
+
+    def submit(self, regime: str, text: str) -> Future:
+        self.submitted += 1
+        fired = load_hints(regime).match(text)
+        chunks = select_chunks(regime, text, self.prompt_tokens, self.top_k, fired)
+        prompt = build_prompt(regime, excerpt(text, chunks))
+        out: Future = Future()
+
+        def rows(findings: List[LLMFinding]) -> list[dict]:
+            return to_rows(findings, text, chunks[0], regime, fired)
+
+        if self.chat is None or prompt is None:
+            out.set_result(rows(heuristic_findings(regime, text, fired)))
+            return out
+
+        key = cache_key(regime, self.chat.settings.model, prompt)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                try:
+                    out.set_result(rows(parse_findings(cached)))
+                    return out
+                except Exception:
+                    pass  # unreadable entry: ask again and overwrite it
+
+        def settle(call: Future) -> None:
+            try:
+                content = call.result()
+                findings = parse_findings(content)
+                if self.cache is not None:
+                    self.cache.put(key, content)
+            except Exception as e:
+                self.fallbacks += 1
+                out.set_exception(AIFallback(rows(heuristic_findings(regime, text, fired)), e))
+                return
+            out.set_result(rows(findings))
+
+        self.chat.submit(prompt).add_done_callback(settle)
+        return out
+
+    def summary(self) -> str:
+        if self.chat is None:
+            return f"{self.submitted} docs escalated (heuristics, no OPENAI_API_KEY)"
+        client = self.chat.client
+        cached = f", {self.cache.hits} answered from cache" if self.cache is not None else ""
+        return (
+            f"{self.submitted} docs escalated{cached}, {client.requests} requests "
+            f"({client.retries} retried, {self.fallbacks} fell back to heuristics), "
+            f"peak {self.chat.peak_in_flight} in flight"
+        )
+
+    def close(self) -> None:
+        if self.chat is not None:
+            self.chat.close()
@@ -0,0 +1,149 @@
+# src/metrics.py
+# Tags: #ccengine #ccaudit
+#
+# Run instrumentation. Every scanned document reports how long it spent in
+# each stage (read = extraction or the text store, normalize, scan) and how
+# long each rule's matching took; the run adds its own per-document stages
+# (AI escalation, audit and output writes). RunMetrics turns the samples into
+# p50/p95/p99 latencies for the summary and into `run_metrics` rows for the
+# audit log. Peak memory comes from tracemalloc, which is opt-in: tracing
+# every allocation slows a run down noticeably.
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import contextmanager
+import math
+import time
+import tracemalloc
+
+STAGES = ("read", "normalize", "scan", "document", "ai", "audit", "outputs")
+TOP_RULES = 5  # slowest rules listed in the summary
+
+
+def percentile(values, p: float) -> float | None:
+    """Nearest-rank percentile of `values` (None when empty)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class RunMetrics:
+    """Timing samples of one run; `start()`/`stop()` bracket the run itself."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: dict[str, list[float]] = {}  # stage -> seconds per document
+        self.rule_seconds: Counter = Counter()  # rule id -> total match time
+        self.rule_hits: Counter = Counter()
+        self.peak_bytes: int | None = None  # largest traced peak (any process)
+        self.wall = 0.0
+        self._t0: float | None = None
+        self._tracing = False
+
+    def start(self) -> None:
+        self._t0 = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def stop(self) -> None:
+        if self._t0 is not None:
+            self.wall = time.perf_counter() - self._t0
+        if tracemalloc.is_tracing() and self.trace_memory:
+            self._peak(tracemalloc.get_traced_memory()[1])
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+    def _peak(self, nbytes: int | None) -> None:
+        if nbytes is not None and (self.peak_bytes is None or nbytes > self.peak_bytes):
+            self.peak_bytes = nbytes
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Add the duration of the `with` block as one `stage` sample."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - t0)
+
+    def add_document(self, stats: dict, rule_ids: Iterable[str]) -> None:
+        """Merge one scanned document's stats (see cc_mvp.scan_document) and findings' rule ids."""
+        for stage in ("read", "normalize", "scan"):
+            if stage in stats:
+                self.add(stage, stats[stage])
+        self.add("document", sum(stats.get(s, 0.0) for s in ("read", "normalize", "scan")))
+        self.rule_seconds.update(stats.get("rules") or {})
+        self.rule_hits.update(rule_ids)
+        self._peak(stats.get("peak_bytes"))
+
+    def stage_rows(self) -> list[tuple[str, int, float, float, float, float, float]]:
+        """(stage, documents, total, p50, p95, p99, max), milliseconds, in STAGES order."""
+        rows = []
+        order = {s: i for i, s in enumerate(STAGES)}
+        for stage in sorted(self.stages, key=lambda s: (order.get(s, len(order)), s)):
+            samples = self.stages[stage]
+            rows.append(
+                (
+                    stage,
+                    len(samples),
+                    _ms(sum(samples)),
+                    _ms(percentile(samples, 50)),
+                    _ms(percentile(samples, 95)),
+                    _ms(percentile(samples, 99)),
+                    _ms(max(samples)),
+                )
+            )
+        return rows
+
+    def rule_rows(self) -> list[tuple[str, int, float]]:
+        """(rule id, hits, total match ms), slowest first."""
+        names = set(self.rule_seconds) | set(self.rule_hits)
+        rows = [(n, self.rule_hits[n], _ms(self.rule_seconds[n])) for n in names]
+        return sorted(rows, key=lambda r: (-r[2], -r[1], r[0]))
+
+    def db_rows(self) -> list[tuple]:
+        """
+        run_metrics rows: (kind, name, n, total_ms, p50_ms, p95_ms, p99_ms, max_ms).
+        Stages count documents, rules count hits; the `run` kind holds the wall
+        time and, when traced, the peak memory in bytes (as `n`).
+        """
+        rows = [("stage", *r) for r in self.stage_rows()]
+        rows += [
+            ("rule", name, hits, ms, None, None, None, None) for name, hits, ms in self.rule_rows()
+        ]
+        rows.append(("run", "wall", 1, _ms(self.wall), None, None, None, None))
+        if self.peak_bytes is not None:
+            rows.append(("run", "peak_traced_bytes", self.peak_bytes, 0.0, None, None, None, None))
+        return rows
+
+    def lines(self) -> list[str]:
+        """Summary lines: stage latency percentiles, the slowest rules, peak memory."""
+        out = []
+        if self.stages:
+            out.append(
+                f"{'stage':<10} {'docs':>6} {'total ms':>10}"
+                f" {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+            )
+            for stage, n, total, p50, p95, p99, top in self.stage_rows():
+                out.append(
+                    f"{stage:<10} {n:>6} {total:>10.1f}"
+                    f" {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {top:>8.2f}"
+                )
+        rules = [r for r in self.rule_rows() if r[2] > 0][:TOP_RULES]
+        if rules:
+            out.append("Slowest rules (match ms, hits):")
+            out += [f"  - {name}: {ms:.2f} ms, {hits} hits" for name, hits, ms in rules]
+        if self.peak_bytes is not None:
+            out.append(f"Peak traced memory: {self.peak_bytes / 2**20:.1f} MiB")
+        return out
@@ -0,0 +1,298 @@
+# src/rule_lint.py
+# Tags: #ccengine #ccrules
+#
+# `python cc_mvp.py rules lint|profile`: cost checks for regex rules.
+#
+# lint reads each pattern's parse tree for shapes that backtrack badly: an
+# unbounded quantifier nested in another (exponential), unbounded `.*`-style
+# gaps followed by more pattern and chains of wide gaps (polynomial), plus
+# rules without a literal the prefilter can skip them on. profile runs each
+# rule over adversarial text built from its own literals (near misses that
+# make every gap try every length) and generic runs, and over corpus text,
+# and reports the worst-case matching time per KiB. Every pass runs under a
+# ScanBudget, so a catastrophic rule costs its timeout, not the session.
+# Both exit 1 when a rule fails. Keyword rules are one linear automaton pass
+# and are not checked.
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import math
+import time
+
+from src.budget import ScanBudget
+from src.engine import (
+    _REPEATS,
+    MAX_MATCH_WIDTH,
+    Rule,
+    _sre_c,
+    _sre_parse,
+    load_rules,
+    max_match_width,
+    required_literals,
+)
+from src.rulesets import compiled_ruleset, regimes
+
+CORPUS_DIR = Path("data/testdocs")
+WIDE_GAP = 16  # a repeated broad class (`.`, `[^...]`) this wide or unbounded is a gap
+GAP_PATHS_WARN = 10_000  # product of bounded gap widths worth a warning
+PROFILE_KB = 64  # size of each profiling text
+TIMEOUT_MS = 2000.0  # per rule and text
+MAX_MS_PER_KB = 2.0  # profile fails rules slower than this on any text
+
+
+@dataclass(frozen=True)
+class Issue:
+    rule_id: str
+    level: str  # "error" | "warn"
+    message: str
+
+
+def _unbounded(hi: int) -> bool:
+    return hi == _sre_c.MAXREPEAT
+
+
+def _is_gap(av) -> bool:
+    """A wide repeat of `.`, `[^...]` or a negated literal; whitespace or digit runs aren't gaps."""
+    _lo, hi, sub = av
+    sub = list(sub)
+    if len(sub) != 1 or not (_unbounded(hi) or hi >= WIDE_GAP):
+        return False
+    op, av = sub[0]
+    if op is _sre_c.IN:
+        return bool(av) and av[0][0] is _sre_c.NEGATE
+    return op in (_sre_c.ANY, _sre_c.NOT_LITERAL)
+
+
+def _walk(seq, inside_unbounded: bool, found: dict) -> None:
+    """Collect nested unbounded repeats and gaps (with what follows them) from a parse tree."""
+    items = list(seq)
+    for k, (op, av) in enumerate(items):
+        if op in _REPEATS:
+            _lo, hi, sub = av
+            if _unbounded(hi) and inside_unbounded:
+                found["nested"] = True
+            if _is_gap(av):
+                found["gaps"].append((hi, k + 1 < len(items)))
+            else:
+                _walk(sub, inside_unbounded or _unbounded(hi), found)
+        elif op is _sre_c.SUBPATTERN:
+            _walk(av[-1], inside_unbounded, found)
+        elif op is _sre_c.BRANCH:
+            for alt in av[1]:
+                _walk(alt, inside_unbounded, found)
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            _walk(av, inside_unbounded, found)
+        elif op in (_sre_c.ASSERT, _sre_c.ASSERT_NOT):
+            _walk(av[1], inside_unbounded, found)
+
+
+def lint_rule(rule: Rule) -> list[Issue]:
+    """Static cost findings for one regex rule."""
+    try:
+        parsed = _sre_parse.parse(rule.pattern.pattern, rule.pattern.flags)
+    except Exception as e:
+        return [Issue(rule.id, "error", f"pattern does not parse: {e}")]
+    found: dict = {"nested": False, "gaps": []}
+    _walk(parsed, False, found)
+    out = []
+    if found["nested"]:
+        out.append(
+            Issue(
+                rule.id,
+                "error",
+                "unbounded quantifier nested in another: can backtrack exponentially",
+            )
+        )
+    if any(_unbounded(hi) and more for hi, more in found["gaps"]):
+        out.append(
+            Issue(
+                rule.id,
+                "warn",
+                "unbounded gap followed by more pattern: every near miss scans to the"
+                " end of the text",
+            )
+        )
+    bounded = [hi for hi, _ in found["gaps"] if not _unbounded(hi)]
+    paths = math.prod(hi + 1 for hi in bounded) if len(bounded) > 1 else 0
+    if paths >= GAP_PATHS_WARN:
+        widths = ", ".join(str(hi) for hi in bounded)
+        out.append(
+            Issue(
+                rule.id,
+                "warn",
+                f"{len(bounded)} chained gaps (up to {widths} chars): up to {paths:,}"
+                " backtracking paths per start",
+            )
+        )
+    if not required_literals(rule.pattern):
+        out.append(
+            Issue(rule.id, "warn", "no required literal: the prefilter never skips this rule")
+        )
+    if max_match_width(rule) >= MAX_MATCH_WIDTH:
+        out.append(
+            Issue(
+                rule.id,
+                "warn",
+                f"match width unbounded (assumed {MAX_MATCH_WIDTH} chars): longer matches"
+                " can be missed across chunk boundaries",
+            )
+        )
+    return out
+
+
+def _tile(piece: str, size: int) -> str:
+    return (piece * (size // max(len(piece), 1) + 1))[:size]
+
+
+def adversarial_texts(rule: Rule, size: int) -> dict[str, str]:
+    """
+    Texts built to make `rule` work hard without matching: its required
+    literals with the last one missing (so every gap is tried at every
+    length), its first literal repeated, and generic character runs.
+    """
+    words = [min(g, key=lambda s: (len(s), s)) for g in required_literals(rule.pattern)]
+    texts = {
+        "run a": _tile("a", size),
+        "run words": _tile("data ", size),
+        "run spaces": _tile(" \t\n", size),
+    }
+    if words:
+        texts["repeat first literal"] = _tile(words[0] + " ", size)
+        texts["all literals"] = _tile(" ".join(words) + " ", size)
+    if len(words) > 1:
+        texts["near miss"] = _tile(" ".join(words[:-1]) + " ", size)
+    return texts
+
+
+def corpus_text(corpus_dir: Path, size: int) -> str:
+    """About `size` characters of normalized documents from `corpus_dir` (tiled if short)."""
+    import cc_mvp
+
+    parts, total = [], 0
+    for path in cc_mvp.iter_input_docs(corpus_dir):
+        try:
+            text = cc_mvp.read_document(path)
+        except Exception:
+            continue  # unreadable here (e.g. a reader's dependency is missing)
+        parts.append(text)
+        total += len(text)
+        if total >= size:
+            break
+    return _tile("\n\n".join(parts), size) if parts else ""
+
+
+def time_rule(rule: Rule, text: str, timeout_ms: float = TIMEOUT_MS) -> tuple[float, bool]:
+    """(ms to find every match of `rule` in `text`, whether it hit `timeout_ms`)."""
+    budget = ScanBudget(timeout_ms)
+    with budget.document():
+        t0 = time.perf_counter()
+        budget.run(rule.id, lambda: sum(1 for _ in rule.pattern.finditer(text)))
+        ms = (time.perf_counter() - t0) * 1000
+    return ms, rule.id in budget.stopped
+
+
+@dataclass(frozen=True)
+class RuleCost:
+    rule_id: str
+    worst_ms_per_kb: float
+    worst_text: str
+    corpus_ms_per_kb: float | None
+    timed_out: bool
+
+
+def profile_rule(
+    rule: Rule, corpus: str, size: int = PROFILE_KB * 1024, timeout_ms: float = TIMEOUT_MS
+) -> RuleCost:
+    texts = adversarial_texts(rule, size)
+    if corpus:
+        texts["corpus"] = corpus
+    costs = {}
+    timed_out = False
+    for name, text in texts.items():
+        ms, stopped = time_rule(rule, text, timeout_ms)
+        costs[name] = ms / (len(text) / 1024)
+        timed_out = timed_out or stopped
+    worst = max(costs, key=costs.get)
+    return RuleCost(rule.id, costs[worst], worst, costs.get("corpus"), timed_out)
+
+
+def _regex_rules(regime_names: list[str], files: list[Path]) -> list[Rule]:
+    rules = [r for name in regime_names for r in compiled_ruleset(name)]
+    rules += [r for path in files for r in load_rules(path)]
+    return [r for r in rules if isinstance(r, Rule)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="cc_mvp.py rules",
+        description="Cost checks for regex rules: static lint and a worst-case profile.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    lint = sub.add_parser("lint", help="Flag patterns that can backtrack badly.")
+    prof = sub.add_parser("profile", help="Time every rule on adversarial and corpus text.")
+    for p in (lint, prof):
+        p.add_argument(
+            "--regime",
+            action="append",
+            choices=regimes(),
+            help="Regime to check (repeatable; default: all, unless --rules is given).",
+        )
+        p.add_argument(
+            "--rules",
+            action="append",
+            type=Path,
+            default=[],
+            metavar="YAML",
+            help="Also check the rules in this file (repeatable), e.g. before adding them.",
+        )
+    prof.add_argument(
+        "--corpus",
+        type=Path,
+        default=CORPUS_DIR,
+        help="Documents to time rules on (default: %(default)s).",
+    )
+    prof.add_argument("--kb", type=int, default=PROFILE_KB, help="KiB per profiling text.")
+    prof.add_argument(
+        "--timeout-ms",
+        type=float,
+        default=TIMEOUT_MS,
+        help="Stop a rule after this long on one text (default: %(default)s).",
+    )
+    prof.add_argument(
+        "--max-ms-per-kb",
+        type=float,
+        default=MAX_MS_PER_KB,
+        help="Fail rules whose worst case is slower than this (default: %(default)s).",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.regime or ([] if args.rules else regimes())
+    rules = _regex_rules(names, args.rules)
+    if not rules:
+        parser.error("no regex rules to check")
+
+    if args.command == "lint":
+        issues = [issue for rule in rules for issue in lint_rule(rule)]
+        for i in issues:
+            print(f"{i.level.upper():<5} {i.rule_id}: {i.message}")
+        errors = sum(i.level == "error" for i in issues)
+        print(f"{len(rules)} rules, {errors} errors, {len(issues) - errors} warnings")
+        return 1 if errors else 0
+
+    corpus = corpus_text(args.corpus, args.kb * 1024) if args.corpus.exists() else ""
+    print(f"{'rule':<24} {'worst ms/KiB':>12} {'corpus ms/KiB':>13}  worst text")
+    failed = 0
+    for rule in rules:
+        cost = profile_rule(rule, corpus, args.kb * 1024, args.timeout_ms)
+        bad = cost.timed_out or cost.worst_ms_per_kb > args.max_ms_per_kb
+        failed += bad
+        on_corpus = "-" if cost.corpus_ms_per_kb is None else f"{cost.corpus_ms_per_kb:.4f}"
+        status = " TIMEOUT" if cost.timed_out else (" SLOW" if bad else "")
+        print(
+            f"{cost.rule_id:<24} {cost.worst_ms_per_kb:>12.4f} {on_corpus:>13}"
+            f"  {cost.worst_text}{status}"
+        )
+    print(f"{len(rules)} rules, {failed} over {args.max_ms_per_kb} ms/KiB or timed out")
+    return 1 if failed else 0
@@ -0,0 +1,126 @@
+# src/rulesets.py
+# Tags: #ccengine #ccrules
+#
+# Compiled rulesets, memoized per process and optionally persisted as a
+# precompiled bundle. Loading YAML, extracting literals and building the
+# prefilter/automaton only happens again when a rule file (or a keyword
+# `terms_file` it references) actually changes.
+from __future__ import annotations
+
+from collections.abc import Sequence
+from pathlib import Path
+import os
+import pickle
+import sys
+import tempfile
+
+from src.cache import file_digest
+from src.engine import RuleSet, compile_rules, load_rules
+
+RULES_DIR = Path(__file__).resolve().parents[1] / "rules"  # independent of the CWD
+BUNDLE_VERSION = 1  # bump when RuleSet's pickled layout changes
+
+Deps = tuple[tuple[str, str], ...]  # (absolute path, sha256) of every input file
+
+_digests: dict[str, tuple[int, int, str]] = {}  # path -> (mtime_ns, size, sha256)
+_memo: dict[tuple[str, ...], tuple[Deps, RuleSet]] = {}
+
+
+def regimes(rules_dir: Path = RULES_DIR) -> list[str]:
+    """Regimes with rules: `rules/<regime>_<anything>.yml` files, e.g. gdpr_critical.yml."""
+    return sorted({f.name.split("_", 1)[0].upper() for f in rules_dir.glob("*_*.yml")})
+
+
+def ruleset_files(regime: str, rules_dir: Path = RULES_DIR) -> list[Path]:
+    return sorted(rules_dir.glob(f"{regime.lower()}_*.yml"))
+
+
+def _digest(path: str) -> str:
+    """Content hash, recomputed only when the file's mtime or size moved."""
+    st = os.stat(path)
+    seen = _digests.get(path)
+    if seen is not None and seen[:2] == (st.st_mtime_ns, st.st_size):
+        return seen[2]
+    digest = file_digest(Path(path))
+    _digests[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def _fresh(deps: Deps) -> bool:
+    try:
+        return all(_digest(path) == digest for path, digest in deps)
+    except OSError:
+        return False
+
+
+def _compile(files: Sequence[Path]) -> tuple[Deps, RuleSet]:
+    """
+    The RuleSet of `files` and its dependencies: the rule files themselves
+    first (in order), then the terms files they reference.
+    """
+    rules, referenced = [], []
+    for f in files:
+        if not f.exists():
+            raise FileNotFoundError(f"Missing rules file: {f}")
+        rules.extend(load_rules(f, referenced))
+    paths = [str(p) for p in [*files, *referenced]]
+    return tuple((p, _digest(p)) for p in paths), compile_rules(rules)
+
+
+def _read_bundle(bundle: Path) -> tuple[Deps, RuleSet] | None:
+    try:
+        with open(bundle, "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != BUNDLE_VERSION
+        or data.get("python") != sys.version_info[:2]
+        or not _fresh(data["deps"])
+    ):
+        return None
+    return data["deps"], data["ruleset"]
+
+
+def write_bundle(bundle: Path, deps: Deps, ruleset: RuleSet) -> None:
+    bundle.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": BUNDLE_VERSION,
+        "python": sys.version_info[:2],
+        "deps": deps,
+        "ruleset": ruleset,
+    }
+    fd, tmp = tempfile.mkstemp(dir=bundle.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, bundle)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def load_compiled(files: Sequence[Path], bundle: Path | None = None) -> RuleSet:
+    """
+    The compiled RuleSet for `files`, reused for as long as none of the rule
+    files (nor their terms files) changed. With `bundle`, a valid precompiled
+    bundle is loaded instead of parsing YAML, and a stale or missing one is
+    rewritten. Bundles are pickles: only point this at a path you control.
+    """
+    files = [Path(f).resolve() for f in files]
+    key = tuple(str(f) for f in files)
+    hit = _memo.get(key)
+    if hit is not None and _fresh(hit[0]):
+        return hit[1]
+    entry = _read_bundle(bundle) if bundle is not None else None
+    if entry is None or tuple(path for path, _ in entry[0][: len(key)]) != key:
+        entry = _compile(files)
+        if bundle is not None:
+            write_bundle(bundle, *entry)
+    _memo[key] = entry
+    return entry[1]
+
+
+def compiled_ruleset(regime: str, bundle: Path | None = None) -> RuleSet:
+    return load_compiled(ruleset_files(regime), bundle)
@@ -0,0 +1,318 @@
+# src/server.py
+# Tags: #ccengine #ccserve
+#
+# `python cc_mvp.py serve`: a long-running scan service on the stdlib HTTP
+# server (TCP or Unix socket). Interpreter start-up, reader imports and rule
+# compilation are paid once; each request only reads and scans its document.
+#
+#   POST /scan?regime=GDPR&name=contract.pdf   body = raw document bytes
+#   POST /scan  {"regime": "GDPR", "path": "contract.pdf"}   (application/json;
+#               paths are resolved inside --path-root)
+#   GET  /status                               counters + p50/p99 latency
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import cc_mvp
+from src.findings import FindingBatch
+from src.metrics import percentile
+from src.rulesets import compiled_ruleset, regimes
+
+LATENCY_WINDOW = 4096  # latency percentiles cover the most recent requests
+MAX_BODY_BYTES = 256 << 20
+
+
+class RequestError(Exception):
+    """A client mistake, reported as `status` with a JSON error body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+# ---------- Pool workers ----------
+def _warm_worker(regimes: list[str]) -> None:
+    cc_mvp.warm_readers()
+    for regime in regimes:
+        compiled_ruleset(regime)
+
+
+def _scan_in_worker(path: Path, regime: str) -> tuple[FindingBatch, float, str]:
+    t0 = time.perf_counter()
+    ruleset = compiled_ruleset(regime)  # memoized; recompiled only if rules/ changed
+    hits, _ = cc_mvp.scan_document(path, ruleset)
+    return hits, time.perf_counter() - t0, ruleset.fingerprint
+
+
+class ScanService:
+    """Warm rulesets, an optional process pool and latency bookkeeping."""
+
+    def __init__(self, regimes: list[str], workers: int = 1, path_root: Path = Path("data/docs")):
+        self.regimes = [r.upper() for r in regimes]
+        self.path_root = Path(path_root).resolve()
+        self.workers = max(1, workers)
+        cc_mvp.warm_readers()
+        for regime in self.regimes:
+            compiled_ruleset(regime)  # compile (and surface rule errors) before serving
+        self.pool = (
+            ProcessPoolExecutor(workers, initializer=_warm_worker, initargs=(self.regimes,))
+            if workers > 1
+            else None
+        )
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def _regime(self, regime: str | None) -> str:
+        regime = (regime or "").upper()
+        if regime not in self.regimes:
+            raise RequestError(400, f"regime must be one of {self.regimes}")
+        return regime
+
+    def _scan(self, regime: str, path: Path) -> tuple[FindingBatch, float, str]:
+        if self.pool is not None:
+            return self.pool.submit(_scan_in_worker, path, regime).result()
+        return _scan_in_worker(path, regime)
+
+    def scan_bytes(self, regime: str | None, name: str | None, data: bytes) -> dict:
+        regime = self._regime(regime)
+        name = Path(name or "upload.txt").name
+        suffix = Path(name).suffix.lower()
+        if suffix not in cc_mvp.ALLOWED_SUFFIXES:
+            raise RequestError(415, f"unsupported document type {suffix!r}")
+        fd, tmp = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            scanned = self._scan(regime, Path(tmp))
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        return self._result(regime, name, *scanned)
+
+    def scan_path(self, regime: str | None, path: str | None) -> dict:
+        regime = self._regime(regime)
+        if not path:
+            raise RequestError(400, "missing 'path'")
+        target = (self.path_root / path).resolve()
+        if not target.is_relative_to(self.path_root) or not target.is_file():
+            raise RequestError(404, f"no such document under {self.path_root}: {path}")
+        if target.suffix.lower() not in cc_mvp.ALLOWED_SUFFIXES:
+            raise RequestError(415, f"unsupported document type {target.suffix!r}")
+        return self._result(regime, target.name, *self._scan(regime, target))
+
+    def _result(
+        self, regime: str, name: str, hits: FindingBatch, scan_s: float, fingerprint: str
+    ) -> dict:
+        hits.set_doc(name)
+        return {
+            "regime": regime,
+            "doc": name,
+            "ruleset": fingerprint,
+            "findings": list(hits),
+            "timings_ms": {"scan": _ms(scan_s)},
+        }
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += not ok
+            self._latencies.append(seconds)
+
+    def status(self) -> dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            counters = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+            }
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            "version": cc_mvp.APP_VERSION,
+            "uptime_s": round(time.time() - self.started, 1),
+            **counters,
+            "latency_ms": {
+                "window": len(latencies),
+                "p50": None if p50 is None else _ms(p50),
+                "p99": None if p99 is None else _ms(p99),
+            },
+            "rulesets": {r: compiled_ruleset(r).fingerprint for r in self.regimes},
+            "workers": self.workers,
+        }
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+class ScanHandler(BaseHTTPRequestHandler):
+    server_version = f"cc-serve/{cc_mvp.APP_VERSION}"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/status":
+            self._send_json(200, self.server.service.status())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/scan":
+            self._send_json(404, {"error": "not found"})
+            return
+        service = self.server.service
+        t0 = time.perf_counter()
+        service.begin()
+        status, payload = 500, {"error": "internal error"}
+        try:
+            status, payload = self._scan(service, url.query, t0)
+        finally:
+            # booked before replying, so a client's next /status already counts it
+            service.end(time.perf_counter() - t0, ok=status == 200)
+        self._send_json(status, payload)
+
+    def _scan(self, service: ScanService, query: str, t0: float) -> tuple[int, dict]:
+        try:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:  # read(-1) would wait for EOF on a keep-alive connection
+                self.close_connection = True
+                raise RequestError(400, "invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True  # the unread body can't be skipped
+                raise RequestError(413, f"body exceeds {MAX_BODY_BYTES} bytes")
+            data = self.rfile.read(length)
+            params = {k: v[-1] for k, v in parse_qs(query).items()}
+            t_read = time.perf_counter()
+            if self.headers.get_content_type() == "application/json":
+                try:
+                    req = json.loads(data or b"{}")
+                except ValueError as e:
+                    raise RequestError(400, f"invalid JSON: {e}") from e
+                result = service.scan_path(req.get("regime"), req.get("path"))
+            else:
+                result = service.scan_bytes(params.get("regime"), params.get("name"), data)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:  # unreadable document, worker failure, ...
+            return 422, {"error": f"scan failed: {e}"}
+        result["timings_ms"]["read"] = _ms(t_read - t0)
+        result["timings_ms"]["total"] = _ms(time.perf_counter() - t0)
+        return 200, result
+
+
+class ScanHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: ScanService, quiet: bool = False):
+        self.service = service
+        self.quiet = quiet
+        super().__init__(address, ScanHandler)
+
+
+class UnixScanHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: ScanService, quiet: bool = False):
+        self.service = service
+        self.quiet = quiet
+        Path(path).unlink(missing_ok=True)  # stale socket from a previous run
+        super().__init__(path, ScanHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def make_server(
+    service: ScanService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: str | None = None,
+    quiet: bool = False,
+):
+    if unix_socket:
+        return UnixScanHTTPServer(unix_socket, service, quiet)
+    return ScanHTTPServer((host, port), service, quiet)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cc_mvp.py serve", description="Warm scan server (findings JSON over HTTP)"
+    )
+    parser.add_argument(
+        "--regime",
+        action="append",
+        choices=regimes(),
+        help="Regime to serve (repeatable; default: all).",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None, help="Listen on a Unix socket instead.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Scan processes (1 = scan on the request threads).",
+    )
+    parser.add_argument(
+        "--path-root",
+        type=Path,
+        default=Path("data/docs"),
+        help="Directory that JSON {'path': ...} requests may read from.",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Don't log each request.")
+    args = parser.parse_args(argv)
+
+    service = ScanService(args.regime or regimes(), args.workers, args.path_root)
+    server = make_server(service, args.host, args.port, args.unix_socket, args.quiet)
+    where = args.unix_socket or "http://{}:{}".format(*server.server_address[:2])
+    print(f"Serving {', '.join(service.regimes)} on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -5,14 +5,33 @@
 # - Filters: regime, rule_id, doc, date range
 # - KPIs: total findings, docs scanned, unique rules hit
 # - Tables: recent findings, per-rule counts, per-doc counts
+# Filters and aggregates run in SQLite (src/audit_query.py), mostly on the
+# rollup tables; only the KPIs, the grouped counts and one page of recent
+# findings reach pandas. With CC_AUDIT_PARQUET=<dir> the same views read a
+# Parquet export (`python cc_mvp.py export-audit`) instead (src/audit_parquet.py).
 
 from pathlib import Path
-import sqlite3
+import csv
+import io
+import os
 import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
 
+from src import audit_query
+from src.audit_query import COLUMNS, PAGE_SIZE, Filters
+
 DB_PATH = Path("data/cc_audit.sqlite")
+PARQUET_DIR = os.getenv("CC_AUDIT_PARQUET")
+TOP_DOCS = 500  # rows in the per-document table
+
+if PARQUET_DIR:
+    from src import audit_parquet as backend
+
+    SOURCE = Path(PARQUET_DIR)
+else:
+    backend = audit_query
+    SOURCE = DB_PATH
 
 st.set_page_config(
     page_title="Compliance Classifier — Audit Dashboard", page_icon="✅", layout="wide"
@@ -22,78 +41,113 @@ st.title("Compliance Classifier — Audit Dashboard")
 st.caption("Append‑only audit log viewer • local & read‑only • built for fast demos")
 
 # ---------- Safety checks ----------
-if not DB_PATH.exists():
+if not SOURCE.exists():
     st.warning(
-        f"Database not found at `{DB_PATH}`. Run the scanner first (e.g., `python cc_mvp.py --regime GDPR`)."
+        f"Audit data not found at `{SOURCE}`. Run the scanner first (e.g., `python cc_mvp.py --regime GDPR`)"
+        + (" and `python cc_mvp.py export-audit`." if PARQUET_DIR else ".")
     )
     st.stop()
 
 
-# ---------- Load data ----------
+# ---------- Queries (filtered and aggregated by the backend) ----------
+def query(fn, *args):
+    source = backend.open_log(SOURCE)  # SQLite connection or pyarrow dataset
+    try:
+        return fn(source, *args)
+    finally:
+        if hasattr(source, "close"):
+            source.close()
+
+
+@st.cache_data(ttl=30)
+def load_options():
+    return query(backend.options), query(backend.ts_range)
+
+
+@st.cache_data(ttl=30)
+def load_kpis(filters: Filters):
+    return query(backend.kpis, filters)
+
+
+@st.cache_data(ttl=30)
+def load_by_rule(filters: Filters):
+    return pd.DataFrame(
+        query(backend.counts_by_rule, filters), columns=["rule_id", "label", "count"]
+    )
+
+
+@st.cache_data(ttl=30)
+def load_by_doc(filters: Filters):
+    return pd.DataFrame(query(backend.counts_by_doc, filters, TOP_DOCS), columns=["doc", "count"])
+
+
 @st.cache_data(ttl=30)
-def load_events():
-    with sqlite3.connect(DB_PATH) as cx:
-        df = pd.read_sql_query(
-            """
-            SELECT
-              id, ts, run_id, version, regime, doc, rule_id, label, severity, snippet
-            FROM events
-            ORDER BY id DESC
-            """,
-            cx,
-        )
-    # parse ts to datetime
-    df["ts_dt"] = pd.to_datetime(df["ts"], errors="coerce")
-    return df
-
-
-df = load_events()
-if df.empty:
+def load_by_day(filters: Filters):
+    return pd.DataFrame(query(backend.counts_by_day, filters), columns=["day", "count"]).set_index(
+        "day"
+    )
+
+
+@st.cache_data(ttl=30)
+def load_page(filters: Filters, before):
+    rows, cursor = query(backend.recent_page, filters, before)
+    return pd.DataFrame(rows, columns=COLUMNS), cursor
+
+
+def export_csv(filters: Filters) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    query(lambda source: writer.writerows(backend.iter_findings(source, filters)))
+    return buf.getvalue().encode("utf-8")
+
+
+opts, (first_ts, last_ts) = load_options()
+if last_ts is None:
     st.info("No events yet. Run a scan to populate the audit log.")
     st.stop()
 
 # ---------- Sidebar filters ----------
 st.sidebar.header("Filters")
-regimes = sorted(df["regime"].dropna().unique().tolist())
-rule_ids = sorted(df["rule_id"].dropna().unique().tolist())
-docs = sorted(df["doc"].dropna().unique().tolist())
+regimes, rule_ids, docs = opts["regimes"], opts["rule_ids"], opts["docs"]
 
 regime_sel = st.sidebar.multiselect("Regime", options=regimes, default=regimes)
 rule_sel = st.sidebar.multiselect("Rule ID", options=rule_ids, default=rule_ids)
 doc_sel = st.sidebar.multiselect("Document", options=docs, default=docs)
 
 # Date range defaults to last 7 days
-max_ts = df["ts_dt"].max()
-min_ts = df["ts_dt"].min()
-default_start = (max_ts - timedelta(days=7)) if pd.notnull(max_ts) else min_ts
+max_ts = datetime.fromisoformat(last_ts.rstrip("Z"))
+min_ts = datetime.fromisoformat(first_ts.rstrip("Z"))
+default_start = max(min_ts, max_ts - timedelta(days=7))
 start_dt, end_dt = st.sidebar.date_input(
     "Date range",
-    value=(
-        default_start.date() if pd.notnull(default_start) else datetime.utcnow().date(),
-        max_ts.date() if pd.notnull(max_ts) else datetime.utcnow().date(),
-    ),
+    value=(default_start.date(), max_ts.date()),
 )
 
-# ---------- Apply filters ----------
-mask = (
-    df["regime"].isin(regime_sel)
-    & df["rule_id"].isin(rule_sel)
-    & df["doc"].isin(doc_sel)
-    & (df["ts_dt"].dt.date >= start_dt)
-    & (df["ts_dt"].dt.date <= end_dt)
+
+# ---------- Build filters ----------
+def chosen(selected, available):
+    # everything selected -> no constraint, so the query doesn't carry every value
+    return None if set(selected) >= set(available) else tuple(selected)
+
+
+filters = Filters(
+    regimes=chosen(regime_sel, regimes),
+    rule_ids=chosen(rule_sel, rule_ids),
+    docs=chosen(doc_sel, docs),
+    start=start_dt,
+    end=end_dt,
 )
-view = df.loc[mask].copy()
 
 # ---------- KPIs ----------
+stats = load_kpis(filters)
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Total Findings", f"{len(view):,}")
-col2.metric("Unique Docs", f"{view['doc'].nunique():,}")
-col3.metric("Unique Rules Hit", f"{view['rule_id'].nunique():,}")
-# latest run id in filtered set
-latest_run = (
-    view.sort_values("id", ascending=False)["run_id"].head(1).item() if not view.empty else "—"
-)
-col4.metric("Latest Run ID", latest_run)
+col1.metric("Total Findings", f"{stats['findings']:,}")
+col2.metric("Unique Docs", f"{stats['docs']:,}")
+col3.metric("Unique Rules Hit", f"{stats['rules']:,}")
+col4.metric("Latest Run ID", stats["latest_run"] or "—")
+
+st.bar_chart(load_by_day(filters), height=160)
 
 st.divider()
 
@@ -102,38 +156,40 @@ left, right = st.columns([2, 1])
 
 with left:
     st.subheader("Recent Findings")
+    # keyset pagination: a stack of "older than id" cursors, reset when filters change
+    if st.session_state.get("page_filters") != filters:
+        st.session_state.page_filters = filters
+        st.session_state.page_cursors = [None]
+    cursors = st.session_state.page_cursors
+    page, next_cursor = load_page(filters, cursors[-1])
     show_cols = ["ts", "regime", "doc", "severity", "rule_id", "label", "snippet"]
-    st.dataframe(view[show_cols].head(300), use_container_width=True)
+    st.dataframe(page[show_cols], use_container_width=True)
+    newer, where, older = st.columns([1, 2, 1])
+    if newer.button("← Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    where.caption(f"Page {len(cursors)} • {PAGE_SIZE} findings per page")
+    if older.button("Older →", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
 
 with right:
     st.subheader("Findings by Rule")
-    by_rule = (
-        view.groupby(["rule_id", "label"], dropna=False)
-        .size()
-        .reset_index(name="count")
-        .sort_values("count", ascending=False)
-    )
-    st.dataframe(by_rule, use_container_width=True, height=320)
+    st.dataframe(load_by_rule(filters), use_container_width=True, height=320)
 
     st.subheader("Findings by Document")
-    by_doc = (
-        view.groupby("doc", dropna=False)
-        .size()
-        .reset_index(name="count")
-        .sort_values("count", ascending=False)
-    )
-    st.dataframe(by_doc, use_container_width=True, height=240)
+    st.dataframe(load_by_doc(filters), use_container_width=True, height=240)
 
 # ---------- Download area ----------
 st.divider()
 st.subheader("Export Filtered Results")
-csv_bytes = view.drop(columns=["ts_dt"]).to_csv(index=False).encode("utf-8")
-st.download_button(
-    "Download CSV",
-    data=csv_bytes,
-    file_name=f"cc_findings_filtered_{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.csv",
-    mime="text/csv",
-)
+if st.button("Prepare CSV"):
+    st.download_button(
+        "Download CSV",
+        data=export_csv(filters),
+        file_name=f"cc_findings_filtered_{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.csv",
+        mime="text/csv",
+    )
 
 st.caption(
     "Tip: keep this read‑only. Writes happen in the scanner; this app is for review and demos."
@@ -41,6 +41,9 @@ def _clean_outputs_dir() -> None:
 def _clean_audit_db() -> None:
     if DB_PATH.exists():
         _safe_unlink(DB_PATH)
+    if not DB_PATH.exists():  # WAL-mode side files outlive the DB if a connection was open
+        for suffix in ("-wal", "-shm"):
+            _safe_unlink(DB_PATH.with_name(DB_PATH.name + suffix))
 
 
 def _ensure_dirs() -> None:
@@ -0,0 +1,62 @@
+# tests/test_audit_parquet.py
+# Tags: #cctests #ccaudit #ccdash
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from src import audit_parquet, audit_query  # noqa: E402
+from src.audit_parquet import export_audit  # noqa: E402
+
+from .test_audit_query import FILTERS, log  # noqa: E402,F401  (shared fixture)
+
+QUERIES = ("kpis", "counts_by_rule", "counts_by_doc", "counts_by_day", "recent_page")
+
+
+@pytest.fixture
+def export(log, tmp_path):  # noqa: F811
+    out = tmp_path / "export"
+    db = log.execute("PRAGMA database_list").fetchone()[2]
+    assert export_audit(db, out, batch_rows=16) == 120
+    return out
+
+
+def test_partitioned_by_regime_and_run_date_with_dictionary_columns(export):
+    parts = sorted(p.parent.relative_to(export).as_posix() for p in export.rglob("*.parquet"))
+    assert parts == [
+        "regime=GDPR/date=2025-03-01",
+        "regime=GDPR/date=2025-03-05",
+        "regime=SOC2/date=2025-03-02",
+    ]
+    schema = pq.read_schema(next(export.rglob("*.parquet")))
+    for column in ("doc", "rule_id", "label", "severity", "run_id"):
+        assert str(schema.field(column).type).startswith("dictionary")
+    assert "regime" not in schema.names  # stored in the path
+
+
+@pytest.mark.parametrize("f", FILTERS)
+def test_parquet_backend_answers_like_sqlite(log, export, f):  # noqa: F811
+    dataset = audit_parquet.open_log(export)
+    for name in QUERIES:
+        assert getattr(audit_parquet, name)(dataset, f) == getattr(audit_query, name)(log, f), name
+    assert list(audit_parquet.iter_findings(dataset, f, batch=7)) == list(
+        audit_query.iter_findings(log, f)
+    )
+    rows, cursor = audit_parquet.recent_page(dataset, f, limit=9)
+    assert (rows, cursor) == audit_query.recent_page(log, f, limit=9)
+    if cursor is not None:
+        assert audit_parquet.recent_page(dataset, f, cursor, 9) == audit_query.recent_page(
+            log, f, cursor, 9
+        )
+
+
+def test_options_and_incremental_reexport(log, export):  # noqa: F811
+    dataset = audit_parquet.open_log(export)
+    assert audit_parquet.options(dataset) == audit_query.options(log)
+    assert audit_parquet.ts_range(dataset) == audit_query.ts_range(log)
+
+    db = log.execute("PRAGMA database_list").fetchone()[2]
+    assert export_audit(db, export, since="2025-03-03") == 40  # only run-3's partition
+    assert len(list(export.rglob("*.parquet"))) == 3
+    assert (
+        audit_parquet.kpis(audit_parquet.open_log(export), audit_query.Filters())["findings"] == 120
+    )
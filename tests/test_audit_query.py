@@ -0,0 +1,143 @@
+# tests/test_audit_query.py
+# Tags: #cctests #ccaudit #ccdash
+import sqlite3
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from src.audit import AuditSink, rebuild_rollups
+from src.audit_query import (
+    COLUMNS,
+    Filters,
+    counts_by_day,
+    counts_by_doc,
+    counts_by_rule,
+    iter_findings,
+    kpis,
+    open_log,
+    options,
+    recent_page,
+    ts_range,
+)
+
+RUNS = [  # run_id, regime, ts
+    ("run-1", "GDPR", "2025-03-01T09:00:00Z"),
+    ("run-2", "SOC2", "2025-03-02T23:59:59Z"),
+    ("run-3", "GDPR", "2025-03-05T08:00:00Z"),
+]
+
+
+@pytest.fixture
+def log(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    for n, (run_id, regime, ts) in enumerate(RUNS):
+        with AuditSink(regime, "0.2.2", run_id, "fp", path=db) as sink:
+            sink.write(
+                {
+                    "doc": f"doc{(n + i) % 4}.pdf",
+                    "rule_id": f"{regime}-R{i % 3}",
+                    "label": f"Label {i % 3}",
+                    "severity": "high",
+                    "snippet": f"snippet {i % 5}",
+                }
+                for i in range(40)
+            )
+    with sqlite3.connect(db) as cx:
+        cx.executemany("UPDATE runs SET ts=? WHERE run_id=?", [(ts, r) for r, _, ts in RUNS])
+    rebuild_rollups(db)  # the daily rollup is keyed by the (back-dated) run day
+    cx = open_log(db)
+    yield cx
+    cx.close()
+
+
+def expected(cx, f: Filters) -> list[tuple]:
+    """The filters applied in Python over the flat `events` view, newest first."""
+    rows = cx.execute(f"SELECT {', '.join(COLUMNS)} FROM events ORDER BY id DESC").fetchall()
+    keep = []
+    for row in rows:
+        ev = dict(zip(COLUMNS, row))
+        day = date.fromisoformat(ev["ts"][:10])
+        if (
+            (f.regimes is None or ev["regime"] in f.regimes)
+            and (f.rule_ids is None or ev["rule_id"] in f.rule_ids)
+            and (f.docs is None or ev["doc"] in f.docs)
+            and (f.start is None or day >= f.start)
+            and (f.end is None or day <= f.end)
+        ):
+            keep.append(row)
+    return keep
+
+
+FILTERS = [
+    Filters(),
+    Filters(regimes=("GDPR",)),
+    Filters(rule_ids=("GDPR-R1", "SOC2-R0")),
+    Filters(docs=("doc1.pdf",), regimes=("GDPR", "SOC2")),
+    Filters(start=date(2025, 3, 2), end=date(2025, 3, 2)),
+    Filters(regimes=("GDPR",), start=date(2025, 3, 3)),
+    Filters(regimes=()),
+]
+
+
+@pytest.mark.parametrize("f", FILTERS)
+def test_sql_filters_and_aggregates_match_the_flat_view(log, f):
+    want = expected(log, f)
+    assert list(iter_findings(log, f, batch=7)) == want
+
+    stats = kpis(log, f)
+    assert stats["findings"] == len(want)
+    assert stats["docs"] == len({r[5] for r in want})
+    assert stats["rules"] == len({r[6] for r in want})
+    assert stats["latest_run"] == (want[0][2] if want else None)
+
+    by_rule = Counter((r[6], r[7]) for r in want)
+    assert {(rid, label): n for rid, label, n in counts_by_rule(log, f)} == by_rule
+    by_doc = counts_by_doc(log, f)
+    assert dict(by_doc) == Counter(r[5] for r in want)
+    assert [n for _, n in by_doc] == sorted((n for _, n in by_doc), reverse=True)
+    assert counts_by_doc(log, f, limit=2) == by_doc[:2]
+    assert counts_by_day(log, f) == sorted(Counter(r[1][:10] for r in want).items())
+
+
+def test_keyset_pages_cover_every_row_once(log):
+    f = Filters(regimes=("GDPR",))
+    seen, cursor = [], None
+    while True:
+        rows, cursor = recent_page(log, f, before=cursor, limit=15)
+        assert len(rows) <= 15
+        seen.extend(rows)
+        if cursor is None:
+            break
+    assert seen == expected(log, f)
+    assert len(seen) == 80
+
+
+def test_options_and_range(log):
+    opts = options(log)
+    assert opts["regimes"] == ["GDPR", "SOC2"]
+    assert opts["docs"] == [f"doc{i}.pdf" for i in range(4)]
+    assert "SOC2-R2" in opts["rule_ids"]
+    assert ts_range(log) == ("2025-03-01T09:00:00Z", "2025-03-05T08:00:00Z")
+
+
+def test_filter_values_are_bound_not_interpolated(log):
+    f = Filters(docs=("x' OR '1'='1",))
+    assert kpis(log, f)["findings"] == 0
+    assert recent_page(log, f) == ([], None)
+
+
+def test_log_is_read_only(log):
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        log.execute("DELETE FROM findings")
+
+
+def test_filtered_queries_use_the_composite_indexes(log):
+    def plan(f):
+        where, params = f.where()
+        sql = f"SELECT COUNT(*) FROM findings f WHERE {where}"
+        return " ".join(row[-1] for row in log.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+    assert "idx_findings_run_rule" in plan(Filters(regimes=("GDPR",), start=date(2025, 3, 1)))
+    assert "idx_findings_rule_run" in plan(Filters(rule_ids=("GDPR-R1",)))
+    assert "idx_findings_doc_run" in plan(Filters(docs=("doc1.pdf",)))
@@ -0,0 +1,164 @@
+# tests/test_audit_schema.py
+# Tags: #cctests #ccaudit
+import sqlite3
+
+from src import audit
+from src.audit import SCHEMA_VERSION, AuditSink, connect
+
+V1 = """
+CREATE TABLE events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, run_id TEXT NOT NULL,
+  version TEXT NOT NULL, regime TEXT NOT NULL, doc TEXT NOT NULL, rule_id TEXT NOT NULL,
+  label TEXT NOT NULL, severity TEXT NOT NULL, snippet TEXT NOT NULL,
+  ruleset TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX idx_events_run ON events(run_id);
+CREATE INDEX idx_events_rule ON events(rule_id);
+"""
+COLS = "id, ts, run_id, version, regime, doc, rule_id, label, severity, snippet, ruleset"
+
+
+def test_v1_log_is_migrated_behind_a_compatible_view(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    old = [
+        (
+            3,
+            "2025-01-01T00:00:00Z",
+            "run-a",
+            "0.2.1",
+            "GDPR",
+            "a.pdf",
+            "R1",
+            "L1",
+            "high",
+            "s1",
+            "",
+        ),
+        (
+            7,
+            "2025-01-01T00:00:00Z",
+            "run-a",
+            "0.2.1",
+            "GDPR",
+            "b.pdf",
+            "R1",
+            "L1",
+            "high",
+            "s1",
+            "",
+        ),
+        (
+            9,
+            "2025-02-01T00:00:00Z",
+            "run-b",
+            "0.2.2",
+            "SOC2",
+            "a.pdf",
+            "R2",
+            "L2",
+            "low",
+            "s2",
+            "fp",
+        ),
+    ]
+    with sqlite3.connect(db) as cx:
+        cx.executescript(V1)
+        cx.executemany(f"INSERT INTO events ({COLS}) VALUES ({', '.join('?' * 11)})", old)
+
+    connect(db).close()
+    with sqlite3.connect(db) as cx:  # a plain client, no custom functions
+        assert cx.execute(f"SELECT {COLS} FROM events ORDER BY id").fetchall() == old
+        assert cx.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        counts = [
+            cx.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+            for t in ("runs", "rules", "snippets")
+        ]
+        assert counts == [2, 2, 2]
+        cx.execute("DELETE FROM events WHERE run_id='run-a'")
+        assert cx.execute("SELECT id FROM findings").fetchall() == [(9,)]
+
+
+def test_repeated_runs_share_rules_and_snippets(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    rows = [
+        {
+            "doc": f"d{i}.txt",
+            "rule_id": "R",
+            "label": "L",
+            "severity": "high",
+            "snippet": "same text",
+        }
+        for i in range(3)
+    ]
+    for run in ("run-1", "run-2"):
+        with AuditSink("GDPR", "t", run, "fp", path=db) as sink:
+            sink.write(rows)
+    with sqlite3.connect(db) as cx:
+        assert cx.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 6
+        assert cx.execute("SELECT COUNT(*), MAX(LENGTH(run_id)) FROM runs").fetchone() == (2, 5)
+        assert cx.execute("SELECT COUNT(*) FROM snippets").fetchone()[0] == 1
+        assert cx.execute("SELECT COUNT(*) FROM rules").fetchone()[0] == 1
+        assert {r[0] for r in cx.execute("SELECT ruleset FROM events")} == {"fp"}
+
+
+def test_v2_log_gains_the_composite_indexes(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    with AuditSink("GDPR", "t", "run-1", "fp", path=db) as sink:
+        sink.write([{"doc": "a.txt", "rule_id": "R", "label": "L", "snippet": "s"}])
+    with sqlite3.connect(db) as cx:  # roll back to the v2 index layout
+        for name in (
+            "runs_regime_ts",
+            "findings_run_rule",
+            "findings_rule_run",
+            "findings_doc_run",
+        ):
+            cx.execute(f"DROP INDEX idx_{name}")
+        cx.execute("CREATE INDEX idx_findings_run ON findings(run)")
+        cx.execute("PRAGMA user_version = 2")
+
+    connect(db).close()
+    with sqlite3.connect(db) as cx:
+        indexes = {r[0] for r in cx.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert {"idx_runs_regime_ts", "idx_findings_run_rule"} <= indexes
+        assert "idx_findings_run" not in indexes
+        assert cx.execute("SELECT doc FROM events").fetchall() == [("a.txt",)]
+
+
+def test_colliding_snippet_hashes_keep_their_own_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "snippet_hash", lambda text: 42)  # every text collides
+    db = tmp_path / "audit.sqlite"
+    texts = ["first text", "second text", "first text"]
+    rows = [{"doc": "a.txt", "rule_id": "R", "label": "L", "snippet": t} for t in texts]
+    for run in ("run-1", "run-2"):
+        with AuditSink("GDPR", "t", run, "fp", path=db) as sink:
+            sink.write(rows)
+    with sqlite3.connect(db) as cx:
+        assert [r[0] for r in cx.execute("SELECT snippet FROM events ORDER BY id")] == texts * 2
+        assert cx.execute("SELECT COUNT(*) FROM snippets").fetchone()[0] == 2
+
+
+def test_v5_log_drops_the_unique_snippet_hash(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    with AuditSink("GDPR", "t", "run-1", "fp", path=db) as sink:
+        sink.write([{"doc": "a.txt", "rule_id": "R", "label": "L", "snippet": "s"}])
+    with sqlite3.connect(db) as cx:  # roll back to the v5 snippets table
+        cx.execute("DROP VIEW events")
+        cx.execute("DROP INDEX idx_snippets_hash")
+        cx.execute(
+            "CREATE TABLE snippets_v5 (id INTEGER PRIMARY KEY, hash INTEGER NOT NULL UNIQUE,"
+            " text TEXT NOT NULL)"
+        )
+        cx.execute("INSERT INTO snippets_v5 SELECT * FROM snippets")
+        cx.execute("DROP TABLE snippets")
+        cx.execute("ALTER TABLE snippets_v5 RENAME TO snippets")
+        cx.execute("PRAGMA user_version = 5")
+
+    connect(db).close()
+    with sqlite3.connect(db) as cx:
+        ddl = cx.execute("SELECT sql FROM sqlite_master WHERE name='snippets'").fetchone()[0]
+        assert "UNIQUE" not in ddl
+        assert cx.execute("SELECT doc, snippet FROM events").fetchall() == [("a.txt", "s")]
+        assert (
+            "REFERENCES snippets(id)"
+            in cx.execute("SELECT sql FROM sqlite_master WHERE name='findings'").fetchone()[0]
+        )
@@ -0,0 +1,64 @@
+# tests/test_audit_sink.py
+# Tags: #cctests #ccaudit
+import sqlite3
+
+import pytest
+
+import cc_mvp
+from src.audit import AuditSink
+
+from .util_docs import temp_docs, REPO
+
+
+def _count(db):
+    with sqlite3.connect(db) as cx:
+        return cx.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def _rows(n, doc="a.txt"):
+    return [{"doc": doc, "rule_id": f"R{i}", "label": "L", "severity": "high"} for i in range(n)]
+
+
+def test_sink_commits_in_batches_while_open(tmp_path):
+    db = tmp_path / "audit.sqlite"
+    with AuditSink("GDPR", "t", "run-1", "fp", path=db, batch_rows=7, queue_max=2) as sink:
+        assert not db.exists()  # nothing written, nothing opened
+        for _ in range(10):
+            sink.write(_rows(5))
+        sink.write([])
+        sink.flush()
+        assert sink.count == 50 and _count(db) == 50  # visible before close
+        with sqlite3.connect(db) as cx:
+            assert cx.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert set(cx.execute("SELECT run_id, ruleset FROM events")) == {("run-1", "fp")}
+
+
+def test_writer_errors_surface_on_the_producer(tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("x")
+    sink = AuditSink("GDPR", "t", "run", path=blocker / "audit.sqlite")
+    sink.write(_rows(1))
+    with pytest.raises(RuntimeError, match="audit writer failed"):
+        sink.flush()
+    with pytest.raises(RuntimeError):
+        sink.close()
+
+
+def test_findings_reach_the_log_as_each_document_finishes(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    db = tmp_path / "audit.sqlite"
+    files = {"sink_a.txt": "right to erasure", "sink_b.txt": "right to erasure, twice: erasure"}
+    seen = []
+    with temp_docs(files), AuditSink("GDPR", "t", "run", path=db) as sink:
+        real_write = sink.write
+
+        def write(rows):
+            real_write(rows)
+            sink.flush()
+            seen.append(_count(db))
+
+        monkeypatch.setattr(sink, "write", write)
+        rows, _ = cc_mvp.process_docs("GDPR", workers=1, sink=sink)
+    ours = [r for r in rows if r["doc"].startswith("sink_")]
+    assert ours and seen == sorted(seen) and len(seen) >= 2  # committed per document
+    assert sink.count == len(rows) == _count(db)
@@ -0,0 +1,36 @@
+# tests/test_bench_pipeline.py
+# Tags: #cctests #ccbench
+import json
+
+from benchmarks import bench_pipeline
+from benchmarks.bench_pipeline import STAGES, Profile, compare, main, run_stages
+from benchmarks.corpus import generate_corpus
+
+
+def test_synthetic_corpus_is_deterministic_and_fires_rules(tmp_path):
+    first = generate_corpus(tmp_path / "a", docs=30, kb=1, seed=3)
+    again = generate_corpus(tmp_path / "b", docs=30, kb=1, seed=3)
+    assert [p.read_text() for p in first] == [p.read_text() for p in again]
+
+    run = run_stages(tmp_path / "a", "GDPR", tmp_path / "work")
+    assert run["docs"] == 30 and run["findings"] > 0
+    assert set(run["seconds"]) == set(STAGES)
+
+
+def test_regressions_past_the_threshold_fail(tmp_path, monkeypatch):
+    monkeypatch.setitem(bench_pipeline.PROFILES, "tiny", Profile(20, 1))
+    argv = ["--profile", "tiny", "--repeat", "1", "--baseline-dir", str(tmp_path)]
+    assert main(argv + ["--save-baseline"]) == 0
+    baseline = json.loads((tmp_path / "tiny.json").read_text())
+    assert set(baseline["throughput"]) == set(STAGES)
+
+    slower = dict(baseline, throughput={s: v * 0.7 for s, v in baseline["throughput"].items()})
+    baseline["seconds"] = dict.fromkeys(STAGES, 1.0)  # long enough to enforce
+    assert len(compare(slower, baseline)) == len(STAGES)
+    assert compare(slower, baseline, threshold=0.5) == []
+    baseline["seconds"]["scan"] = 0.001  # too short to be reliable: reported, not enforced
+    assert "scan" not in " ".join(compare(slower, baseline))
+
+    baseline["throughput"] = {s: v * 1000 for s, v in baseline["throughput"].items()}
+    (tmp_path / "tiny.json").write_text(json.dumps(baseline))
+    assert main(argv) == 1
@@ -0,0 +1,76 @@
+# tests/test_budget.py
+# Tags: #cctests #ccengine #ccrules
+import re
+import time
+
+import cc_mvp
+from src import rule_lint
+from src.budget import BUDGET_RULE_ID, ScanBudget
+from src.engine import Rule, RuleSet, chunk_spans, ruleset_pool
+from src.rulesets import compiled_ruleset
+
+from .util_docs import temp_docs, REPO
+
+# exponential on a run of a's with no b: hours without a budget
+CATASTROPHIC = Rule("BAD-NESTED", "Nested", "info", re.compile(r"(a+)+b"))
+TEXT = "We notify the supervisory authority within 72 hours of a breach. " + "a" * 40 + "\n"
+
+
+def _ruleset() -> RuleSet:
+    return RuleSet([CATASTROPHIC, *compiled_ruleset("GDPR")])
+
+
+def test_overrunning_rule_is_stopped_and_marked(monkeypatch):
+    monkeypatch.chdir(REPO)
+    budget = ScanBudget(rule_ms=100)
+    t0 = time.perf_counter()
+    with temp_docs({"budget_a.txt": TEXT, "budget_b.txt": TEXT}):
+        rows, docs = cc_mvp.process_docs("GDPR", workers=1, ruleset=_ruleset(), budget=budget)
+    assert time.perf_counter() - t0 < 5
+
+    by_doc = {d: [r for r in rows if r["doc"] == d] for d in ("budget_a.txt", "budget_b.txt")}
+    for hits in by_doc.values():
+        assert [h["rule_id"] for h in hits] == ["GDPR-BREACH-72H", BUDGET_RULE_ID]
+        marker = hits[-1]
+        assert marker["label"] == "Scan budget exceeded: BAD-NESTED"
+        assert marker["source"] == "budget" and "may be incomplete" in marker["snippet"]
+    assert not budget.active
+
+
+def test_pool_chunks_report_stopped_rules():
+    rs = _ruleset()
+    text = ("Data subjects have the right to erasure. " * 60 + "\n") * 20 + TEXT
+    rs.budget = ScanBudget(rule_ms=100)
+    try:
+        with rs.budget.document(), ruleset_pool(rs, 2) as pool:
+            hits = rs.scan_chunked(text, list(chunk_spans(len(text))), executor=pool)
+        stopped = rs.budget.stopped
+    finally:
+        rs.budget = None
+    assert "BAD-NESTED" in stopped
+    assert sum(h["rule_id"] == "GDPR-ERASURE" for h in hits) == 1200
+
+
+def test_rules_lint_and_profile(tmp_path, capsys):
+    assert rule_lint.main(["lint"]) == 0
+
+    bad = tmp_path / "bad.yml"
+    bad.write_text(
+        "rules:\n"
+        "  - {id: BAD-NESTED, label: Nested, value: '(a+)+b'}\n"
+        "  - {id: BAD-GAPS, label: Gaps,"
+        " value: 'notify.*authority[^.]{0,200}within[^.]{0,200}hours'}\n",
+        encoding="utf-8",
+    )
+    assert rule_lint.main(["lint", "--rules", str(bad)]) == 1
+    out = capsys.readouterr().out
+    assert "ERROR BAD-NESTED: unbounded quantifier nested" in out
+    assert "WARN  BAD-GAPS: unbounded gap" in out and "40,401 backtracking paths" in out
+
+    assert rule_lint.main(["profile", "--rules", str(bad), "--kb", "4", "--timeout-ms", "50"]) == 1
+    out = capsys.readouterr().out
+    assert re.search(r"BAD-NESTED .* TIMEOUT", out)
+
+    assert rule_lint.main(["profile", "--regime", "GDPR", "--kb", "4"]) == 0
+    out = capsys.readouterr().out
+    assert "GDPR-BREACH-72H" in out and "3 rules, 0 over" in out
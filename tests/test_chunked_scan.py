@@ -0,0 +1,74 @@
+# tests/test_chunked_scan.py
+# Tags: #cctests #ccengine
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cc_mvp import CHUNK_OVERLAP, MAX_CHUNK, chunk_spans, load_ruleset, normalize_text
+from src.engine import Rule, RuleSet, ruleset_pool
+from src.keywords import KeywordRule
+
+REPO = Path(__file__).resolve().parents[1]
+SEED = "\n".join(
+    p.read_text(encoding="utf-8") for p in sorted((REPO / "data" / "testdocs").rglob("*.txt"))
+)
+
+
+def _ruleset() -> RuleSet:
+    return RuleSet(
+        load_ruleset("GDPR")
+        + load_ruleset("SOC2")
+        + [
+            KeywordRule("KW-TERMS", "Terms", "info", ["personal data", "breach", "MFA"]),
+            # repeats run well past chunk boundaries and overlap each other's chunks
+            Rule("RUN", "Run", "info", re.compile(r"(?:erasure\.? ?)+")),
+        ]
+    )
+
+
+def _chunked(rs: RuleSet, text: str, **kw) -> list[dict]:
+    return rs.scan_chunked(text, list(chunk_spans(len(text))), **kw)
+
+
+def test_chunked_scan_equals_whole_text_scan():
+    rs = _ruleset()
+    rnd = random.Random(5)
+    for _ in range(15):
+        text = normalize_text(SEED * rnd.randint(1, 4) + "erasure. " * rnd.randint(0, 50) + SEED)
+        assert _chunked(rs, text) == list(rs.scan(text))
+
+
+def test_match_straddling_chunk_boundary_is_found_once():
+    rs = RuleSet(load_ruleset("SOC2"))
+    boundary = MAX_CHUNK - CHUNK_OVERLAP  # where the second chunk starts
+    for shift in (-20, -5, 0, 5, CHUNK_OVERLAP - 3, CHUNK_OVERLAP + 3):
+        pad = boundary + shift - 8
+        text = (
+            "x " * (pad // 2)
+            + " " * (pad % 2)
+            + "We apply least privilege everywhere."
+            + " y" * 800
+        )
+        hits = _chunked(rs, text)
+        assert [(h["rule_id"], h["start"]) for h in hits] == [("SOC2-LEAST-PRIV", pad + 9)]
+
+
+def test_chunks_can_run_on_a_pool():
+    rs = _ruleset()
+    text = normalize_text(SEED * 6)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert _chunked(rs, text, executor=pool, batch=4) == list(rs.scan(text))
+    with ruleset_pool(rs, 2) as pool:  # workers hold the RuleSet; batches carry only text
+        assert _chunked(rs, text, executor=pool, batch=4) == list(rs.scan(text))
+
+
+def test_empty_matches_at_chunk_edges_and_text_end():
+    rules = [r".{0,5}", r"a*", r"\b", r"(?m)$"]
+    rs = RuleSet([Rule(f"E{i}", "Empty", "info", re.compile(p)) for i, p in enumerate(rules)])
+    rnd = random.Random(7)
+    for _ in range(200):
+        text = "".join(rnd.choice("ab x\n") for _ in range(rnd.randint(0, 200)))
+        cuts = sorted({0} | {rnd.randint(0, len(text)) for _ in range(rnd.randint(0, 5))})
+        assert rs.scan_chunked(text, [(c, len(text)) for c in cuts]) == list(rs.scan(text))
+    assert rs.scan_chunked("", []) == list(rs.scan(""))
@@ -0,0 +1,60 @@
+# tests/test_engine_ruleset.py
+# Tags: #cctests #ccengine
+import re
+from pathlib import Path
+
+import pytest
+
+from cc_mvp import load_ruleset, normalize_text, scan_text
+from src.engine import Rule, RuleSet, make_finding, required_literals
+
+REPO = Path(__file__).resolve().parents[1]
+TESTDOCS = REPO / "data" / "testdocs"
+
+
+def _naive(text: str, rules) -> list[dict]:
+    return [make_finding(r, text, *m.span()) for r in rules for m in r.pattern.finditer(text)]
+
+
+def test_required_literals_for_breach_rule():
+    [breach] = [r for r in load_ruleset("GDPR") if r.id == "GDPR-BREACH-72H"]
+    groups = required_literals(breach.pattern)
+    # `notify|notification` is factored by the parser into the shared prefix
+    assert frozenset({"notif"}) in groups
+    assert frozenset({"supervisory", "authority", "controller"}) in groups
+
+
+def test_optional_branch_yields_no_requirement():
+    # `(foo)?bar` must not require "foo"
+    assert required_literals(re.compile("(foo)?bar")) == [frozenset({"bar"})]
+    assert required_literals(re.compile(r"\d+")) == []
+
+
+@pytest.mark.parametrize("regime", ["GDPR", "SOC2"])
+def test_ruleset_findings_identical_to_naive_scan(regime):
+    rules = load_ruleset(regime)
+    compiled = RuleSet(rules)
+    for path in sorted(TESTDOCS.rglob("*.txt")):
+        text = normalize_text(path.read_text(encoding="utf-8"))
+        assert list(scan_text(text, compiled)) == _naive(text, rules), path.name
+
+
+def test_prefilter_skips_rules_without_literals_present():
+    rules = load_ruleset("SOC2")
+    compiled = RuleSet(rules)
+    text = "Access follows the principle of LEAST   PRIVILEGE for all staff."
+    assert [r.id for r in compiled.candidates(text)] == ["SOC2-LEAST-PRIV"]
+    assert list(compiled.scan(text)) == _naive(text, rules)
+
+
+def test_overlapping_and_prefix_literals_are_all_seen():
+    rules = [
+        Rule("A", "a", "info", re.compile("data breach")),
+        Rule("B", "b", "info", re.compile(r"breach\b")),
+        Rule("C", "c", "info", re.compile("(?i)notif(y|ication)")),
+        Rule("D", "d", "info", re.compile("(?i)notification")),
+    ]
+    text = "A data breach triggers NOTIFICATION."
+    compiled = RuleSet(rules)
+    assert [r.id for r in compiled.candidates(text)] == ["A", "B", "C", "D"]
+    assert list(compiled.scan(text)) == _naive(text, rules)
@@ -0,0 +1,89 @@
+# tests/test_findings.py
+# Tags: #cctests #ccengine
+import pickle
+
+import cc_mvp
+from cc_mvp import load_ruleset
+from src.engine import RuleSet, make_finding
+from src.findings import FindingBatch
+
+from .util_docs import temp_docs, REPO
+
+TEXT = (
+    "Intro paragraph with nothing to report.\n" * 40
+    + "MFA is required for admins. Logs are retained and reviewed.\n"
+    + "Filler text that keeps the matches apart.\n" * 40
+    + "We apply least privilege to every role.\n"
+)
+
+
+def _ruleset() -> RuleSet:
+    return RuleSet(load_ruleset("SOC2"))
+
+
+def _dicts(rs: RuleSet, text: str) -> list[dict]:
+    return [
+        make_finding(rule, text, start, end)
+        for rule, spans in zip(rs.rules, rs.spans(text))
+        for start, end in spans
+    ]
+
+
+def test_batch_rows_match_finding_dicts():
+    rs = _ruleset()
+    expected = _dicts(rs, TEXT)
+    batch = rs.find(TEXT)
+    assert len(expected) >= 3 and batch == expected
+    assert batch[0] == expected[0] and batch[-1] == expected[-1]
+    assert batch[1:3] == expected[1:3]
+    assert list(batch.rule_ids()) == [f["rule_id"] for f in expected]
+
+    batch.set_doc("a.txt")
+    assert all(row["doc"] == "a.txt" for row in batch)
+    assert list(batch.fields("rule_id", "doc")) == [(f["rule_id"], "a.txt") for f in expected]
+
+
+def test_detached_and_pickled_batches_keep_snippets():
+    rs = _ruleset()
+    expected = _dicts(rs, TEXT)
+    batch = pickle.loads(pickle.dumps(rs.find(TEXT)))
+    assert batch == expected
+    source = batch.sources[0]
+    assert not source.whole and sum(map(len, source.texts)) < len(TEXT) // 2
+
+    stream = rs.scan_segments([(1, TEXT[:2000]), (2, TEXT[2000:])], min_window=512)
+    assert [{k: v for k, v in row.items() if k != "page"} for row in stream] == expected
+    assert {row["page"] for row in stream} == {1, 2}
+
+
+def test_concat_keeps_documents_columns_and_stored_rows():
+    rs = _ruleset()
+    a = rs.find(TEXT)
+    a.set_doc("a.txt")
+    b = rs.scan_segments([(3, TEXT)])
+    b.set_doc("b.txt")
+    c = FindingBatch.of_rows([{"rule_id": "AI-1", "label": "AI", "snippet": "x"}], doc="c.txt")
+    both = FindingBatch.concat([a, b, c])
+    assert both == [*a, *b, *c]
+    assert "page" not in both[0] and both[len(a)]["page"] == 3
+    assert both[-1] == {"rule_id": "AI-1", "label": "AI", "snippet": "x", "doc": "c.txt"}
+
+
+def test_process_docs_returns_a_batch(monkeypatch):
+    monkeypatch.chdir(REPO)
+    with temp_docs({"findings_a.txt": TEXT}):
+        rows, docs = cc_mvp.process_docs("SOC2", workers=1)
+    assert isinstance(rows, FindingBatch)
+    mine = [r for r in rows if r["doc"] == "findings_a.txt"]
+    text = cc_mvp.normalize_text(TEXT)  # as read_document hands it to the scan
+    assert [{k: v for k, v in r.items() if k != "doc"} for r in mine] == _dicts(_ruleset(), text)
+
+
+def test_cli_with_no_documents_prints_an_empty_summary(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)  # no data/docs here; rules are found next to the code
+    rows, docs = cc_mvp.process_docs("GDPR", workers=1)
+    assert isinstance(rows, FindingBatch) and len(rows) == 0 and docs == []
+
+    cc_mvp.main(["--regime", "GDPR", "--no-cache"])
+    out = capsys.readouterr().out
+    assert "WARN: No input docs found." in out and "No matches found." in out
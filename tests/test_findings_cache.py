@@ -0,0 +1,65 @@
+# tests/test_findings_cache.py
+# Tags: #cctests #cccache
+import cc_mvp
+from src.cache import FindingsCache
+
+from .util_docs import temp_docs, REPO
+
+
+def _run(cache, **kw):
+    return cc_mvp.process_docs("GDPR", workers=1, cache=cache, **kw)
+
+
+def test_unchanged_docs_reuse_cached_findings(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    files = {
+        "cache_a.txt": "Data subjects keep the right to erasure.",
+        "cache_b.txt": "Nothing relevant in here.",
+    }
+    with temp_docs(files) as written, FindingsCache(tmp_path / "cache.sqlite") as cache:
+        first = _run(cache)
+        assert cache.hits == 0 and cache.misses > 0
+        n_docs = cache.misses
+
+        calls = []
+        real_scan = cc_mvp.scan_documents
+        monkeypatch.setattr(
+            cc_mvp,
+            "scan_documents",
+            lambda docs, *a, **k: calls.append(docs) or real_scan(docs, *a, **k),
+        )
+        second = _run(cache)
+        assert second == first
+        assert cache.hits == n_docs and calls == [[]]  # nothing re-read or re-scanned
+
+        # an edited document (new content hash) is the only miss
+        written[1].write_text("Erase personal data on request.", encoding="utf-8")
+        third = _run(cache)
+        assert [p.name for p in calls[-1]] == ["cache_b.txt"]
+        assert any(r["doc"] == "cache_b.txt" for r in third[0])
+
+
+def test_cache_key_includes_ruleset_and_rebuild_clears(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    with temp_docs({"cache_c.txt": "right to erasure"}):
+        with FindingsCache(tmp_path / "cache.sqlite") as cache:
+            _run(cache)
+            soc2 = cc_mvp.process_docs("SOC2", workers=1, cache=cache)
+            assert cache.hits == 0  # different ruleset fingerprint, nothing shared
+            assert not [r for r in soc2[0] if r["doc"] == "cache_c.txt"]
+        with FindingsCache(tmp_path / "cache.sqlite", rebuild=True) as cache:
+            _run(cache)
+            assert cache.hits == 0
+
+
+def test_new_findings_version_misses_old_entries(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    with temp_docs({"cache_d.txt": "right to erasure"}):
+        with FindingsCache(tmp_path / "cache.sqlite") as cache:
+            _run(cache)
+            misses = cache.misses
+            _run(cache)
+            assert cache.hits == misses
+            monkeypatch.setattr(cc_mvp, "FINDINGS_VERSION", cc_mvp.FINDINGS_VERSION + 1)
+            _run(cache)
+            assert cache.hits == misses and cache.misses == 2 * misses
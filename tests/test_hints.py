@@ -0,0 +1,98 @@
+# tests/test_hints.py
+# Tags: #cctests #ccai #ccrules
+import os
+
+import pytest
+
+from src.hints import HintFinding, HintSet, load_hints
+from src.llm_layer import heuristic_findings
+from src.rulesets import regimes, ruleset_files
+
+
+def classify(regime, text):
+    return [(f.rule_id, f.confidence) for f in heuristic_findings(regime, text)]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("We will notify the supervisory authority promptly.", 0.65),
+        ("We NOTIFY the Regulator within 72 hours.", 0.85),
+        ("Inform the controller promptly, at most 72 hours later.", 0.85),
+        ("Report to the regulator without undue delay.", 0.85),
+        ("We will notify customers promptly.", None),  # no regulator
+        ("The supervisory authority is informed.", None),  # no timing
+    ],
+)
+def test_gdpr_heuristics(text, expected):
+    want = [] if expected is None else [("GDPR-BREACH-72H-IMPLICIT", expected)]
+    assert classify("GDPR", text) == want
+
+
+def test_soc2_heuristics_and_evidence_spans():
+    text = "Admins use Multi-Factor login; data in transit uses TLS 1.3."
+    mfa, enc = heuristic_findings("SOC2", text)
+    assert (mfa.rule_id, enc.rule_id) == (
+        "SOC2-ACCESS-CONTROL-IMPLICIT",
+        "SOC2-ENCRYPTION-IMPLICIT",
+    )
+    assert [text[s:e] for s, e in mfa.spans] == ["Multi-Factor"]
+    assert [text[s:e] for s, e in enc.spans] == ["in transit"]  # first encryption hint
+
+
+def test_one_pass_reports_every_span_that_fired():
+    hints = load_hints("GDPR")
+    text = "Notification: the controller reports promptly (72 hours) to the regulator."
+    spans = hints.match(text)
+    fired = {name: [text[s:e].lower() for s, e in found] for name, found in spans.items()}
+    assert fired == {
+        "notify": ["notification", "report"],
+        "regulator": ["controller", "regulator"],
+        "time": ["promptly", "72 hours"],
+        "vague_timing": ["promptly"],
+        "explicit_72": ["72"],
+    }
+    assert hints.relevance(spans, 0, len(text)) == (3, 6)  # conditions don't rank
+
+
+def test_large_hint_lists_match_like_substring_search():
+    terms = [f"term{i:04d}x" for i in range(3000)]
+    hints = HintSet({"big": terms}, findings=[HintFinding("X", "X", "low", ("big",), 0.5)])
+    text = " ".join(f"term{i:04d}x" for i in range(0, 3000, 7)) + " term9999x"
+    (found,) = hints.match(text).values()
+    assert len(found) == len(range(0, 3000, 7))
+    assert all(text[s:e] in terms for s, e in found)
+    ((finding, confidence, evidence),) = hints.classify(hints.match(text))
+    assert evidence == [found[0]] and confidence == 0.5
+
+
+def test_unknown_group_is_rejected():
+    with pytest.raises(ValueError, match="nope"):
+        HintSet({"a": ["x"]}, findings=[HintFinding("X", "X", "low", ("a", "nope"), 0.5)])
+
+
+def test_regimes_come_from_rule_files(tmp_path):
+    assert regimes() == ["GDPR", "SOC2"]
+    assert [f.name for f in ruleset_files("gdpr")] == ["gdpr_critical.yml"]
+
+    (tmp_path / "hipaa_core.yml").write_text("rules: []\n", encoding="utf-8")
+    (tmp_path / "hipaa_extra.yml").write_text("rules: []\n", encoding="utf-8")
+    (tmp_path / "hints").mkdir()
+    hints_file = tmp_path / "hints" / "hipaa.yml"
+    hints_file.write_text(
+        "groups:\n  phi: [protected health information, PHI]\n"
+        "findings:\n  - {id: HIPAA-PHI, label: PHI, requires: [phi], confidence: 0.7}\n",
+        encoding="utf-8",
+    )
+    assert regimes(tmp_path) == ["HIPAA"]
+    assert len(ruleset_files("HIPAA", tmp_path)) == 2
+    hints = load_hints("HIPAA", tmp_path / "hints")
+    ((finding, _, evidence),) = hints.classify(hints.match("Handles phi daily."))
+    assert finding.id == "HIPAA-PHI" and evidence == [(8, 11)]
+
+    # edits are picked up without a restart
+    hints_file.write_text(hints_file.read_text().replace("PHI]", "PHI, ePHI]"), encoding="utf-8")
+    st = hints_file.stat()
+    os.utime(hints_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert load_hints("HIPAA", tmp_path / "hints") is not hints
+    assert load_hints("NONE", tmp_path / "hints").match("phi") == {}
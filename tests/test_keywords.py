@@ -0,0 +1,77 @@
+# tests/test_keywords.py
+# Tags: #cctests #ccengine #ccrules
+import re
+from pathlib import Path
+
+from cc_mvp import load_rules_file, scan_text
+from src.engine import RuleSet
+from src.keywords import Automaton, KeywordMatcher, KeywordRule
+
+
+def _rule(terms, **kw) -> KeywordRule:
+    return KeywordRule("KW-TEST", "Keyword test", "info", terms, **kw)
+
+
+def test_automaton_reports_overlapping_occurrences():
+    ac = Automaton([("he", 0), ("she", 1), ("hers", 2), ("his", 3)])
+    assert sorted(ac.iter_matches("ushers")) == [(1, 4, 1), (2, 4, 0), (2, 6, 2)]
+
+
+def test_matcher_leftmost_longest_whole_word_case_insensitive():
+    [spans] = KeywordMatcher([_rule(["data", "personal data", "Data Category"])]).find(
+        "Personal DATA and data categories; metadata is not a hit."
+    )
+    assert spans == [(0, 13), (18, 22)]
+
+
+def test_case_sensitive_and_substring_modes():
+    m = KeywordMatcher([_rule(["SOC"], case_sensitive=True), _rule(["vend"], whole_word=False)])
+    exact, partial = m.find("soc SOC vendors")
+    assert exact == [(4, 7)]
+    assert partial == [(8, 12)]
+
+
+def test_findings_match_regex_alternation_shape():
+    terms = ["Acme Cloud", "Globex", "Initech Payroll"]
+    text = "Vendors: acme cloud, GLOBEX and Initech payroll.\nAlso Globex again."
+    rx = re.compile(r"(?i)\b(?:" + "|".join(map(re.escape, terms)) + r")\b")
+    kw_rule = _rule(terms)
+    expected = [
+        {
+            "rule_id": "KW-TEST",
+            "label": "Keyword test",
+            "severity": "info",
+            "start": m.start(),
+            "end": m.end(),
+            "snippet": text[max(0, m.start() - 80) : m.end() + 80].replace("\n", " "),
+        }
+        for m in rx.finditer(text)
+    ]
+    assert list(scan_text(text, RuleSet([kw_rule]))) == expected
+
+
+def test_dictionary_rule_loads_from_yaml_with_terms_file(tmp_path: Path):
+    (tmp_path / "vendors.txt").write_text("# vendors\nAcme Cloud\n\nGlobex\n", encoding="utf-8")
+    (tmp_path / "vendors.yml").write_text(
+        "rules:\n"
+        "  - id: VENDOR-NAMED\n"
+        "    label: Named Vendor\n"
+        "    type: dictionary\n"
+        "    terms: [Initech]\n"
+        "    terms_file: vendors.txt\n"
+        "  - id: GDPR-ERASURE\n"
+        "    label: Right to Erasure\n"
+        "    type: regex\n"
+        '    value: "(?i)right to erasure"\n',
+        encoding="utf-8",
+    )
+    rules = load_rules_file(tmp_path / "vendors.yml")
+    assert [r.id for r in rules] == ["VENDOR-NAMED", "GDPR-ERASURE"]
+    assert rules[0].terms == ("Initech", "Acme Cloud", "Globex")
+
+    hits = list(scan_text("Globex honours the right to erasure; so does Initech.", rules))
+    assert [(h["rule_id"], h["start"]) for h in hits] == [
+        ("VENDOR-NAMED", 0),
+        ("VENDOR-NAMED", 45),
+        ("GDPR-ERASURE", 19),
+    ]
@@ -0,0 +1,69 @@
+# tests/test_llm_cache.py
+# Tags: #cctests #cccache #ccai
+import cc_mvp
+from src import llm_layer
+from src.cache import LLMCache
+from src.llm_layer import EscalationStage
+
+from .test_llm_stage import EDGE, settings, stub_server
+from .util_docs import temp_docs, REPO
+
+KEY = ("GDPR", "stub-model", 1, "ab" * 32)
+
+
+def test_ttl_and_hit_miss_stats(tmp_path):
+    now = [1_000_000.0]
+    path = tmp_path / "cache.sqlite"
+    with LLMCache(path, ttl_days=1, clock=lambda: now[0]) as cache:
+        assert cache.get(KEY) is None
+        cache.put(KEY, '{"rule_id": "X"}')
+        assert cache.get(KEY) == '{"rule_id": "X"}'
+        assert cache.get(KEY[:3] + ("cd" * 32,)) is None
+        now[0] += 86400 + 1
+        assert cache.get(KEY) is None  # expired, even before it is purged
+        assert (cache.hits, cache.misses) == (1, 3)
+    with LLMCache(path, ttl_days=1, clock=lambda: now[0]) as cache:
+        assert cache._cx.execute("SELECT COUNT(*) FROM llm_cache").fetchone() == (0,)
+
+
+def test_close_evicts_least_recently_used_beyond_the_cap(tmp_path):
+    now = [0.0]
+    path = tmp_path / "cache.sqlite"
+    keys = [KEY[:3] + (f"{i:064x}",) for i in range(4)]
+    with LLMCache(path, max_bytes=250, clock=lambda: now[0]) as cache:
+        for key in keys:
+            now[0] += 1
+            cache.put(key, "x" * 100)
+        now[0] += 1
+        assert cache.get(keys[0]) is not None  # oldest entry, but just used
+    assert cache.evicted == 2
+    with LLMCache(path, max_bytes=250, clock=lambda: now[0]) as cache:
+        assert [cache.get(k) is not None for k in keys] == [True, False, False, True]
+
+
+def test_unchanged_escalations_are_answered_from_cache(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    files = {"llm_cache_a.txt": EDGE, "llm_cache_b.txt": EDGE + " Second document."}
+    path = tmp_path / "cache.sqlite"
+
+    def run(server):
+        with LLMCache(path) as cache:
+            stage = EscalationStage(settings(server), cache=cache)
+            try:
+                rows, _ = cc_mvp.process_docs("GDPR", use_ai=True, workers=1, llm=stage)
+            finally:
+                stage.close()
+        return [r for r in rows if r["doc"].startswith("llm_cache_")], cache
+
+    with stub_server() as server, temp_docs(files):
+        first, cache = run(server)
+        sent = len(server.prompts)
+        assert len(first) == 2 and cache.misses == sent and cache.hits == 0
+
+        second, cache = run(server)
+        assert second == first
+        assert len(server.prompts) == sent and cache.hits == sent  # no new requests
+
+        monkeypatch.setattr(llm_layer, "PROMPT_VERSION", llm_layer.PROMPT_VERSION + 1)
+        run(server)
+        assert len(server.prompts) == 2 * sent  # a new prompt template asks again
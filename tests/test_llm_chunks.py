@@ -0,0 +1,58 @@
+# tests/test_llm_chunks.py
+# Tags: #cctests #ccai
+from src import llm_layer
+from src.engine import MAX_CHUNK
+from src.llm_layer import EscalationStage, excerpt, select_chunks
+
+from .test_llm_stage import settings, stub_server
+
+FILLER = "These terms govern use of the service and are provided as is. " * 40
+CLAUSE = "The processor shall notify the supervisory authority promptly after a breach."
+
+
+def test_chunks_are_ranked_by_hint_groups_then_occurrences():
+    text = FILLER + ("report " * 30) + FILLER + CLAUSE + FILLER
+    spans = select_chunks("GDPR", text, budget_tokens=10_000, top_k=2)
+    best, second = (text[a:b] for a, b in spans)
+    assert CLAUSE in best  # three groups beat thirty hits of one
+    assert "report report" in second
+    assert select_chunks("GDPR", text, budget_tokens=10_000, top_k=1) == spans[:1]
+
+
+def test_budget_and_fallback_to_the_start():
+    text = (FILLER + CLAUSE) * 6
+    spans = select_chunks("GDPR", text, budget_tokens=700)
+    assert 1 < len(spans) <= llm_layer.TOP_K
+    assert sum(b - a for a, b in spans) <= 700 * llm_layer.CHARS_PER_TOKEN
+    assert select_chunks("GDPR", text, budget_tokens=100) == [(spans[0][0], spans[0][0] + 400)]
+    assert select_chunks("GDPR", FILLER * 5, budget_tokens=100) == [(0, 400)]
+
+
+def test_excerpt_merges_overlapping_chunks_in_document_order():
+    text = "".join(chr(65 + i % 26) for i in range(4000))
+    assert excerpt(text, [(2100, 3300), (1050, 2250), (0, 10)]) == (
+        text[:10] + "\n[...]\n" + text[1050:3300]
+    )
+
+
+def test_model_findings_point_at_the_chosen_chunk():
+    text = FILLER * 3 + CLAUSE + FILLER
+    with stub_server() as server:
+        stage = EscalationStage(settings(server))
+        (row,) = stage.submit("GDPR", text).result(timeout=30)
+        stage.close()
+    pos = text.index(CLAUSE)
+    assert row["start"] <= pos and pos + len(CLAUSE) <= row["end"]
+    assert row["end"] - row["start"] <= MAX_CHUNK
+    assert "notify the supervisory authority promptly" in row["snippet"]
+
+
+def test_only_the_relevant_excerpt_is_sent():
+    text = FILLER * 10 + CLAUSE + FILLER * 10
+    with stub_server() as server:
+        stage = EscalationStage(settings(server), prompt_tokens=300)
+        (row,) = stage.submit("GDPR", text).result(timeout=30)
+        stage.close()
+    (prompt,) = server.prompts
+    assert CLAUSE in prompt and len(prompt) < 300 * 4 + 600  # excerpt + instructions
+    assert text[row["start"] : row["end"]] in prompt
@@ -0,0 +1,236 @@
+# tests/test_llm_stage.py
+# Tags: #cctests #ccai
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cc_mvp
+from src import llm_layer
+from src.cache import FindingsCache
+from src.llm_client import ChatClient, LLMSettings, RateLimiter
+from src.llm_layer import EscalationStage
+
+from .util_docs import temp_docs, REPO
+
+ANSWER = {
+    "rule_id": "GDPR-BREACH-72H-IMPLICIT",
+    "label": "Breach Notification (stub)",
+    "severity": "medium",
+    "confidence": 0.9,
+    "rationale": "stub",
+}
+EDGE = "We will notify the supervisory authority promptly after any incident."
+
+
+class Stub(ThreadingHTTPServer):
+    """OpenAI-compatible /chat/completions that fails `failures` times first."""
+
+    daemon_threads = True
+
+    def __init__(self, failures=(), delay=0.0):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.failures = list(failures)
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert self.path == "/v1/chat/completions" and body["model"] == "stub-model"
+        assert self.headers["Authorization"] == "Bearer test-key"
+        with stub.lock:
+            stub.prompts.append(body["messages"][-1]["content"])
+            status = stub.failures.pop(0) if stub.failures else 200
+            stub.in_flight += 1
+            stub.peak = max(stub.peak, stub.in_flight)
+        time.sleep(stub.delay)
+        with stub.lock:
+            stub.in_flight -= 1
+        payload = {"choices": [{"message": {"content": json.dumps(ANSWER)}}]}
+        data = json.dumps(payload if status == 200 else {"error": "stub"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@contextmanager
+def stub_server(**kw):
+    server = Stub(**kw)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def settings(server, **kw):
+    return LLMSettings(api_key="test-key", base_url=server.base_url, model="stub-model", **kw)
+
+
+def test_client_retries_rate_limits_and_server_errors():
+    with stub_server(failures=[429, 503]) as server:
+        client = ChatClient(settings(server))
+        assert json.loads(client.complete("hi")) == ANSWER
+        client.close()
+    assert (client.requests, client.retries) == (3, 2)
+
+
+def test_stage_falls_back_to_heuristics_when_retries_run_out():
+    with stub_server(failures=[500] * 5) as server:
+        stage = EscalationStage(settings(server, max_attempts=2))
+        with pytest.raises(llm_layer.AIFallback) as fallback:
+            stage.submit("GDPR", EDGE).result(timeout=30)
+        stage.close()
+    rows = fallback.value.rows
+    assert [r["rationale"] for r in rows] == [
+        f.rationale for f in llm_layer.heuristic_findings("GDPR", EDGE)
+    ]
+    assert stage.fallbacks == 1 and len(server.prompts) == 2
+
+
+def test_heuristic_answers_from_an_outage_are_not_cached(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(REPO)
+
+    def run(server):
+        with FindingsCache(tmp_path / "cache.sqlite") as cache:
+            stage = EscalationStage(settings(server, max_attempts=1))
+            try:
+                rows, _ = cc_mvp.process_docs(
+                    "GDPR", use_ai=True, workers=1, cache=cache, llm=stage
+                )
+            finally:
+                stage.close()
+        return [r for r in rows if r["doc"] == "outage.txt"]
+
+    with temp_docs({"outage.txt": EDGE}):
+        with stub_server(failures=[500] * 100) as down:
+            during = run(down)
+        assert "AI unavailable for outage.txt" in capsys.readouterr().out
+        with stub_server() as up:
+            after = run(up)
+    assert [r["rationale"] for r in during] == [
+        f.rationale for f in llm_layer.heuristic_findings("GDPR", EDGE)
+    ]
+    assert any(EDGE in p for p in up.prompts)  # asked again, not served from the cache
+    assert [r["rationale"] for r in after] == [ANSWER["rationale"]]
+
+
+def test_stage_caps_requests_in_flight():
+    with stub_server(delay=0.2) as server:
+        stage = EscalationStage(settings(server, concurrency=3))
+        futures = [stage.submit("GDPR", f"{EDGE} #{i}") for i in range(9)]
+        results = [f.result(timeout=30) for f in futures]
+        stage.close()
+    assert all(r[0]["rule_id"] == ANSWER["rule_id"] and r[0]["source"] == "llm" for r in results)
+    assert server.peak == stage.chat.peak_in_flight == 3
+    assert len(server.prompts) == 9
+
+
+def test_rate_limiter_budgets_requests_and_tokens():
+    now = [0.0]
+    limiter = RateLimiter(rpm=2, tpm=1000, clock=lambda: now[0])
+
+    async def spend():
+        await limiter.acquire(600)
+        await limiter.acquire(300)
+
+    asyncio.run(spend())
+    assert limiter.delay(100) == pytest.approx(30.0)  # next request slot
+    assert limiter.delay(700) == pytest.approx(36.0)  # 600 more tokens at 1000/min
+    now[0] = 30.0
+    assert limiter.delay(100) == 0.0
+
+
+def test_rate_limiter_paces_a_burst():
+    limiter = RateLimiter(rpm=2, tpm=10_000, period=0.2)  # 2 requests per 0.2 s
+
+    async def burst():
+        for _ in range(6):
+            await limiter.acquire(1)
+
+    started = time.perf_counter()
+    asyncio.run(burst())
+    assert time.perf_counter() - started >= 0.35  # 2 at once, then one per 0.1 s
+
+
+def test_analyze_text_uses_the_shared_client(monkeypatch):
+    with stub_server(failures=[429]) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_MODEL", "stub-model")
+        llm_layer._shared_client.cache_clear()
+        try:
+            rows = llm_layer.analyze_text("GDPR", EDGE)
+            assert llm_layer._shared_client() is llm_layer._shared_client()
+        finally:
+            llm_layer._shared_client.cache_clear()
+    assert [(r["rule_id"], r["source"]) for r in rows] == [(ANSWER["rule_id"], "llm")]
+    assert len(server.prompts) == 2 and EDGE in server.prompts[0]
+
+
+class RecordingSink:
+    def __init__(self):
+        self.docs = []
+
+    def write(self, hits):
+        self.docs.extend(h["doc"] for h in hits)
+
+
+def test_rules_scanning_continues_while_escalations_are_in_flight(monkeypatch):
+    monkeypatch.chdir(REPO)
+    files = {"a_llm_edge.txt": EDGE}
+    files.update({f"b_rules_{i}.txt": "Data subjects keep the right to erasure." for i in range(4)})
+    sink = RecordingSink()
+    events = []
+    scan_task = cc_mvp._scan_task
+
+    def recording_scan(path, *args, **kw):
+        events.append(path.name)
+        return scan_task(path, *args, **kw)
+
+    monkeypatch.setattr(cc_mvp, "_scan_task", recording_scan)
+    with stub_server(delay=0.5) as server, temp_docs(files):
+        stage = EscalationStage(settings(server))
+        submit = stage.submit
+
+        def recording_submit(regime, text):
+            fut = submit(regime, text)
+            if text.strip() == EDGE:  # data/docs has other escalated documents
+                fut.add_done_callback(lambda _: events.append("answer"))
+            return fut
+
+        monkeypatch.setattr(stage, "submit", recording_submit)
+        rows, _ = cc_mvp.process_docs("GDPR", use_ai=True, workers=1, sink=sink, llm=stage)
+        stage.close()
+    assert any(EDGE in p for p in server.prompts)
+    # the escalated document is scanned first, the rest are scanned before its answer
+    ours = [e for e in events if e.startswith(("a_llm_", "b_rules_", "answer"))]
+    assert ours[0] == "a_llm_edge.txt" and ours[-1] == "answer" and len(ours) == 6
+    # ...while the sink and the rows get documents in document order
+    written = [d for d in sink.docs if d.startswith(("a_llm_", "b_rules_"))]
+    assert written == sorted(written) and len(written) == 5
+    ordered = [r["doc"] for r in rows if r["doc"].startswith(("a_llm_", "b_rules_"))]
+    assert ordered == sorted(ordered)
+    (edge,) = [r for r in rows if r["doc"] == "a_llm_edge.txt"]
+    assert edge["source"] == "llm" and edge["rule_id"] == ANSWER["rule_id"]
@@ -0,0 +1,87 @@
+# tests/test_metrics.py
+# Tags: #cctests #ccengine #ccaudit
+import sqlite3
+
+import cc_mvp
+from src.metrics import RunMetrics, percentile
+from src.rulesets import compiled_ruleset
+
+from .util_docs import temp_docs, REPO
+
+FILES = {
+    "metrics_a.txt": (
+        "We notify the supervisory authority within 72 hours of a personal data breach."
+    ),
+    "metrics_b.txt": "Data subjects may request erasure of their personal data.",
+    "metrics_c.txt": "Nothing to report.",
+}
+
+
+def test_percentiles_and_rows():
+    metrics = RunMetrics()
+    for ms in range(1, 101):
+        metrics.add("scan", ms / 1000)
+    metrics.add("read", 0.5)
+    metrics.rule_seconds.update({"R-1": 0.002, "R-2": 0.010})
+    metrics.rule_hits.update({"R-1": 3})
+
+    assert percentile(range(1, 101), 99) == 99 and percentile([], 50) is None
+    assert metrics.stage_rows() == [
+        ("read", 1, 500.0, 500.0, 500.0, 500.0, 500.0),
+        ("scan", 100, 5050.0, 50.0, 95.0, 99.0, 100.0),
+    ]
+    assert metrics.rule_rows() == [("R-2", 0, 10.0), ("R-1", 3, 2.0)]
+    assert ("run", "wall", 1, 0.0, None, None, None, None) in metrics.db_rows()
+    assert any("p95" in line for line in metrics.lines())
+
+
+def test_rule_timing_is_opt_in():
+    ruleset = compiled_ruleset("GDPR")
+    assert ruleset.timing is None
+    ruleset.timing = {}
+    try:
+        found = list(ruleset.scan(FILES["metrics_a.txt"]))
+        timing = ruleset.timing
+    finally:
+        ruleset.timing = None
+    assert found and "(prefilter)" in timing
+    assert {f["rule_id"] for f in found} <= set(timing)
+
+
+def test_process_docs_reports_stages_and_rules(monkeypatch):
+    monkeypatch.chdir(REPO)
+    metrics = RunMetrics(trace_memory=True)
+    with temp_docs(FILES):
+        metrics.start()
+        rows, docs = cc_mvp.process_docs("GDPR", workers=1, metrics=metrics)
+        metrics.stop()
+    scanned = len(docs)
+    for stage in ("read", "normalize", "scan", "document"):
+        assert len(metrics.stages[stage]) == scanned
+    assert sum(metrics.rule_hits.values()) == len(rows)
+    assert all(metrics.rule_seconds[r["rule_id"]] > 0 for r in rows)
+    assert metrics.peak_bytes and metrics.wall > 0
+
+
+def test_cli_persists_run_metrics_and_profile(monkeypatch, capsys):
+    monkeypatch.chdir(REPO)
+    with temp_docs(FILES):
+        cc_mvp.main(["--regime", "GDPR", "--no-cache", "--profile", "--trace-memory"])
+    out = capsys.readouterr().out
+    assert "Timings (ms per document):" in out and "p99" in out
+    assert "Peak traced memory" in out
+
+    with sqlite3.connect(REPO / "data" / "cc_audit.sqlite") as cx:
+        (run_id,) = cx.execute("SELECT run_id FROM runs").fetchone()
+        kinds = dict(cx.execute("SELECT kind, COUNT(*) FROM run_metrics GROUP BY kind"))
+        scan = cx.execute(
+            "SELECT n, p50_ms <= p95_ms AND p95_ms <= p99_ms FROM run_metrics WHERE name='scan'"
+        ).fetchone()
+        peak = cx.execute("SELECT n FROM run_metrics WHERE name='peak_traced_bytes'").fetchone()
+    assert kinds["stage"] >= 4 and kinds["rule"] >= 1 and kinds["run"] == 2
+    assert scan[0] >= len(FILES) and scan[1] == 1
+    assert peak[0] > 0
+
+    profile = REPO / "data" / "outputs" / f"profile_gdpr_{run_id[:8]}.pstats"
+    assert profile.exists()
+    profile.unlink()
@@ -0,0 +1,78 @@
+# tests/test_normalize.py
+# Tags: #cctests #ccengine
+import random
+import re
+from pathlib import Path
+
+import cc_mvp
+from cc_mvp import (
+    compile_rules,
+    load_ruleset,
+    normalize_text,
+    normalize_with_offsets,
+    scan_document,
+)
+
+ALPHABET = [" ", "\t", "\n", "\n", "-", "a", "b", "\r"]
+
+
+def three_pass(t: str) -> str:
+    """The normalizer before it became a single pass."""
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"-\n", "", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+    return t.strip()
+
+
+def test_single_pass_matches_the_three_substitutions():
+    rnd = random.Random(0)
+    for _ in range(20000):
+        raw = "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 30)))
+        assert normalize_text(raw) == three_pass(raw), raw
+        assert normalize_with_offsets(raw)[0] == three_pass(raw), raw
+
+
+def test_text_without_edits_is_not_copied():
+    body = "Clean text.\nOne space, single breaks.\n\nParagraph two."
+    assert cc_mvp._normalize_body(body) is body
+
+
+def test_offsets_point_back_into_the_raw_text():
+    rnd = random.Random(1)
+    for _ in range(2000):
+        raw = "".join(rnd.choice(ALPHABET + ["c", "d"]) for _ in range(rnd.randint(0, 40)))
+        text, offsets = normalize_with_offsets(raw)
+        positions = [offsets.to_raw(i) for i in range(len(text))]
+        assert positions == sorted(set(positions))
+        assert all(raw[p] == c for p, c in zip(positions, text) if not c.isspace())
+
+    raw = "  The  pro-\ncessor\t\tshall\n\n\n\nnotify."
+    text, offsets = normalize_with_offsets(raw)
+    assert text == "The processor shall\n\nnotify."
+    assert len(offsets) == 5  # one entry per edit
+    start = text.index("processor")
+    a, b = offsets.span(start, start + len("processor"))
+    assert raw[a:b] == "pro-\ncessor"
+    a, b = offsets.span(text.index("notify"), len(text))
+    assert raw[a:b] == "notify."
+
+
+def test_findings_cite_raw_offsets_and_keep_their_pages(monkeypatch):
+    pages = [
+        "Cover  page.\nNothing\tto see here.",
+        "Access follows the  principle of least",
+        "privilege for all staff. Access   follows the principle of least privi-\nlege.",
+    ]
+    monkeypatch.setattr(cc_mvp.READERS[".pdf"], "pages", lambda path: iter(pages))
+    ruleset = compile_rules(load_ruleset("SOC2"))
+    streamed, _ = scan_document(Path("filing.pdf"), ruleset)
+    hits, _ = scan_document(Path("filing.pdf"), ruleset, raw_offsets=True)
+    assert [{k: v for k, v in h.items() if not k.startswith("raw_")} for h in hits] == streamed
+    assert [h["page"] for h in hits] == [2, 3]
+
+    raw = "\n".join(pages)
+    text = normalize_text(raw)
+    for h in hits:
+        cited = raw[h["raw_start"] : h["raw_end"]]
+        assert normalize_text(cited) == text[h["start"] : h["end"]]
+    assert raw[hits[1]["raw_start"] : hits[1]["raw_end"]] == "least privi-\nlege"
@@ -0,0 +1,92 @@
+# tests/test_outputs.py
+# Tags: #cctests #ccoutputs
+import argparse
+import csv
+import gzip
+import json
+
+import pytest
+
+import cc_mvp
+from src.outputs import CSV_FIELDS, FindingsOutputs, parse_formats
+
+from .util_docs import temp_docs, REPO
+
+ROWS = [
+    {
+        "rule_id": "GDPR-BREACH-72H",
+        "label": "Breach Notification (72h)",
+        "severity": "critical",
+        "start": 3 + i,
+        "end": 60 + i,
+        "snippet": f'notify within 72 hours — «{i}»\n"quoted", comma',
+        "doc": f"d{i % 3}.pdf",
+        **({"page": i} if i % 2 else {}),
+    }
+    for i in range(7)
+]
+
+
+def read(path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_streamed_files_match_one_shot_serialization(tmp_path, compress):
+    with FindingsOutputs("GDPR", ("csv", "ndjson", "json"), compress, tmp_path, "ts") as out:
+        for i in range(0, len(ROWS), 3):
+            out.write(ROWS[i : i + 3])
+            out.write([])
+    csv_path, ndjson_path, json_path = out.paths
+    assert csv_path.name == f"findings_gdpr_ts.csv{'.gz' if compress else ''}"
+
+    assert read(json_path) == json.dumps(ROWS, indent=2, ensure_ascii=False)
+    assert [json.loads(line) for line in read(ndjson_path).splitlines()] == ROWS
+    header = read(csv_path).splitlines()[0].split(",")
+    assert header[:7] == ["doc", "rule_id", "label", "severity", "start", "end", "snippet"]
+    got = list(csv.DictReader(read(csv_path).splitlines(keepends=True)))
+    assert got == [{k: str(r.get(k, "")) for k in CSV_FIELDS} for r in ROWS]
+
+
+def test_nothing_is_created_without_findings(tmp_path):
+    with FindingsOutputs("SOC2", ("csv", "ndjson", "json"), out_dir=tmp_path / "out") as out:
+        out.write([])
+    assert out.paths == []
+    assert not (tmp_path / "out").exists()
+
+
+def test_parse_formats():
+    assert parse_formats(" CSV,ndjson,csv ") == ("csv", "ndjson")
+    with pytest.raises(argparse.ArgumentTypeError, match="xml"):
+        parse_formats("csv,xml")
+
+
+def test_outputs_follow_document_order_with_a_pool(monkeypatch, tmp_path):
+    monkeypatch.chdir(REPO)
+    files = {
+        f"out_{i:02d}.txt": "Data subjects keep the right to erasure. " * (i + 1) for i in range(5)
+    }
+    with temp_docs(files):
+        with FindingsOutputs("GDPR", ("ndjson",), out_dir=tmp_path) as out:
+            rows, _ = cc_mvp.process_docs("GDPR", workers=3, outputs=out)
+    (path,) = out.paths
+    assert [json.loads(line) for line in read(path).splitlines()] == rows
+    assert sum(r["doc"].startswith("out_") for r in rows) == 15
+
+
+def test_parquet_output_round_trips(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    llm = dict(ROWS[0], start=None, end=None, source="llm", confidence=0.65, rationale="why")
+    with FindingsOutputs("GDPR", ("parquet",), compress=True, out_dir=tmp_path, ts="ts") as out:
+        out.write(ROWS[:4])
+        out.write([llm] + ROWS[4:])
+    (path,) = out.paths
+    assert path.name == "findings_gdpr_ts.parquet"  # compressed internally, no .gz
+    table = pq.read_table(path)
+    assert str(table.schema.field("rule_id").type).startswith("dictionary")
+    got = table.to_pylist()
+    assert [r["page"] for r in got] == [r.get("page") for r in ROWS[:4] + [llm] + ROWS[4:]]
+    assert got[4]["source"] == "llm" and got[4]["start"] is None and got[0]["source"] is None
+    assert [r["snippet"] for r in got[:4]] == [r["snippet"] for r in ROWS[:4]]
@@ -0,0 +1,40 @@
+# tests/test_parallel_docs.py
+# Tags: #cctests #ccengine
+import sqlite3
+
+import cc_mvp
+from src.audit import AuditSink
+
+from .util_docs import temp_docs, REPO
+
+
+def _events(db):
+    with sqlite3.connect(db) as cx:
+        return cx.execute("SELECT id, doc, rule_id, snippet FROM events ORDER BY id").fetchall()
+
+
+def test_pool_matches_serial_and_skips_bad_files(monkeypatch, capsys, tmp_path):
+    monkeypatch.chdir(REPO)
+    files = {
+        f"par_{i:02d}.txt": ("Data subjects keep the right to erasure. " * (i + 1))
+        for i in range(6)
+    }
+    files["par_broken.pdf"] = "this is not a pdf"
+    with temp_docs(files):
+        with AuditSink("GDPR", "t", "run", path=tmp_path / "serial.sqlite") as sink:
+            serial = cc_mvp.process_docs("GDPR", workers=1, sink=sink)
+        serial_out = capsys.readouterr().out
+        with AuditSink("GDPR", "t", "run", path=tmp_path / "parallel.sqlite") as sink:
+            parallel = cc_mvp.process_docs("GDPR", workers=3, sink=sink)
+        parallel_out = capsys.readouterr().out
+
+    assert parallel == serial
+    # audit events (and their ids) follow document order, not completion order
+    assert _events(tmp_path / "parallel.sqlite") == _events(tmp_path / "serial.sqlite")
+    rows, docs = parallel
+    assert "par_broken.pdf" not in docs
+    assert [d for d in docs if d.startswith("par_")] == [f"par_{i:02d}.txt" for i in range(6)]
+    assert sum(r["doc"] == "par_05.txt" for r in rows) == 6
+    # the worker error surfaces as the usual skip warning, once, in both modes
+    for out in (serial_out, parallel_out):
+        assert out.count("WARN: Skipping") == 1 and "par_broken.pdf" in out
@@ -0,0 +1,71 @@
+# tests/test_pdf_streaming.py
+# Tags: #cctests #ccengine
+import random
+import re
+from pathlib import Path
+
+import cc_mvp
+from cc_mvp import compile_rules, iter_normalized, load_ruleset, normalize_text, scan_document
+from src.engine import Rule, RuleSet
+
+REPO = Path(__file__).resolve().parents[1]
+TESTDOCS = REPO / "data" / "testdocs"
+EMPTY = [r"a*", r"\b", r"(?:ab)*", r"x*y*", r"a|", r"(?=b)"]  # patterns that can match ""
+
+
+def test_streaming_normalizer_matches_whole_document():
+    rnd = random.Random(0)
+    alphabet = [" ", "\t", "\n", "-", "a", "b", "\r"]
+    for _ in range(2000):
+        pages = [
+            "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 10)))
+            for _ in range(rnd.randint(1, 5))
+        ]
+        streamed = "".join(piece for _, piece in iter_normalized(pages))
+        assert streamed == normalize_text("\n".join(pages)), pages
+
+
+def test_windowed_scan_equals_full_scan_across_page_splits():
+    ruleset = compile_rules(load_ruleset("GDPR") + load_ruleset("SOC2"))
+    seed = "\n".join(p.read_text(encoding="utf-8") for p in sorted(TESTDOCS.rglob("*.txt")))
+    rnd = random.Random(1)
+    for _ in range(10):
+        text = seed * rnd.randint(1, 4)
+        cuts = sorted(rnd.sample(range(1, len(text)), 25))
+        pages = [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+        expected = list(ruleset.scan(normalize_text("\n".join(pages))))
+        got = ruleset.scan_segments(iter_normalized(pages), min_window=rnd.choice([1, 300]))
+        assert [{k: v for k, v in f.items() if k != "page"} for f in got] == expected
+
+
+def test_windowed_scan_keeps_empty_matches():
+    ruleset = RuleSet([Rule(f"E{k}", "Empty", "info", re.compile(p)) for k, p in enumerate(EMPTY)])
+    rnd = random.Random(2)
+    for _ in range(200):
+        text = "".join(rnd.choice("aab xy\n") for _ in range(rnd.randint(0, 3000)))
+        cuts = sorted(rnd.sample(range(len(text) + 1), min(len(text) + 1, 5)))
+        pages = [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+        got = ruleset.scan_segments(((None, p) for p in pages), min_window=rnd.choice([1, 64]))
+        assert list(got.fields("rule_id", "start", "end")) == list(
+            ruleset.find(text).fields("rule_id", "start", "end")
+        )
+
+
+def test_pdf_findings_carry_page_numbers_across_breaks(monkeypatch):
+    pages = [
+        "Cover page.\nNothing to see here.",
+        "Access follows the principle of least",
+        "privilege for all staff.",
+    ]
+    monkeypatch.setattr(cc_mvp.READERS[".pdf"], "pages", lambda path: iter(pages))
+    hits, text = scan_document(Path("filing.pdf"), compile_rules(load_ruleset("SOC2")))
+    assert text is None
+    [hit] = hits
+    assert hit["rule_id"] == "SOC2-LEAST-PRIV" and hit["page"] == 2
+    full = normalize_text("\n".join(pages))
+    assert full[hit["start"] : hit["end"]] == "least\nprivilege"
+
+
+def test_real_pdf_is_streamed():
+    hits, _ = scan_document(TESTDOCS / "breach_gdpr.pdf", compile_rules(load_ruleset("GDPR")))
+    assert hits and {h["page"] for h in hits} == {1}
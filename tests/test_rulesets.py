@@ -0,0 +1,84 @@
+# tests/test_rulesets.py
+# Tags: #cctests #ccrules
+import os
+import sqlite3
+
+import pytest
+import yaml
+
+import src.rulesets as rulesets
+from src import audit
+from src.rulesets import compiled_ruleset, load_compiled
+
+RULES = """
+rules:
+  - id: T-ERASE
+    label: Erasure
+    severity: high
+    value: "(?i)right to erasure"
+  - id: T-VENDOR
+    label: Vendor
+    type: dictionary
+    terms_file: vendors.txt
+"""
+
+
+@pytest.fixture
+def rule_file(tmp_path):
+    (tmp_path / "vendors.txt").write_text("Acme Cloud\n", encoding="utf-8")
+    f = tmp_path / "t.yml"
+    f.write_text(RULES, encoding="utf-8")
+    return f
+
+
+def test_memoized_until_a_rule_or_terms_file_changes(rule_file):
+    first = load_compiled([rule_file])
+    assert load_compiled([rule_file]) is first
+
+    os.utime(rule_file, (1, 1))  # touched, same bytes: still reused
+    assert load_compiled([rule_file]) is first
+
+    (rule_file.parent / "vendors.txt").write_text("Acme Cloud\nGlobex\n", encoding="utf-8")
+    second = load_compiled([rule_file])
+    assert second is not first and second.fingerprint != first.fingerprint
+    assert [f["snippet"] for f in second.scan("Globex") if f["rule_id"] == "T-VENDOR"]
+
+
+def test_rules_resolve_relative_to_the_package(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert len(compiled_ruleset("GDPR")) > 0
+
+
+def test_bundle_skips_yaml_and_is_rebuilt_when_stale(monkeypatch, rule_file, tmp_path):
+    bundle = tmp_path / "rules.bundle"
+    built = load_compiled([rule_file], bundle)
+    assert bundle.exists()
+
+    rulesets._memo.clear()
+    monkeypatch.setattr(yaml, "safe_load", lambda *a: pytest.fail("YAML parsed"))
+    monkeypatch.setattr(rulesets, "load_rules", lambda *a: pytest.fail("YAML parsed"))
+    loaded = load_compiled([rule_file], bundle)
+    assert loaded.fingerprint == built.fingerprint
+    monkeypatch.undo()
+
+    rule_file.write_text(RULES.replace("high", "critical"), encoding="utf-8")
+    rulesets._memo.clear()
+    rebuilt = load_compiled([rule_file], bundle)
+    assert rebuilt.fingerprint != built.fingerprint
+    assert rulesets._read_bundle(bundle)[1].fingerprint == rebuilt.fingerprint
+
+
+def test_audit_records_ruleset_fingerprint_and_migrates_old_logs(monkeypatch, tmp_path):
+    db = tmp_path / "audit.sqlite"
+    with sqlite3.connect(db) as cx:  # a log written before the column existed
+        cx.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL,"
+            " run_id TEXT NOT NULL, version TEXT NOT NULL, regime TEXT NOT NULL,"
+            " doc TEXT NOT NULL, rule_id TEXT NOT NULL, label TEXT NOT NULL,"
+            " severity TEXT NOT NULL, snippet TEXT NOT NULL)"
+        )
+    monkeypatch.setattr(audit, "DB_PATH", db)
+    fp = compiled_ruleset("GDPR").fingerprint
+    audit.write_events([{"doc": "a.txt", "rule_id": "R"}], "GDPR", "t", "run", ruleset=fp)
+    with sqlite3.connect(db) as cx:
+        assert cx.execute("SELECT ruleset FROM events").fetchall() == [(fp,)]
@@ -0,0 +1,97 @@
+# tests/test_server.py
+# Tags: #cctests #ccserve
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from src.server import ScanService, make_server, percentile
+
+from .util_docs import DOCS, REPO
+
+BREACH = "We notify the supervisory authority within 72 hours of a personal data breach."
+
+
+@contextmanager
+def running(monkeypatch, **kw):
+    monkeypatch.chdir(REPO)
+    service = ScanService(["GDPR", "SOC2"], path_root=DOCS)
+    server = make_server(service, port=0, quiet=True, **kw)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def _request(server, method, url, body=None, headers=None):
+    if isinstance(server.server_address, str):
+        cx = _UnixConnection(server.server_address)
+    else:
+        cx = http.client.HTTPConnection(*server.server_address[:2], timeout=30)
+    try:
+        cx.request(method, url, body=body, headers=headers or {})
+        res = cx.getresponse()
+        return res.status, json.loads(res.read())
+    finally:
+        cx.close()
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost", timeout=30)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def test_scan_bytes_and_concurrent_requests_feed_status(monkeypatch):
+    with running(monkeypatch) as server:
+        status, res = _request(server, "POST", "/scan?regime=GDPR&name=up.txt", BREACH.encode())
+        assert status == 200 and res["doc"] == "up.txt"
+        assert [f["rule_id"] for f in res["findings"]] == ["GDPR-BREACH-72H"]
+        assert {"read", "scan", "total"} <= set(res["timings_ms"])
+
+        def scan(i):
+            return _request(server, "POST", f"/scan?regime=SOC2&name=d{i}.txt", b"Use MFA.")[0]
+
+        with ThreadPoolExecutor(8) as pool:
+            assert set(pool.map(scan, range(24))) == {200}
+
+        status, stats = _request(server, "GET", "/status")
+        assert status == 200 and stats["requests"] == 25 and stats["in_flight"] == 0
+        assert 0 < stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+        assert set(stats["rulesets"]) == {"GDPR", "SOC2"}
+
+
+def test_paths_stay_inside_root_and_errors_are_json(monkeypatch, tmp_path):
+    (DOCS / "serve_path.txt").write_text(BREACH, encoding="utf-8")
+    try:
+        with running(monkeypatch, unix_socket=str(tmp_path / "cc.sock")) as server:
+            hdr = {"Content-Type": "application/json"}
+            ok = json.dumps({"regime": "gdpr", "path": "serve_path.txt"})
+            status, res = _request(server, "POST", "/scan", ok, hdr)
+            assert status == 200 and len(res["findings"]) == 1
+
+            escape = json.dumps({"regime": "GDPR", "path": "../../cc_mvp.py"})
+            assert _request(server, "POST", "/scan", escape, hdr)[0] == 404
+            assert _request(server, "POST", "/scan?regime=HIPAA", b"x")[0] == 400
+            assert _request(server, "POST", "/scan?regime=GDPR&name=a.exe", b"x")[0] == 415
+            negative = {"Content-Length": "-1"}  # must not read to EOF (and hang)
+            assert _request(server, "POST", "/scan?regime=GDPR", b"", negative)[0] == 400
+            _, stats = _request(server, "GET", "/status")
+            assert stats["requests"] == 5 and stats["errors"] == 4
+    finally:
+        (DOCS / "serve_path.txt").unlink()
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile(range(1, 101), 50) == 50 and percentile(range(1, 101), 99) == 99
@@ -0,0 +1,32 @@
+# tests/test_startup.py
+# Tags: #cctests #ccstartup
+import sys
+
+from benchmarks.bench_startup import HEAVY_MODULES, STARTUP_BUDGET_MS, loaded_modules, startup_ms
+
+import cc_mvp
+
+
+def test_cli_import_skips_heavy_backends():
+    assert not [m for m in HEAVY_MODULES if m in loaded_modules()]
+
+
+def test_cli_import_within_budget():
+    assert startup_ms(runs=3) <= STARTUP_BUDGET_MS
+
+
+def test_readers_are_registered_by_suffix_and_warmable():
+    assert {".txt", ".pdf", ".docx"} <= set(cc_mvp.ALLOWED_SUFFIXES)
+    assert cc_mvp.READERS[".pdf"].paged and cc_mvp.reader_for(cc_mvp.Path("x.md")).suffix == ".txt"
+    cc_mvp.warm_readers()
+    assert "pdfplumber" in sys.modules and "docx" in sys.modules
+
+
+def test_llm_layer_imports_without_api_keys(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.delitem(sys.modules, "src.llm_layer", raising=False)
+    from src.llm_layer import analyze_text
+
+    text = "We will notify the supervisory authority promptly."
+    assert [f["rule_id"] for f in analyze_text("GDPR", text)] == ["GDPR-BREACH-72H-IMPLICIT"]
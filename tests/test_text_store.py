@@ -0,0 +1,83 @@
+# tests/test_text_store.py
+# Tags: #cctests #cccache
+import os
+from pathlib import Path
+
+import pytest
+
+import cc_mvp
+from cc_mvp import compile_rules, load_ruleset, scan_document
+from src.cache import TextStore
+
+PAGES = [
+    "Cover page.\nNothing to see here.",
+    "Access follows the principle of least",
+    "privilege for all staff.",
+]
+
+
+def _fake_pdf(monkeypatch):
+    calls = []
+
+    def pages(path):
+        calls.append(path)
+        return iter(PAGES)
+
+    monkeypatch.setattr(cc_mvp.READERS[".pdf"], "pages", pages)
+    return calls
+
+
+def test_second_scan_skips_extraction(monkeypatch, tmp_path):
+    calls = _fake_pdf(monkeypatch)
+    store = TextStore(tmp_path / "text")
+    ruleset = compile_rules(load_ruleset("SOC2"))
+    first, _ = scan_document(Path("a.pdf"), ruleset, content_hash="h1", text_store=store)
+    assert len(calls) == 1 and first[0]["page"] == 2
+
+    # rules changed, bytes did not: findings are recomputed, text is reused
+    ruleset = compile_rules(load_ruleset("SOC2") + load_ruleset("GDPR"))
+    second, _ = scan_document(Path("a.pdf"), ruleset, content_hash="h1", text_store=store)
+    assert len(calls) == 1 and second == first
+
+    scan_document(Path("a.pdf"), ruleset, content_hash="h2", text_store=store)
+    assert len(calls) == 2  # new content hash -> extracted again
+
+
+def test_failed_extraction_leaves_no_entry(monkeypatch, tmp_path):
+    def broken(path):
+        yield "first page"
+        raise ValueError("corrupt xref")
+
+    monkeypatch.setattr(cc_mvp.READERS[".pdf"], "pages", broken)
+    store = TextStore(tmp_path / "text")
+    with pytest.raises(ValueError):
+        scan_document(Path("b.pdf"), compile_rules(load_ruleset("SOC2")), False, None, "h", store)
+    assert store.get("h", cc_mvp.reader_version(".pdf")) is None
+    assert not list((tmp_path / "text").rglob("*.*"))
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    store = TextStore(tmp_path / "text", max_bytes=0)
+    for i, key in enumerate(["old", "mid", "new"]):
+        list(store.record(key, "r", [(1, os.urandom(2000).hex())]))
+        path = store._path(key, "r")
+        os.utime(path, (1000 + i, 1000 + i))
+    store.max_bytes = sum(f.stat().st_size for f in store._files()) - 1  # one must go
+    list(store.get("old", "r"))  # a read makes "old" the most recently used
+    assert store.prune() == 1
+    assert store.get("mid", "r") is None
+    assert [t for _, t in store.get("old", "r")] and store.get("new", "r") is not None
+
+
+def test_corrupt_entry_is_dropped_and_re_extracted(monkeypatch, tmp_path):
+    calls = _fake_pdf(monkeypatch)
+    store = TextStore(tmp_path / "text")
+    ruleset = compile_rules(load_ruleset("SOC2"))
+    first, _ = scan_document(Path("c.pdf"), ruleset, content_hash="h", text_store=store)
+    path = store._path("h", cc_mvp.reader_version(".pdf"))
+    path.write_bytes(path.read_bytes()[:-12])  # truncated: gzip trailer missing
+
+    again, _ = scan_document(Path("c.pdf"), ruleset, content_hash="h", text_store=store)
+    assert len(calls) == 2 and again == first  # extracted again instead of failing
+    third, _ = scan_document(Path("c.pdf"), ruleset, content_hash="h", text_store=store)
+    assert len(calls) == 2 and third == first  # ...and stored again